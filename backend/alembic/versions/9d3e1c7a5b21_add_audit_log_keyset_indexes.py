@@ -0,0 +1,35 @@
+"""Add audit log keyset indexes
+
+Revision ID: 9d3e1c7a5b21
+Revises: 4f14b3b2b40b
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3e1c7a5b21'
+down_revision: Union[str, Sequence[str], None] = '4f14b3b2b40b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_audit_logs_created_at_id', 'audit_logs', ['created_at', 'id'], unique=False)
+    op.create_index('ix_audit_logs_user_id_created_at', 'audit_logs', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_audit_logs_resource_type_created_at', 'audit_logs', ['resource_type', 'created_at', 'id'], unique=False)
+    op.create_index('ix_audit_logs_action_created_at', 'audit_logs', ['action', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_audit_logs_action_created_at', table_name='audit_logs')
+    op.drop_index('ix_audit_logs_resource_type_created_at', table_name='audit_logs')
+    # MySQL backs the user_id foreign key with this index until another one exists
+    op.create_index('ix_audit_logs_user_id', 'audit_logs', ['user_id'], unique=False)
+    op.drop_index('ix_audit_logs_user_id_created_at', table_name='audit_logs')
+    op.drop_index('ix_audit_logs_created_at_id', table_name='audit_logs')
@@ -0,0 +1,55 @@
+"""Add inspection record detail counts
+
+Revision ID: c4a8e2f61d90
+Revises: 9d3e1c7a5b21
+Create Date: 2026-10-18 14:37:05.512930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a8e2f61d90'
+down_revision: Union[str, Sequence[str], None] = '9d3e1c7a5b21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('inspection_records', sa.Column('item_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('inspection_records', sa.Column('damaged_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('inspection_records', sa.Column('missing_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill from the existing details
+    records = sa.table(
+        'inspection_records',
+        sa.column('id'), sa.column('item_count'), sa.column('damaged_count'), sa.column('missing_count'),
+    )
+    details = sa.table('inspection_details', sa.column('record_id'), sa.column('status'))
+
+    def detail_count(*conditions):
+        return (
+            sa.select(sa.func.count())
+            .select_from(details)
+            .where(details.c.record_id == records.c.id, *conditions)
+            .scalar_subquery()
+        )
+
+    op.execute(
+        records.update().values(
+            item_count=detail_count(),
+            damaged_count=detail_count(details.c.status == 'damaged'),
+            missing_count=detail_count(details.c.status == 'missing'),
+        )
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('inspection_records', 'missing_count')
+    op.drop_column('inspection_records', 'damaged_count')
+    op.drop_column('inspection_records', 'item_count')
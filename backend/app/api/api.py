@@ -5,7 +5,8 @@ from .endpoints import (
     buildings, beds, students, lights_out, patrol_locations,
     permissions, admin, admin_inspections, import_data, reports, notifications, backup,
 
-    dashboard, search, images, audit_logs,announcements, system_settings # Add audit_logs, system_settings
+    dashboard, search, images, audit_logs,announcements, system_settings, # Add audit_logs, system_settings
+    metrics, uploads
 
 )
 
@@ -15,6 +16,7 @@ api_router = APIRouter()
 api_router.include_router(auth.router, tags=["auth"])
 api_router.include_router(system_settings.router, prefix="/system-settings", tags=["system-settings"])
 api_router.include_router(images.router, prefix="/images", tags=["images"]) # New images router
+api_router.include_router(uploads.router, prefix="/uploads", tags=["uploads"])
 api_router.include_router(announcements.router, prefix="/announcements", tags=["announcements"]) # New announcements router
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(roles.router, prefix="/roles", tags=["roles"])
@@ -36,3 +38,4 @@ api_router.include_router(reports.router, prefix="/reports", tags=["reports"])
 api_router.include_router(notifications.router, prefix="/notifications", tags=["notifications"])
 api_router.include_router(backup.router, prefix="/backup", tags=["backup"])
 api_router.include_router(audit_logs.router, prefix="/audit-logs", tags=["audit-logs"])
+api_router.include_router(metrics.router, prefix="/admin/metrics", tags=["admin-metrics"])
@@ -43,7 +43,7 @@ EXPORTABLE_MODELS = {
 @router.post("/export-data", dependencies=[Depends(auth.PermissionChecker("manage_users"))])
 async def export_data_to_csv(
     export_request: schemas.DataExportRequest,
-    db: AsyncSession = Depends(auth.get_db),
+    db: AsyncSession = Depends(auth.get_read_db),
     current_user: models.User = Depends(auth.get_current_active_user)
 ):
     """
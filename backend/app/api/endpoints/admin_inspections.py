@@ -42,7 +42,7 @@ async def create_admin_inspection(
             raise HTTPException(status_code=400, detail="Room ID must be an integer")
         # Using crud_student.get_multi_filtered to find students in room
         # Note: crud_student.get_multi_filtered returns dict {"total": x, "records": [...]}, we need list
-        result = await crud_student.get_multi_filtered(db, room_id=request.target_id, limit=1000)
+        result = await crud_student.get_multi_filtered(db, room_id=request.target_id, limit=1000, include_total=False)
         students_in_room = result['records']
         students_to_inspect.extend(students_in_room)
 
@@ -50,7 +50,7 @@ async def create_admin_inspection(
         if not isinstance(request.target_id, str):
             raise HTTPException(status_code=400, detail="Household name must be a string")
         # Using crud_student.get_multi_filtered to find students in household
-        result = await crud_student.get_multi_filtered(db, household=request.target_id, limit=1000)
+        result = await crud_student.get_multi_filtered(db, household=request.target_id, limit=1000, include_total=False)
         students_in_household = result['records']
         students_to_inspect.extend(students_in_household)
         
@@ -89,10 +89,10 @@ async def create_admin_inspection(
          raise HTTPException(status_code=400, detail="Could not create any inspection records. Ensure students are assigned to rooms.")
 
     # Batch create using crud_inspection instance
-    created_records = await crud_inspection.batch_create(
+    created_ids = await crud_inspection.batch_create(
         db=db,
         data=inspection_data_list,
         inspector_id=current_user.id
     )
 
-    return {"message": f"Successfully created {len(created_records)} inspection records."}
+    return {"message": f"Successfully created {len(created_ids)} inspection records."}
@@ -1,9 +1,11 @@
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 
 from ... import crud, schemas, auth, models
+from ...crud.base import encode_cursor
+from ...services.audit_archiver import audit_archiver
 
 router = APIRouter()
 
@@ -11,6 +13,8 @@ router = APIRouter()
 async def read_audit_logs(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; replaces skip"),
+    approximate_total: bool = Query(False, description="Cheaper, possibly inexact total"),
     action: Optional[str] = None,
     resource_type: Optional[str] = None,
     user_id: Optional[str] = None,
@@ -32,29 +36,41 @@ async def read_audit_logs(
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid user ID format")
 
-    logs = await crud.crud_audit.get_audit_logs(
-        db,
-        skip=skip,
-        limit=limit,
-        action=action,
-        resource_type=resource_type,
-        user_id=user_uuid,
-        start_date=start_date,
-        end_date=end_date
-    )
-    
-    # Basic count implementation if not available in CRUD yet
-    # Ideally we should add get_count to CRUD, but for now let's fetch all count or just return len(logs) if pagination isn't strict?
-    # No, we need total for pagination.
-    # Let's assume crud_audit.get_count exists or we need to implement it. 
-    # I'll check crud_audit.py first.
-    total = await crud.crud_audit.get_count(
-        db,
-        action=action,
-        resource_type=resource_type,
-        user_id=user_uuid,
-        start_date=start_date,
-        end_date=end_date
-    )
-
-    return {"total": total, "records": logs}
+    filters = {
+        "action": action,
+        "resource_type": resource_type,
+        "user_id": user_uuid,
+        "start_date": start_date,
+        "end_date": end_date,
+    }
+
+    # One extra row tells us whether there is a next page
+    logs = await crud.crud_audit.get_audit_logs(db, skip=skip, limit=limit + 1, cursor=cursor, **filters)
+
+    next_cursor = None
+    if len(logs) > limit:
+        logs = logs[:limit]
+        next_cursor = encode_cursor(logs[-1].created_at, logs[-1].id)
+
+    total = await crud.crud_audit.get_count(db, approximate=approximate_total, **filters)
+
+    return {
+        "total": total,
+        "records": logs,
+        "next_cursor": next_cursor,
+        "total_is_estimate": approximate_total,
+    }
+
+@router.post("/archive", response_model=Dict[str, Any], dependencies=[Depends(auth.PermissionChecker("system:settings"))])
+async def archive_audit_logs(
+    after_days: Optional[int] = Query(None, ge=1, description="Defaults to AUDIT_ARCHIVE_AFTER_DAYS"),
+):
+    """
+    Moves audit logs older than `after_days` into the compressed monthly archive.
+    Archived logs are still returned by the list endpoint.
+    Requires 'system:settings' permission.
+    """
+    if after_days is None and not audit_archiver.enabled:
+        raise HTTPException(status_code=400, detail="Audit archiving is disabled; pass after_days")
+    archived = await audit_archiver.run_once(after_days=after_days)
+    return {"archived": archived, **audit_archiver.stats()}
@@ -10,12 +10,14 @@ from urllib.parse import urljoin # Import urljoin
 from sqlalchemy import select # For verifying user status
 
 from ... import schemas, auth as auth_dependency
-from ...crud import crud_user, crud_audit # Make sure crud_user and crud_audit are imported
+from ...crud import crud_user
 from ...utils import security # Import security module
 from ...utils.email import send_email as send_email_util # Import email sender
 from ...config import settings
 from ...services.auth_service import AuthService, get_auth_service
 from ...services.notification_service import notification_service
+from ...services.token_blocklist import token_blocklist
+from ...services.audit_sink import audit_sink
 from ...limiter import limiter # 引入 limiter
 
 router = APIRouter()
@@ -42,14 +44,11 @@ async def login_for_access_token(
         )
     
     # Audit Log: Login
-    await crud_audit.create(
-        db=auth_service.db,
-        obj_in={
-            "action": "LOGIN",
-            "resource_type": "User",
-            "resource_id": str(user.id),
-            "details": {"username": user.username},
-        },
+    await audit_sink.emit(
+        action="LOGIN",
+        resource_type="User",
+        resource_id=str(user.id),
+        details={"username": user.username},
         user_id=user.id,
         ip_address=request.client.host if request.client else None
     )
@@ -99,6 +98,7 @@ async def logout(
         if jti and exp:
             expires_at = datetime.fromtimestamp(exp, tz=timezone.utc)
             await crud_user.add_token_to_blocklist(auth_service.db, jti=jti, expires_at=expires_at)
+            token_blocklist.add(jti)
             
     except JWTError:
         # Token is invalid, but we already deleted the cookie, so just ignore
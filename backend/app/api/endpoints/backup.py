@@ -13,7 +13,7 @@ def model_to_dict(obj):
 router = APIRouter()
 
 @router.get("/export", summary="Export All System Data", response_model=Dict[str, List[Dict[str, Any]]], dependencies=[Depends(auth.PermissionChecker("manage_users"))])
-async def export_data(db: AsyncSession = Depends(auth.get_db)):
+async def export_data(db: AsyncSession = Depends(auth.get_read_db)):
     """
     Exports all data from the system as a JSON object.
     Requires 'manage_users' permission.
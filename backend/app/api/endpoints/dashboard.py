@@ -17,7 +17,7 @@ class DashboardStats(BaseModel):
     total_rooms: int
     inspections_today: int
     issues_found: int
-    recent_inspections: List[schemas.InspectionRecord]
+    recent_inspections: List[schemas.InspectionRecordSummary]
 
 # --- Endpoints ---
 
@@ -27,7 +27,7 @@ class DashboardStats(BaseModel):
     dependencies=[Depends(auth.PermissionChecker("reports:view_statistics"))],
 )
 async def get_dashboard_stats(
-    db: AsyncSession = Depends(auth.get_db),
+    db: AsyncSession = Depends(auth.get_read_db),
 ):
     """
     Get statistics for the admin dashboard.
@@ -36,7 +36,9 @@ async def get_dashboard_stats(
     total_rooms = await crud_room.get_count(db)
     inspections_today = await crud_inspection.get_count_today(db)
     issues_found = await crud_inspection.get_issues_count(db)
-    paginated_inspections = await crud_inspection.get_multi_filtered(db, limit=5, sort_by="created_at", sort_direction="desc")
+    paginated_inspections = await crud_inspection.get_multi_filtered(
+        db, limit=5, sort_by="created_at", sort_direction="desc", include_total=False, summary=True
+    )
     recent_inspections = paginated_inspections.get("records", [])
 
     return {
@@ -54,7 +56,7 @@ async def get_dashboard_stats(
     dependencies=[Depends(auth.PermissionChecker("reports:view_statistics"))],
 )
 async def get_dashboard_chart_data(
-    db: AsyncSession = Depends(auth.get_db),
+    db: AsyncSession = Depends(auth.get_read_db),
 ):
     """
     Retrieve data for dashboard charts.
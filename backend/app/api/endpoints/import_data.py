@@ -3,8 +3,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 import pandas as pd
 import io
 import numpy as np
+from typing import Dict
 
 from ... import crud, schemas, auth
+from ...database import unit_of_work
 
 router = APIRouter()
 
@@ -29,7 +31,7 @@ HEADER_MAPPING = {
     '車牌號碼': 'license_plate',
 }
 
-@router.post("/upload", status_code=200, dependencies=[Depends(auth.PermissionChecker("manage_users"))])
+@router.post("/upload", status_code=200, dependencies=[Depends(auth.PermissionChecker("manage_users")), Depends(unit_of_work, scope="function")])
 async def upload_data(file: UploadFile = File(...), db: AsyncSession = Depends(auth.get_db)):
     """
     Upload and process a CSV or Excel file to import student and room data.
@@ -52,6 +54,7 @@ async def upload_data(file: UploadFile = File(...), db: AsyncSession = Depends(a
 
         created_counts = {"buildings": 0, "rooms": 0, "beds": 0, "students": 0}
         updated_counts = {"students": 0}
+        new_students: Dict[str, schemas.StudentCreate] = {}
 
         for _, row in df.iterrows():
             # Skip rows where essential data is missing
@@ -129,11 +132,13 @@ async def upload_data(file: UploadFile = File(...), db: AsyncSession = Depends(a
                     await crud.crud_student.update(db, db_obj=existing_student, obj_in=student_data)
                     updated_counts["students"] += 1
                 else:
-                    # Create new student
-                    # Ensure all required fields for StudentCreate are present
-                    student_in = schemas.StudentCreate(**student_data)
-                    await crud.crud_student.create(db, obj_in=student_in)
-                    created_counts["students"] += 1
+                    # New students are inserted together after the loop; a repeated
+                    # student ID keeps the data of its last row
+                    new_students[str(student_id)] = schemas.StudentCreate(**student_data)
+
+        if new_students:
+            await crud.crud_student.bulk_create(db, objs_in=list(new_students.values()))
+            created_counts["students"] = len(new_students)
 
         return {
             "message": "Data import completed successfully.",
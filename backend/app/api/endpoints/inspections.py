@@ -3,7 +3,7 @@ import logging
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
 from fastapi import Request # Add Request import
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional
+from typing import List, Literal, Optional, Union
 from fastapi.responses import StreamingResponse
 from datetime import datetime
 from fastapi.concurrency import run_in_threadpool # Import run_in_threadpool
@@ -17,11 +17,17 @@ from ...services.auth_service import AuthService, get_auth_service # 新增 Auth
 from ...services.inspection_service import InspectionService, get_inspection_service # 新增 InspectionService 相關導入
 from ...services.notification_service import notification_service # 新增 NotificationService 相關導入
 from ...auth import get_current_active_user, PermissionChecker # 引入 get_current_active_user, PermissionChecker
+from ...database import get_read_db
 from ...utils.audit import audit_log # Import audit_log
+from ...core.permissions import permission_registry
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# ?view= of the list endpoints: full records, or one summary row per record
+ListView = Literal["full", "summary"]
+PaginatedInspections = Union[schemas.PaginatedInspectionRecords, schemas.PaginatedInspectionSummaries]
+
 @router.post("/batch", response_model=List[schemas.InspectionRecord], status_code=status.HTTP_201_CREATED, dependencies=[Depends(PermissionChecker("inspections:submit_any"))])
 @audit_log(action="BATCH_CREATE", resource_type="InspectionRecord")
 async def batch_create_inspections(
@@ -57,9 +63,8 @@ async def create_inspection(
     Create new inspection record.
     """
     # Check permissions dynamically
-    user_permissions = {perm.name for role in current_user.roles for perm in role.permissions}
-    can_submit_any = "inspections:submit_any" in user_permissions or "admin:full_access" in user_permissions
-    can_submit_own = "inspections:submit_own" in user_permissions
+    can_submit_any = permission_registry.has(current_user, "inspections:submit_any")
+    can_submit_own = permission_registry.has(current_user, "inspections:submit_own")
     
     # Note: PermissionChecker already ensures user has at least one of the permissions.
     # But we keep the variables for logic flow.
@@ -114,9 +119,16 @@ async def create_inspection(
         logger.error(f"Error creating inspection: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
 
-@router.get("/search", response_model=schemas.PaginatedInspectionRecords, dependencies=[Depends(PermissionChecker("inspections:view_all"))])
+def _paginated(results: dict, view: ListView) -> PaginatedInspections:
+    # A model instance of the requested shape, so the Union response model
+    # does not have to try the other one
+    if view == "summary":
+        return schemas.PaginatedInspectionSummaries(**results)
+    return schemas.PaginatedInspectionRecords.model_validate(results)
+
+@router.get("/search", response_model=PaginatedInspections, dependencies=[Depends(PermissionChecker("inspections:view_all"))])
 async def search_inspections(
-    inspection_service: InspectionService = Depends(get_inspection_service),
+    db: AsyncSession = Depends(get_read_db),
     student_name: Optional[str] = None,
     room_number: Optional[str] = None,
     start_date: Optional[datetime] = None,
@@ -124,13 +136,17 @@ async def search_inspections(
     status: Optional[str] = None,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    view: ListView = "full",
 ):
     """
     Advanced search for inspection records. Requires 'inspections:view_all'.
+    `view=summary` returns one summary row per record instead of full records.
     """
     # Using crud_inspection instance method
     paginated_results = await crud_inspection.get_multi_filtered(
-        inspection_service.db,
+        db,
         student_name=student_name,
         room_number=room_number,
         start_date=start_date,
@@ -138,15 +154,21 @@ async def search_inspections(
         status=status,
         skip=skip,
         limit=limit,
+        cursor=cursor,
+        include_total=include_total,
+        summary=view == "summary",
     )
-    return paginated_results
+    return _paginated(paginated_results, view)
 
-@router.get("/", response_model=schemas.PaginatedInspectionRecords, dependencies=[Depends(PermissionChecker(["inspections:view_all", "inspections:view_own"], logic="OR"))])
+@router.get("/", response_model=PaginatedInspections, dependencies=[Depends(PermissionChecker(["inspections:view_all", "inspections:view_own"], logic="OR"))])
 async def read_inspections(
-    inspection_service: InspectionService = Depends(get_inspection_service),
+    db: AsyncSession = Depends(get_read_db),
     current_user: models.User = Depends(get_current_active_user),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    view: ListView = "full",
     student_id: Optional[uuid.UUID] = None,
     room_id: Optional[int] = None,
     status: Optional[schemas.InspectionStatus] = None,
@@ -159,17 +181,18 @@ async def read_inspections(
 ):
     """
     Retrieve inspection records with advanced filtering.
+    `view=summary` returns one summary row per record (names, counts, no
+    details or photos) from a single query; use GET /{record_id} for the rest.
     """
-    user_permissions = {perm.name for role in current_user.roles for perm in role.permissions}
-    has_view_all = "inspections:view_all" in user_permissions or "admin:full_access" in user_permissions
-    has_view_own = "inspections:view_own" in user_permissions
+    has_view_all = permission_registry.has(current_user, "inspections:view_all")
+    has_view_own = permission_registry.has(current_user, "inspections:view_own")
     
     # PermissionChecker ensures at least one is present.
 
     paginated_results: dict
     if has_view_all:
         paginated_results = await crud_inspection.get_multi_filtered(
-            inspection_service.db,
+            db,
             skip=skip,
             limit=limit,
             student_id=student_id,
@@ -180,16 +203,19 @@ async def read_inspections(
             student_full_name=student_full_name,
             item_status=item_status,
             sort_by=sort_by,
-            sort_direction=sort_direction
+            sort_direction=sort_direction,
+            cursor=cursor,
+            include_total=include_total,
+            summary=view == "summary",
         )
     else:
         if not current_user.student:
             # Return an empty paginated response if user is not a student
-            return {"total": 0, "records": []}
+            return _paginated({"total": 0, "records": []}, view)
             
         # Students can only view their own records, so override student_id filter
         paginated_results = await crud_inspection.get_multi_filtered(
-            inspection_service.db,
+            db,
             student_id=current_user.student.id,
             # Ignore other sensitive filters for students, or allow them within their scope
             # Here we allow status/date filtering within own records
@@ -199,9 +225,12 @@ async def read_inspections(
             skip=skip,
             limit=limit,
             sort_by=sort_by,
-            sort_direction=sort_direction
+            sort_direction=sort_direction,
+            cursor=cursor,
+            include_total=include_total,
+            summary=view == "summary",
         )
-    return paginated_results
+    return _paginated(paginated_results, view)
 
 @router.get("/{record_id}", response_model=schemas.InspectionRecord, dependencies=[Depends(PermissionChecker(["inspections:view_all", "inspections:view_own"], logic="OR"))])
 async def read_inspection(
@@ -216,9 +245,8 @@ async def read_inspection(
     if not record:
         raise HTTPException(status_code=404, detail="Inspection record not found")
     
-    user_permissions = {perm.name for role in current_user.roles for perm in role.permissions}
-    has_view_all = "inspections:view_all" in user_permissions or "admin:full_access" in user_permissions
-    has_view_own = "inspections:view_own" in user_permissions
+    has_view_all = permission_registry.has(current_user, "inspections:view_all")
+    has_view_own = permission_registry.has(current_user, "inspections:view_own")
     
     if not has_view_all:
         if not has_view_own:
@@ -283,7 +311,7 @@ async def export_inspection_pdf(
         raise HTTPException(status_code=404, detail="Inspection record not found")
 
     # Check permissions from pre-loaded user data (avoid lazy loading)
-    has_view_all = any(perm.name == "inspections:view_all" for role in current_user.roles for perm in role.permissions)
+    has_view_all = permission_registry.has(current_user, "inspections:view_all")
     if not has_view_all:
         if not current_user.student:
             raise HTTPException(status_code=400, detail="User is not linked to a student record.")
@@ -315,7 +343,7 @@ async def email_inspection_report(
 
     # Permission check (reusing logic from export_inspection_pdf)
     # Check permissions from pre-loaded user data (avoid lazy loading)
-    has_view_all = any(perm.name == "inspections:view_all" for role in current_user.roles for perm in role.permissions)
+    has_view_all = permission_registry.has(current_user, "inspections:view_all")
     if not has_view_all:
         if not current_user.student:
             raise HTTPException(status_code=400, detail="User is not linked to a student record.")
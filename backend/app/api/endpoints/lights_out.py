@@ -6,7 +6,7 @@ from datetime import datetime
 from ... import schemas, models
 from ...auth import get_current_active_user, PermissionChecker
 from ...crud import crud_lights_out # Import from package init
-from ...database import get_db
+from ...database import get_db, get_read_db
 from ...utils.audit import audit_log # Import audit_log
 
 router = APIRouter()
@@ -40,12 +40,14 @@ async def create_lights_out_patrol(
 )
 async def read_lights_out_patrols(
     request: Request,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
     building_id: Optional[int] = Query(None, description="Filter patrols by building ID"),
     start_date: Optional[datetime] = Query(None, description="Start date filter"),
     end_date: Optional[datetime] = Query(None, description="End date filter"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; replaces skip"),
+    include_total: bool = Query(True, description="Set to false to skip counting; next_cursor still tells whether there is a next page"),
     current_user: schemas.User = Depends(get_current_active_user),
 ):
     """
@@ -53,6 +55,6 @@ async def read_lights_out_patrols(
     """
     patrols_data = await crud_lights_out.get_multi_filtered(
         db=db, skip=skip, limit=limit, building_id=building_id,
-        start_date=start_date, end_date=end_date
+        start_date=start_date, end_date=end_date, cursor=cursor, include_total=include_total
     )
-    return {"total": patrols_data["total"], "records": patrols_data["records"]}
+    return patrols_data
@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends
+from typing import Any, Dict
+
+from ... import auth
+from ...core.count_cache import count_cache
+from ...core.db_stats import db_stats
+from ...core.principal_cache import principal_cache
+from ...core.permissions import permission_registry
+from ...database import pool_stats
+from ...limiter import limiter
+from ...services.audit_archiver import audit_archiver
+from ...services.audit_sink import audit_sink
+from ...services.file_service import file_service
+from ...services.token_blocklist import token_blocklist
+from ...utils.security import password_hashing_pool
+
+router = APIRouter()
+
+@router.get("/", response_model=Dict[str, Any], dependencies=[Depends(auth.PermissionChecker("system:settings"))])
+async def read_runtime_metrics() -> Any:
+    """
+    In-process runtime metrics for this worker.
+    Requires 'system:settings' permission.
+    """
+    return {
+        "principal_cache": principal_cache.stats(),
+        "permission_registry": permission_registry.stats(),
+        "token_blocklist": token_blocklist.stats(),
+        "password_hashing": password_hashing_pool.stats(),
+        "rate_limits": limiter.stats(),
+        "audit_sink": audit_sink.stats(),
+        "audit_archive": audit_archiver.stats(),
+        "list_counts": count_cache.stats(),
+        "db_transactions": db_stats.stats(),
+        "db_pool": pool_stats(),
+        "images": file_service.stats(),
+    }
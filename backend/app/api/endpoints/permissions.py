@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 
 from ... import schemas
 from ...crud import crud_permission # Import from package init
@@ -20,12 +20,13 @@ async def read_permissions(
     db: AsyncSession = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
 ):
     """
     Retrieve a list of all available permissions in the system with pagination.
 
     A user must have the **manage_roles** permission to use this.
     """
-    permissions = await crud_permission.get_multi(db=db, skip=skip, limit=limit)
+    permissions, next_cursor = await crud_permission.get_page(db=db, skip=skip, limit=limit, cursor=cursor)
     total = await crud_permission.get_count(db)
-    return {"total": total, "records": permissions}
+    return {"total": total, "records": permissions, "next_cursor": next_cursor}
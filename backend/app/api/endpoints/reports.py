@@ -12,7 +12,7 @@ router = APIRouter()
 
 @router.get("/pdf/inspections", summary="Generate PDF Report for Inspections", response_class=Response, dependencies=[Depends(auth.PermissionChecker("reports:export"))])
 async def get_inspections_pdf(
-    db: AsyncSession = Depends(auth.get_db),
+    db: AsyncSession = Depends(auth.get_read_db),
     current_user: schemas.User = Depends(auth.get_current_active_user),
     report_type: str = Query("all", description="Type of report: 'all', 'building', 'student'"),
     building_id: Optional[int] = Query(None),
@@ -36,7 +36,8 @@ async def get_inspections_pdf(
             db,
             start_date=start_dt,
             end_date=end_dt,
-            limit=1000 
+            limit=1000,
+            include_total=False,
         )
         inspections_data = paginated_response.get("records", [])
     elif report_type == "building":
@@ -47,7 +48,8 @@ async def get_inspections_pdf(
             building_id=building_id,
             start_date=start_dt,
             end_date=end_dt,
-            limit=1000
+            limit=1000,
+            include_total=False,
         )
         inspections_data = paginated_response.get("records", [])
     elif report_type == "student":
@@ -63,7 +65,8 @@ async def get_inspections_pdf(
             student_id=s_uuid,
             start_date=start_dt,
             end_date=end_dt,
-            limit=1000
+            limit=1000,
+            include_total=False,
         )
         inspections_data = paginated_response.get("records", [])
     else:
@@ -1,7 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-import asyncio 
 
 from ... import auth, schemas 
 from ...crud.crud_student import crud_student
@@ -13,7 +12,7 @@ router = APIRouter()
 @router.post("/", response_model=schemas.GlobalSearchResults, status_code=status.HTTP_200_OK, dependencies=[Depends(auth.PermissionChecker("students:view_all"))])
 async def global_search(
     search_request: schemas.GlobalSearchRequest, 
-    db: AsyncSession = Depends(auth.get_db), 
+    db: AsyncSession = Depends(auth.get_read_db), 
     current_user: schemas.User = Depends(auth.get_current_active_user) 
 ):
     """
@@ -23,15 +22,11 @@ async def global_search(
     if not query:
         return schemas.GlobalSearchResults(results=[])
 
-    # Perform searches in parallel
-    # Using the new modular CRUD instances' search method
-    student_task = crud_student.search(db, query=query, limit=5)
-    room_task = crud_room.search(db, query=query, limit=5)
-    inspection_task = crud_inspection.search(db, query=query, limit=5) # New inspection search
-
-    paginated_students, paginated_rooms, paginated_inspections = await asyncio.gather(
-        student_task, room_task, inspection_task
-    )
+    # One after the other: an AsyncSession does not allow concurrent operations,
+    # and all three would share its single connection anyway
+    paginated_students = await crud_student.search(db, query=query, limit=5)
+    paginated_rooms = await crud_room.search(db, query=query, limit=5)
+    paginated_inspections = await crud_inspection.search(db, query=query, limit=5) # New inspection search
     
     students = paginated_students.get("records", [])
     rooms = paginated_rooms.get("records", [])
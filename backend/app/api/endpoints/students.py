@@ -6,10 +6,12 @@ from typing import List, Optional
 from ... import crud, schemas, auth, models
 from ...crud.crud_student import crud_student # Import the new CRUD instance
 from ...utils.audit import audit_log
+from ...core.permissions import permission_registry
+from ...database import unit_of_work
 
 router = APIRouter()
 
-@router.post("/", response_model=schemas.Student, status_code=status.HTTP_201_CREATED, dependencies=[Depends(auth.PermissionChecker("manage_students"))])
+@router.post("/", response_model=schemas.Student, status_code=status.HTTP_201_CREATED, dependencies=[Depends(auth.PermissionChecker("manage_students")), Depends(unit_of_work, scope="function")])
 @audit_log(action="CREATE", resource_type="Student")
 async def create_student(student: schemas.StudentCreate, request: Request, db: AsyncSession = Depends(auth.get_db), current_user: models.User = Depends(auth.get_current_active_user)):
     db_student = await crud_student.get_by_id_number(db, student_id_number=student.student_id_number)
@@ -22,7 +24,9 @@ async def read_students(
     request: Request,
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(auth.get_db),
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    db: AsyncSession = Depends(auth.get_read_db),
     full_name: Optional[str] = None,
     student_id_number: Optional[str] = None,
     class_name: Optional[str] = None,
@@ -34,9 +38,8 @@ async def read_students(
     current_user: models.User = Depends(auth.get_current_active_user),
 ):
     # Check permissions dynamically
-    user_permissions = {perm.name for role in current_user.roles for perm in role.permissions}
-    has_view_all = "students:view_all" in user_permissions or "admin:full_access" in user_permissions
-    has_view_own = "students:view_own" in user_permissions
+    has_view_all = permission_registry.has(current_user, "students:view_all")
+    has_view_own = permission_registry.has(current_user, "students:view_own")
 
     if not (has_view_all or has_view_own):
          raise HTTPException(status_code=403, detail="Not authorized to view students")
@@ -71,7 +74,9 @@ async def read_students(
         bed_id=bed_id,
         room_id=room_id,
         building_id=building_id,
-        household=household
+        household=household,
+        cursor=cursor,
+        include_total=include_total,
     )
     return student_data
 
@@ -82,7 +87,7 @@ async def read_student(student_id: uuid.UUID, request: Request, db: AsyncSession
         raise HTTPException(status_code=404, detail="Student not found")
     return db_student
 
-@router.put("/{student_id}", response_model=schemas.Student, dependencies=[Depends(auth.PermissionChecker("manage_students"))])
+@router.put("/{student_id}", response_model=schemas.Student, dependencies=[Depends(auth.PermissionChecker("manage_students")), Depends(unit_of_work, scope="function")])
 @audit_log(action="UPDATE", resource_type="Student", resource_id_src="student_id")
 async def update_student_data(student_id: str, student_in: schemas.StudentUpdate, request: Request, db: AsyncSession = Depends(auth.get_db), current_user: models.User = Depends(auth.get_current_active_user)):
     try:
@@ -95,7 +100,7 @@ async def update_student_data(student_id: str, student_in: schemas.StudentUpdate
         raise HTTPException(status_code=404, detail="Student not found")
     return await crud_student.update(db=db, db_obj=db_student, obj_in=student_in)
 
-@router.put("/{student_id}/assign-bed", response_model=schemas.Student, dependencies=[Depends(auth.PermissionChecker("manage_students"))])
+@router.put("/{student_id}/assign-bed", response_model=schemas.Student, dependencies=[Depends(auth.PermissionChecker("manage_students")), Depends(unit_of_work, scope="function")])
 @audit_log(action="UPDATE", resource_type="Student", resource_id_src="student_id")
 async def assign_student_bed(
     student_id: str,
@@ -126,7 +131,7 @@ async def assign_student_bed(
     
     return await crud_student.assign_bed(db=db, db_student=db_student, bed_id=bed_assignment.bed_id)
 
-@router.delete("/{student_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(auth.PermissionChecker("manage_students"))])
+@router.delete("/{student_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(auth.PermissionChecker("manage_students")), Depends(unit_of_work, scope="function")])
 @audit_log(action="DELETE", resource_type="Student", resource_id_src="student_id")
 async def delete_student(student_id: uuid.UUID, request: Request, db: AsyncSession = Depends(auth.get_db), current_user: models.User = Depends(auth.get_current_active_user)):
     db_student = await crud_student.get(db, id=student_id)
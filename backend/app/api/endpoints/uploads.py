@@ -0,0 +1,58 @@
+import uuid
+
+from fastapi import APIRouter, Depends, File, Header, Request, UploadFile, status
+
+from ... import models, schemas
+from ...auth import PermissionChecker, get_current_active_user
+from ...services.upload_service import upload_service
+
+router = APIRouter()
+
+# Anyone who can submit an inspection can upload its photos and signature
+can_submit = PermissionChecker(["inspections:submit_any", "inspections:submit_own"], logic="OR")
+
+@router.post("/", response_model=schemas.UploadStatus, status_code=status.HTTP_201_CREATED, dependencies=[Depends(can_submit)])
+async def create_upload(
+    upload_in: schemas.UploadCreate,
+    current_user: models.User = Depends(get_current_active_user),
+):
+    """
+    Opens a resumable upload of `size` bytes. Send the file with
+    PUT /uploads/{upload_id} in one or more chunks, then pass the upload id
+    as `upload_id` / `signature_upload_id` when creating the inspection.
+    """
+    return await upload_service.create(current_user.id, upload_in.size)
+
+@router.post("/file", response_model=schemas.UploadStatus, status_code=status.HTTP_201_CREATED, dependencies=[Depends(can_submit)])
+async def upload_file(
+    file: UploadFile = File(...),
+    current_user: models.User = Depends(get_current_active_user),
+):
+    """
+    Uploads a whole image as multipart/form-data in one request.
+    """
+    return await upload_service.save_file(current_user.id, file)
+
+@router.get("/{upload_id}", response_model=schemas.UploadStatus, dependencies=[Depends(can_submit)])
+async def read_upload(
+    upload_id: uuid.UUID,
+    current_user: models.User = Depends(get_current_active_user),
+):
+    """
+    Status of an upload; after an interrupted chunk, resume from `offset`.
+    """
+    return await upload_service.status(upload_id, current_user.id)
+
+@router.put("/{upload_id}", response_model=schemas.UploadStatus, dependencies=[Depends(can_submit)])
+async def append_upload(
+    upload_id: uuid.UUID,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset", ge=0),
+    current_user: models.User = Depends(get_current_active_user),
+):
+    """
+    Appends the raw request body (application/octet-stream) at
+    `Upload-Offset`, which must equal the upload's current offset. The body
+    is streamed to disk as it arrives.
+    """
+    return await upload_service.append(upload_id, current_user.id, upload_offset, request.stream())
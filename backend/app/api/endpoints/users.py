@@ -7,7 +7,8 @@ from sqlalchemy.orm import joinedload
 
 from ... import schemas, models, auth
 from ...crud.crud_user import crud_user # Import instance
-from ...utils.security import verify_password
+from ...database import unit_of_work
+from ...utils.security import verify_password_async
 from ...utils.audit import audit_log
 
 router = APIRouter()
@@ -47,18 +48,22 @@ async def read_users(
     request: Request,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
     username: Optional[str] = None,
-    db: AsyncSession = Depends(auth.get_db),
+    db: AsyncSession = Depends(auth.get_read_db),
     current_user: models.User = Depends(auth.get_current_active_user)
 ):
     """
     Retrieve all users with pagination. (Requires 'manage_users' permission).
+    Pass the previous page's `next_cursor` as `cursor` instead of `skip` for deep pages,
+    and `include_total=false` to skip counting when only the next page matters.
     """
-    users = await crud_user.get_multi(db, skip=skip, limit=limit, username=username)
-    total = await crud_user.get_count(db, username=username)
-    return {"total": total, "records": users}
+    users, next_cursor = await crud_user.get_page(db, skip=skip, limit=limit, cursor=cursor, username=username)
+    total = await crud_user.get_count(db, username=username) if include_total else None
+    return {"total": total, "records": users, "next_cursor": next_cursor}
 
-@router.put("/{user_id}", response_model=schemas.User, dependencies=[Depends(auth.PermissionChecker("manage_users"))])
+@router.put("/{user_id}", response_model=schemas.User, dependencies=[Depends(auth.PermissionChecker("manage_users")), Depends(unit_of_work, scope="function")])
 @audit_log(action="UPDATE", resource_type="User", resource_id_src="user_id")
 async def update_user_data(user_id: uuid.UUID, user_in: schemas.UserUpdate, request: Request, db: AsyncSession = Depends(auth.get_db), current_user: models.User = Depends(auth.get_current_active_user)):
     """
@@ -98,7 +103,7 @@ async def change_password(
     """
     Change the current user's password.
     """
-    if not verify_password(password_data.current_password, current_user.hashed_password):
+    if not await verify_password_async(password_data.current_password, current_user.hashed_password):
         raise HTTPException(status_code=400, detail="Incorrect current password")
     if password_data.new_password != password_data.confirm_password:
         raise HTTPException(status_code=400, detail="New password and confirmation do not match")
@@ -1,6 +1,5 @@
 from fastapi import Depends, HTTPException, status, Request, Response # [修改] 引入 Response
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Union, List
 import uuid
@@ -10,10 +9,9 @@ from sqlalchemy import select
 from sqlalchemy.orm import joinedload
 
 from . import schemas, models
-from .crud import crud_user
-from .utils.security import verify_password
-from .database import get_db 
+from .database import get_db, get_read_db
 from .config import settings
+from .core.permissions import permission_registry
 
 from .services.auth_service import AuthService, get_auth_service
 
@@ -34,15 +32,13 @@ async def get_token_from_cookie_optional(request: Request) -> Optional[str]:
     return request.cookies.get("access_token")
 
 # [新增] 核心邏輯：檢查並自動刷新 Token 的共用函式
-def check_and_refresh_token(response: Response, token: str, auth_service: AuthService, user: models.User):
+def check_and_refresh_token(response: Response, claims: dict, auth_service: AuthService, user: models.User):
     """
     檢查 Token 是否快過期，如果是，則簽發新 Token 並透過 Set-Cookie 延長使用者會話。
+    `claims` 是 authenticate_request 已解碼過的 payload，這裡不再重複解碼。
     """
     try:
-        # 解碼 Token 以取得過期時間 (exp)
-        # 注意：前端傳來的 Token 已經通過了 auth_service.get_current_user 的驗證，所以這裡是安全的
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        exp = payload.get("exp")
+        exp = claims.get("exp")
         
         if exp:
             now = datetime.now(timezone.utc)
@@ -72,29 +68,31 @@ def check_and_refresh_token(response: Response, token: str, auth_service: AuthSe
                 # print(f"🔄 Token Refreshed for user: {user.username}") # 開發時可開啟此行確認運作
 
     except Exception as e:
-        # 如果刷新檢查過程失敗（例如 decode 異常），不要讓整個請求失敗，只在 console 留紀錄
+        # 如果刷新檢查過程失敗，不要讓整個請求失敗，只在 console 留紀錄
         print(f"⚠️ Token refresh check failed: {e}")
 
-# [修改] 注入 Response 並呼叫刷新邏輯
-async def get_current_user(
-    response: Response, # [新增] 注入 Response 物件
+# 單一驗證依賴：每個請求只解碼一次 Token，並把 claims 與使用者存到 request.state。
+# FastAPI 會在同一請求內快取依賴結果，所以 PermissionChecker、端點與 audit_log 都共用同一份。
+async def authenticate_request(
+    request: Request,
+    response: Response,
     token: str = Depends(get_token_from_cookie),
     auth_service: AuthService = Depends(get_auth_service)
 ) -> models.User:
-    user = await auth_service.get_current_user(token)
+    claims = await auth_service.decode_token(token)
+    user = await auth_service.get_user_from_claims(claims)
+    request.state.token_claims = claims
+    request.state.current_user = user
     # 執行滑動過期檢查
-    check_and_refresh_token(response, token, auth_service, user)
+    check_and_refresh_token(response, claims, auth_service, user)
     return user
 
-# [修改] 注入 Response 並呼叫刷新邏輯
-async def get_current_active_user(
-    response: Response, # [新增] 注入 Response 物件
-    token: str = Depends(get_token_from_cookie),
-    auth_service: AuthService = Depends(get_auth_service)
-) -> models.User:
-    user = await auth_service.get_current_active_user(token)
-    # 執行滑動過期檢查
-    check_and_refresh_token(response, token, auth_service, user)
+async def get_current_user(user: models.User = Depends(authenticate_request)) -> models.User:
+    return user
+
+async def get_current_active_user(user: models.User = Depends(authenticate_request)) -> models.User:
+    if not user.is_active:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
     return user
 
 class PermissionChecker:
@@ -107,19 +105,20 @@ class PermissionChecker:
         self.logic = logic.upper()
         if self.logic not in ["AND", "OR"]:
              raise ValueError("Permission logic must be 'AND' or 'OR'")
+        # Compiled once per route; checks are a single AND against the user's mask
+        self.required_mask = permission_registry.mask(self.required_permissions)
 
     def __call__(self, current_user: models.User = Depends(get_current_active_user)):
-        user_permissions = crud_user.get_user_permissions(current_user)
+        user_mask = permission_registry.user_mask(current_user)
         
         # Super-admin check
-        if "admin:full_access" in user_permissions:
+        if user_mask & permission_registry.full_access:
             return current_user
             
-        has_permission = False
         if self.logic == "OR":
-            has_permission = any(perm in user_permissions for perm in self.required_permissions)
+            has_permission = bool(user_mask & self.required_mask)
         else: # AND
-            has_permission = all(perm in user_permissions for perm in self.required_permissions)
+            has_permission = (user_mask & self.required_mask) == self.required_mask
 
         if not has_permission:
             perms_str = ", ".join(self.required_permissions)
@@ -14,6 +14,15 @@ class Settings(BaseSettings):
     model_config = ConfigDict(env_file=env_path)
 
     SQLALCHEMY_DATABASE_URL: str
+    # Optional read replica for list/search/dashboard/report/export endpoints
+    SQLALCHEMY_READ_REPLICA_URL: Optional[str] = None
+    # Connection pool per engine and worker; connections opened at startup
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: int = 30
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_WARMUP_CONNECTIONS: int = 2
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
 
@@ -26,6 +35,54 @@ class Settings(BaseSettings):
     # 預設 30 分鐘，但會優先讀取 .env 中的設定
     SLIDING_REFRESH_THRESHOLD_MINUTES: int = 30
 
+    # Per-process cache of authenticated users (0 disables it)
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 30
+    PRINCIPAL_CACHE_MAX_SIZE: int = 1024
+
+    # Revoked token index: reload interval, and how often / how many expired rows to purge
+    TOKEN_BLOCKLIST_REFRESH_SECONDS: int = 60
+    TOKEN_BLOCKLIST_SWEEP_INTERVAL_SECONDS: int = 3600
+    TOKEN_BLOCKLIST_SWEEP_BATCH_SIZE: int = 1000
+
+    # Password hashing thread pool and login concurrency cap
+    PASSWORD_HASH_WORKERS: int = 2
+    LOGIN_CONCURRENCY_LIMIT: int = 8
+    LOGIN_QUEUE_LIMIT: int = 200
+
+    # Rate limit storage shared by all workers: memory:// (per worker),
+    # sqlite:///path.db (one host), or redis:// / memcached:// (several hosts)
+    RATE_LIMIT_STORAGE_URI: str = "memory://"
+    RATE_LIMIT_STRATEGY: str = "fixed-window"
+
+    # Write-behind audit log: queue bound, rows per INSERT and max delay before a flush
+    AUDIT_QUEUE_MAX_SIZE: int = 10000
+    AUDIT_BATCH_SIZE: int = 200
+    AUDIT_FLUSH_INTERVAL_MS: int = 250
+
+    # Audit details: strings longer than this are stored as a hash, documents are
+    # capped at this many bytes, and optionally zlib-compressed
+    AUDIT_MAX_FIELD_CHARS: int = 256
+    AUDIT_MAX_DETAILS_BYTES: int = 8192
+    AUDIT_COMPRESS_DETAILS: bool = False
+
+    # Audit logs older than AUDIT_ARCHIVE_AFTER_DAYS move to monthly gzip segments (0 disables)
+    AUDIT_ARCHIVE_DIR: str = "audit_archive"
+    AUDIT_ARCHIVE_AFTER_DAYS: int = 0
+    AUDIT_ARCHIVE_BATCH_SIZE: int = 5000
+    AUDIT_ARCHIVE_INTERVAL_SECONDS: int = 86400
+
+    # Per-process cache of list totals, invalidated on writes to the counted tables (0 disables it)
+    LIST_COUNT_CACHE_TTL_SECONDS: int = 10
+    LIST_COUNT_CACHE_MAX_SIZE: int = 512
+
+    # SQL instrumentation: log statements / requests past these thresholds (0 disables),
+    # flag statements repeated this often in one request (DEBUG only), Server-Timing header
+    SLOW_QUERY_MS: int = 500
+    REQUEST_QUERY_COUNT_WARN: int = 50
+    REQUEST_DB_TIME_WARN_MS: int = 1000
+    SQL_REPEAT_WARN_THRESHOLD: int = 5
+    SERVER_TIMING_HEADER: bool = True
+
     # First superuser
     FIRST_SUPERUSER: str
     FIRST_SUPERUSER_PASSWORD: str
@@ -45,6 +102,22 @@ class Settings(BaseSettings):
 
     # Upload settings
     UPLOAD_DIR: str = "uploads" # Directory to store uploaded files
+    # Resumable uploads (/uploads): max file size, suggested chunk size (keep it
+    # under nginx's client_max_body_size) and how long unclaimed uploads are kept
+    UPLOAD_MAX_FILE_BYTES: int = 15 * 1024 * 1024
+    UPLOAD_CHUNK_SIZE: int = 4 * 1024 * 1024
+    UPLOAD_SESSION_TTL_SECONDS: int = 86400
+    # Identical files are stored once, hard-linked from <UPLOAD_DIR>/.cas
+    UPLOAD_DEDUPLICATE: bool = True
+    # Worker processes rendering image thumbnails and WebP copies
+    IMAGE_PROCESS_WORKERS: int = 2
+    # Photos are rewritten on upload: scaled to fit IMAGE_INGEST_MAX_EDGE (0 keeps
+    # the size), EXIF stripped, JPEGs re-encoded; signature PNGs are reduced to a palette of
+    # IMAGE_INGEST_PNG_COLORS, other PNGs only when they have no more colours (0 keeps them)
+    IMAGE_INGEST_NORMALIZE: bool = True
+    IMAGE_INGEST_MAX_EDGE: int = 2560
+    IMAGE_INGEST_JPEG_QUALITY: int = 85
+    IMAGE_INGEST_PNG_COLORS: int = 256
 
     # Base URL for the API (e.g., "http://localhost:8000" or "https://api.yourdomain.com")
     API_BASE_URL: str = ""
@@ -0,0 +1,339 @@
+import gzip
+import heapq
+import json
+import logging
+import os
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines
+    fcntl = None
+
+from .. import models
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.json"
+LOCK_FILE = ".lock"
+
+COLUMNS = ("id", "user_id", "action", "resource_type", "resource_id", "details", "ip_address", "created_at")
+
+
+def as_naive(value: datetime) -> datetime:
+    # created_at is stored as naive local time
+    if value.tzinfo is not None:
+        return value.astimezone().replace(tzinfo=None)
+    return value
+
+
+class AuditSegmentStore:
+    """
+    Archived audit logs, stored as one gzip-compressed NDJSON file per month
+    (`audit-YYYY-MM.ndjson.gz`) plus `index.json`.
+
+    The index records, per segment, its row count and created_at range, and
+    `archived_before`: every row older than that may be in the archive
+    rather than in the `audit_logs` table. Each archive run appends a new gzip
+    member to the month's file, so segments are never rewritten. The ids of
+    the last appended batch stay in `pending_ids` until they are deleted
+    from the table, so a run interrupted in between is neither counted twice
+    by readers nor archived twice by the next run.
+
+    Readers reload the index when its mtime changes, so every worker sees
+    archive runs made by another one.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._index: Dict[str, Any] = {"archived_before": None, "segments": {}}
+        self._index_mtime: Optional[float] = None
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    @staticmethod
+    def segment_name(month: str) -> str:
+        return f"audit-{month}.ndjson.gz"
+
+    @property
+    def index(self) -> Dict[str, Any]:
+        path = self._path(INDEX_FILE)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return self._index
+        if mtime != self._index_mtime:
+            with open(path, encoding="utf-8") as f:
+                self._index = json.load(f)
+            self._index_mtime = mtime
+        return self._index
+
+    @property
+    def archived_before(self) -> Optional[datetime]:
+        value = self.index.get("archived_before")
+        return datetime.fromisoformat(value) if value else None
+
+    def _write_index(self, index: Dict[str, Any]) -> None:
+        tmp = self._path(INDEX_FILE + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=2, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._path(INDEX_FILE))
+
+    @contextmanager
+    def lock(self) -> Iterator[bool]:
+        """
+        Non-blocking writer lock shared by all workers on the host.
+        Yields False if another process holds it.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(LOCK_FILE), "a") as f:
+            if fcntl is None:
+                yield True
+                return
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def mark_archived_before(self, cutoff: datetime) -> None:
+        """
+        Must be called (under `lock`) before rows older than `cutoff` are
+        deleted, so readers start consulting the archive first.
+        """
+        index = dict(self.index)
+        current = self.archived_before
+        if current is None or cutoff > current:
+            index["archived_before"] = cutoff.isoformat()
+            self._write_index(index)
+
+    def append(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        Appends rows (dicts with `COLUMNS`) to their monthly segments and
+        records them as pending until `clear_pending`. Call under `lock`.
+        """
+        by_month: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            by_month.setdefault(row["created_at"].strftime("%Y-%m"), []).append(row)
+
+        index = dict(self.index)
+        segments = dict(index.get("segments", {}))
+        for month, month_rows in by_month.items():
+            name = self.segment_name(month)
+            payload = "".join(
+                json.dumps({**row, "created_at": row["created_at"].isoformat()}, default=str) + "\n"
+                for row in month_rows
+            )
+            with open(self._path(name), "ab") as f:
+                f.write(gzip.compress(payload.encode("utf-8")))
+                f.flush()
+                os.fsync(f.fileno())
+
+            first = min(row["created_at"] for row in month_rows).isoformat()
+            last = max(row["created_at"] for row in month_rows).isoformat()
+            entry = segments.get(month) or {"file": name, "rows": 0, "min_created_at": first, "max_created_at": last}
+            segments[month] = {
+                "file": name,
+                "rows": entry["rows"] + len(month_rows),
+                "min_created_at": min(entry["min_created_at"], first),
+                "max_created_at": max(entry["max_created_at"], last),
+            }
+        index["segments"] = segments
+        # Cleared by `clear_pending` once the rows are deleted from the table
+        index["pending_ids"] = [str(row["id"]) for row in rows]
+        self._write_index(index)
+
+    def clear_pending(self) -> None:
+        """
+        Call (under `lock`) once the rows of the last `append` are deleted.
+        """
+        index = dict(self.index)
+        if index.get("pending_ids"):
+            index["pending_ids"] = []
+            self._write_index(index)
+
+    def _read_segment(self, name: str, rows: int) -> Iterator[Dict[str, Any]]:
+        # Only the first `rows` rows, the ones the caller's index snapshot knows
+        # of; later rows may belong to an archive run still in progress
+        if rows <= 0:
+            return
+        try:
+            with gzip.open(self._path(name), "rt", encoding="utf-8") as f:
+                for line in islice(f, rows):
+                    yield json.loads(line)
+        except FileNotFoundError:
+            return
+        except (EOFError, zlib.error, gzip.BadGzipFile, json.JSONDecodeError):
+            # A member still being appended by an archive run
+            logger.warning(f"Stopped reading truncated audit segment {name}")
+
+    def _months(
+        self,
+        snapshot: Dict[str, Any],
+        start_date: Optional[datetime],
+        end_date: Optional[datetime],
+        before: Optional[datetime] = None,
+    ) -> List[str]:
+        months = []
+        for month, entry in snapshot.get("segments", {}).items():
+            if start_date and entry["max_created_at"] < start_date.isoformat():
+                continue
+            if end_date and entry["min_created_at"] > end_date.isoformat():
+                continue
+            if before and entry["min_created_at"] > before.isoformat():
+                continue
+            months.append(month)
+        return sorted(months, reverse=True)
+
+    def reaches(self, start_date: Optional[datetime]) -> bool:
+        """
+        True if rows at or after `start_date` may have been archived.
+        """
+        archived_before = self.archived_before
+        return archived_before is not None and (start_date is None or as_naive(start_date) < archived_before)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        The current index. A reader takes one and passes it to `count` /
+        `newest`, so it sees the archive as of one moment even while an
+        archive run appends to it.
+        """
+        return self.index
+
+    @staticmethod
+    def pending_ids(snapshot: Dict[str, Any]) -> List[str]:
+        """
+        Ids of rows already appended to the archive but maybe not yet deleted
+        from the table; readers take them from the archive only.
+        """
+        return snapshot.get("pending_ids") or []
+
+    def _month_rows(
+        self,
+        snapshot: Dict[str, Any],
+        month: str,
+        filters: Dict[str, Any],
+        before: Optional[Tuple[datetime, str]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        user_id = filters.get("user_id")
+        action = filters.get("action")
+        resource_type = filters.get("resource_type")
+        resource_id = filters.get("resource_id")
+        start_date = filters.get("start_date")
+        end_date = filters.get("end_date")
+        entry = snapshot["segments"][month]
+        for row in self._read_segment(entry["file"], entry["rows"]):
+            if user_id and row["user_id"] != str(user_id):
+                continue
+            if action and row["action"] != action:
+                continue
+            if resource_type and row["resource_type"] != resource_type:
+                continue
+            if resource_id and row["resource_id"] != resource_id:
+                continue
+            created_at = datetime.fromisoformat(row["created_at"])
+            if start_date and created_at < start_date:
+                continue
+            if end_date and created_at > end_date:
+                continue
+            if before and (created_at, str(row["id"])) >= before:
+                continue
+            row["created_at"] = created_at
+            yield row
+
+    @staticmethod
+    def _naive_filters(filters: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            **filters,
+            "start_date": as_naive(filters["start_date"]) if filters.get("start_date") else None,
+            "end_date": as_naive(filters["end_date"]) if filters.get("end_date") else None,
+        }
+
+    def count(self, snapshot: Dict[str, Any], limit: Optional[int] = None, **filters: Any) -> int:
+        """
+        Archived rows matching the filters (those of the audit log list), at most
+        `limit`. Months that lie wholly inside the date range are counted
+        from the index; only the others are read. Blocks on file I/O.
+        """
+        filters = self._naive_filters(filters)
+        start_date = filters["start_date"]
+        end_date = filters["end_date"]
+        by_date_only = not any(filters.get(key) for key in ("user_id", "action", "resource_type", "resource_id"))
+        total = 0
+        for month in self._months(snapshot, start_date, end_date):
+            entry = snapshot["segments"][month]
+            if (
+                by_date_only
+                and (start_date is None or entry["min_created_at"] >= start_date.isoformat())
+                and (end_date is None or entry["max_created_at"] <= end_date.isoformat())
+            ):
+                total += entry["rows"]
+            else:
+                for _ in self._month_rows(snapshot, month, filters):
+                    total += 1
+                    if limit is not None and total >= limit:
+                        return limit
+            if limit is not None and total >= limit:
+                return limit
+        return total
+
+    def newest(
+        self,
+        snapshot: Dict[str, Any],
+        n: int,
+        before: Optional[Tuple[datetime, str]] = None,
+        **filters: Any,
+    ) -> List[Dict[str, Any]]:
+        """
+        The `n` newest archived rows matching the filters that sort below the
+        `(created_at, id)` key `before`, newest first. Reads months newest
+        first and stops at the first month that cannot make the cut. Blocks
+        on file I/O.
+        """
+        filters = self._naive_filters(filters)
+        # Min-heap of the best n so far; the root is the one to beat
+        best: List[Tuple[Tuple[datetime, str], Dict[str, Any]]] = []
+        before_date = before[0] if before else None
+        for month in self._months(snapshot, filters["start_date"], filters["end_date"], before_date):
+            if len(best) >= n and datetime.fromisoformat(snapshot["segments"][month]["max_created_at"]) < best[0][0][0]:
+                break
+            for row in self._month_rows(snapshot, month, filters, before):
+                item = ((row["created_at"], str(row["id"])), row)
+                if len(best) < n:
+                    heapq.heappush(best, item)
+                elif item[0] > best[0][0]:
+                    heapq.heapreplace(best, item)
+        return [row for _, row in sorted(best, key=lambda item: item[0], reverse=True)]
+
+    @staticmethod
+    def to_model(row: Dict[str, Any]) -> models.AuditLog:
+        # Transient instance; never added to a session
+        return models.AuditLog(**{column: row.get(column) for column in COLUMNS})
+
+    def stats(self) -> Dict[str, Any]:
+        segments = self.index.get("segments", {})
+        return {
+            "archived_before": self.index.get("archived_before"),
+            "segments": len(segments),
+            "rows": sum(entry["rows"] for entry in segments.values()),
+            "bytes": sum(
+                os.path.getsize(self._path(entry["file"]))
+                for entry in segments.values()
+                if os.path.exists(self._path(entry["file"]))
+            ),
+        }
+
+
+audit_segments = AuditSegmentStore(settings.AUDIT_ARCHIVE_DIR)
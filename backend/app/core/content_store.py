@@ -0,0 +1,147 @@
+import hashlib
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+# Files are hashed in pieces of this size, never read whole into memory
+_HASH_CHUNK_BYTES = 1024 * 1024
+
+# A link that vanishes under us (collected concurrently) is retried this often
+_LINK_ATTEMPTS = 3
+
+
+def file_digest(path: Path) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(_HASH_CHUNK_BYTES):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class ContentStore:
+    """
+    Content-addressed storage for the files under a directory.
+
+    Every stored file is hard-linked to a blob named after the SHA-256 of
+    its bytes, `.cas/<first two hex digits>/<digest><suffixes>`. The file
+    keeps its own stable name (the one in Photo.file_path or a record's
+    signature); if the same bytes were stored before, that name is turned
+    into another link to the existing blob, so the bytes take disk space
+    once. Archivers that keep hard links (tar, rsync -H) store them once too.
+
+    The link count of a blob is its reference count plus one. Deleting a
+    stable name is all it takes to drop a reference; blobs left with no
+    reference are removed by `collect_garbage`. All methods block on disk
+    I/O and are meant to run in a thread.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.cas_dir = self.root / ".cas"
+        self.blobs_created = 0
+        self.deduplicated = 0
+        self.deduplicated_bytes = 0
+        self.link_failures = 0
+        self.collected = 0
+
+    def blob_path(self, digest: str, suffix: str) -> Path:
+        return self.cas_dir / digest[:2] / f"{digest}{suffix}"
+
+    def adopt(self, path: Path) -> int:
+        """
+        Links the file at `path` into the store. Returns the bytes freed,
+        i.e. its size when the same content was stored already, else 0.
+        """
+        path = Path(path)
+        try:
+            blob = self.blob_path(file_digest(path), "".join(path.suffixes))
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            for _ in range(_LINK_ATTEMPTS):
+                try:
+                    os.link(path, blob)
+                    self.blobs_created += 1
+                    return 0
+                except FileExistsError:
+                    pass
+                # Linked aside and renamed over the old name, it never goes missing
+                tmp_path = path.with_name(f"{path.name}.{os.getpid()}.link")
+                try:
+                    if os.path.samefile(path, blob):
+                        return 0
+                    size = path.stat().st_size
+                    os.link(blob, tmp_path)
+                except FileNotFoundError:
+                    continue
+                os.replace(tmp_path, path)
+                self.deduplicated += 1
+                self.deduplicated_bytes += size
+                return size
+        except OSError as e:
+            # E.g. a filesystem without hard links, or a blob at the link limit;
+            # the file is simply kept as it is
+            self.link_failures += 1
+            logger.warning(f"Could not link {path.name} into the content store: {e!r}")
+        return 0
+
+    def collect_garbage(self) -> int:
+        """
+        Deletes the blobs nothing links to anymore and returns how many.
+        """
+        removed = 0
+        if not self.cas_dir.is_dir():
+            return removed
+        for blob in self.cas_dir.glob("*/*"):
+            try:
+                if blob.stat().st_nlink == 1:
+                    blob.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        self.collected += removed
+        return removed
+
+    def usage(self) -> Dict[str, Any]:
+        """
+        Disk usage of the stored files: `apparent_bytes` is what they would
+        take as separate copies, `disk_bytes` what they take. Walks the
+        whole directory, so it is for tools, not for every request.
+        """
+        files = 0
+        apparent_bytes = 0
+        inodes: Dict[tuple, int] = {}
+        for entry in os.scandir(self.root):
+            # Skips the store itself and other internals (.partial uploads)
+            if entry.name.startswith(".") or not entry.is_file(follow_symlinks=False):
+                continue
+            stat = entry.stat(follow_symlinks=False)
+            files += 1
+            apparent_bytes += stat.st_size
+            inodes[(stat.st_dev, stat.st_ino)] = stat.st_size
+        blobs = 0
+        unreferenced_blobs = 0
+        for blob in self.cas_dir.glob("*/*") if self.cas_dir.is_dir() else []:
+            stat = blob.stat()
+            blobs += 1
+            if stat.st_nlink == 1:
+                unreferenced_blobs += 1
+            # Takes space until collected
+            inodes[(stat.st_dev, stat.st_ino)] = stat.st_size
+        return {
+            "files": files,
+            "apparent_bytes": apparent_bytes,
+            "disk_bytes": sum(inodes.values()),
+            "blobs": blobs,
+            "unreferenced_blobs": unreferenced_blobs,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "blobs_created": self.blobs_created,
+            "deduplicated": self.deduplicated,
+            "deduplicated_bytes": self.deduplicated_bytes,
+            "link_failures": self.link_failures,
+            "collected_blobs": self.collected,
+        }
@@ -0,0 +1,149 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Tuple
+
+from sqlalchemy import Select, event, func, select
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.util import find_tables
+
+from ..config import settings
+
+# session.info key collecting the tables written since the last commit
+_WRITTEN_TABLES = "count_cache_tables"
+
+
+class CountCache:
+    """
+    Per-process TTL/LRU cache of list totals, keyed by the SQL and bound
+    parameters of the filtered query, i.e. one entry per filter signature.
+
+    Each table has a generation number, bumped whenever a session flushes or
+    commits a write to it (see the session events below). Entries remember
+    the generations of the tables their query reads and are discarded once
+    any of them moves on. Writes made by other workers are only picked up
+    when the entry expires, so keep the TTL short.
+    """
+
+    def __init__(self, ttl_seconds: int, max_size: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._generations: Dict[str, int] = {}
+        self._entries: "OrderedDict[Tuple[Any, ...], Tuple[int, Dict[str, int], float]]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_size > 0
+
+    @staticmethod
+    def count_query(query: Select, id_column: Any) -> Select:
+        """
+        COUNT(*) over `query` projected to its primary key. Dropping the
+        entity also drops its joinedload/selectinload options, and ORDER BY
+        does not affect a count.
+        """
+        inner = query.with_only_columns(id_column).order_by(None)
+        return select(func.count()).select_from(inner.subquery())
+
+    def _key(self, statement: Select) -> Tuple[Tuple[Any, ...], FrozenSet[str]]:
+        compiled = statement.compile()
+        params = tuple(sorted((name, repr(value)) for name, value in compiled.params.items()))
+        tables = frozenset(table.name for table in find_tables(statement, include_joins=True))
+        return (str(compiled), params), tables
+
+    async def count(self, db: AsyncSession, query: Select, id_column: Any) -> int:
+        """
+        Number of rows `query` returns, served from the cache while fresh.
+        """
+        statement = self.count_query(query, id_column)
+        if not self.enabled:
+            return (await db.execute(statement)).scalar_one()
+
+        key, tables = self._key(statement)
+        entry = self._entries.get(key)
+        if entry is not None:
+            total, generations, expires_at = entry
+            if expires_at >= time.monotonic() and all(
+                self._generations.get(table, 0) == generation for table, generation in generations.items()
+            ):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return total
+            del self._entries[key]
+
+        self.misses += 1
+        # Taken before the query runs, so a write that lands meanwhile invalidates the result
+        generations = {table: self._generations.get(table, 0) for table in tables}
+        total = (await db.execute(statement)).scalar_one()
+        self._entries[key] = (total, generations, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return total
+
+    def invalidate(self, tables: Iterable[str]) -> None:
+        for table in tables:
+            self._generations[table] = self._generations.get(table, 0) + 1
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+
+count_cache = CountCache(
+    ttl_seconds=settings.LIST_COUNT_CACHE_TTL_SECONDS,
+    max_size=settings.LIST_COUNT_CACHE_MAX_SIZE,
+)
+
+
+def _record_writes(session: Session, tables: Iterable[str]) -> None:
+    tables = set(tables)
+    if tables:
+        session.info.setdefault(_WRITTEN_TABLES, set()).update(tables)
+        # The writing session may count again before it commits
+        count_cache.invalidate(tables)
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session: Session, flush_context: Any) -> None:
+    _record_writes(
+        session,
+        (
+            table.name
+            for obj in (*session.new, *session.dirty, *session.deleted)
+            for table in sa_inspect(obj).mapper.tables
+        ),
+    )
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _after_bulk_write(orm_execute_state: Any) -> None:
+    # insert()/update()/delete() statements bypass the flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table: Optional[Any] = getattr(orm_execute_state.statement, "table", None)
+        if table is not None:
+            _record_writes(orm_execute_state.session, [table.name])
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    # Other sessions may have cached totals between our flush and the commit
+    tables = session.info.pop(_WRITTEN_TABLES, None)
+    if tables:
+        count_cache.invalidate(tables)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_WRITTEN_TABLES, None)
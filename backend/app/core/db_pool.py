@@ -0,0 +1,65 @@
+import time
+from typing import Any, Dict
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class MonitoredQueuePool(AsyncAdaptedQueuePool):
+    """
+    The async queue pool, counting how long checkouts take and how often
+    they have to queue for a connection or time out.
+
+    A checkout "queues" when no idle connection is left and the overflow is
+    used up, i.e. it blocks until another request returns a connection (or
+    for up to `pool_timeout` seconds). Those waits and the timeouts are the
+    signal that the pool, or the number of workers, is too small.
+    """
+
+    def __init__(self, *args: Any, **kw: Any):
+        super().__init__(*args, **kw)
+        self.checkouts = 0
+        self.queued = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.max_checked_out = 0
+
+    def connect(self) -> Any:
+        queued = self.checkedin() == 0 and self._max_overflow > -1 and self._overflow >= self._max_overflow
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            self._record_wait(time.perf_counter() - start)
+            raise
+        self.checkouts += 1
+        if queued:
+            self.queued += 1
+            self._record_wait(time.perf_counter() - start)
+        self.max_checked_out = max(self.max_checked_out, self.checkedout())
+        return connection
+
+    def _record_wait(self, seconds: float) -> None:
+        self.total_wait += seconds
+        self.max_wait = max(self.max_wait, seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        waits = self.queued + self.timeouts
+        return {
+            "pool_size": self.size(),
+            "max_overflow": self._max_overflow,
+            "timeout_seconds": self._timeout,
+            # Upper bound on this worker's connections to the server
+            "max_connections": self.size() + max(self._max_overflow, 0),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": max(self.overflow(), 0),
+            "max_checked_out": self.max_checked_out,
+            "checkouts": self.checkouts,
+            "queued": self.queued,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": round(self.total_wait / waits * 1000, 3) if waits else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+        }
@@ -0,0 +1,252 @@
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# connection.info key: start times of the statements running on it
+_STATEMENT_STARTS = "db_stats_statement_starts"
+
+# Statements are shortened to this many characters in logs and metrics
+_SQL_PREVIEW_CHARS = 300
+
+
+def _preview(statement: str) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= _SQL_PREVIEW_CHARS else statement[:_SQL_PREVIEW_CHARS] + "..."
+
+
+class RequestDBStats:
+    """
+    Database work done while serving one request.
+    """
+
+    __slots__ = ("commits", "statements", "db_time", "slowest_time", "slowest_statement", "repeats")
+
+    def __init__(self, track_repeats: bool = False) -> None:
+        self.commits = 0
+        self.statements = 0
+        self.db_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement: Optional[str] = None
+        # Executions per SQL text, only kept for the N+1 detector
+        self.repeats: Optional[Counter] = Counter() if track_repeats else None
+
+    def record_statement(self, statement: str, seconds: float) -> None:
+        self.statements += 1
+        self.db_time += seconds
+        if seconds >= self.slowest_time:
+            self.slowest_time = seconds
+            self.slowest_statement = statement
+        if self.repeats is not None:
+            self.repeats[statement] += 1
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.db_time * 1000:.1f};desc="{self.statements} queries"'
+
+
+_current: ContextVar[Optional[RequestDBStats]] = ContextVar("request_db_stats", default=None)
+
+
+class DBStats:
+    """
+    Per-process totals of `RequestDBStats`, overall and per route.
+    """
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.commits = 0
+        self.max_commits = 0
+        self.statements = 0
+        self.max_statements = 0
+        self.db_time = 0.0
+        self.slow_statements = 0
+        self._routes: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, route: str, stats: RequestDBStats) -> None:
+        self.requests += 1
+        self.commits += stats.commits
+        self.max_commits = max(self.max_commits, stats.commits)
+        self.statements += stats.statements
+        self.max_statements = max(self.max_statements, stats.statements)
+        self.db_time += stats.db_time
+        entry = self._routes.setdefault(route, {
+            "requests": 0, "commits": 0, "max_commits": 0,
+            "statements": 0, "max_statements": 0, "db_time": 0.0,
+            "slowest_ms": 0.0, "slowest_statement": None,
+        })
+        entry["requests"] += 1
+        entry["commits"] += stats.commits
+        entry["max_commits"] = max(entry["max_commits"], stats.commits)
+        entry["statements"] += stats.statements
+        entry["max_statements"] = max(entry["max_statements"], stats.statements)
+        entry["db_time"] += stats.db_time
+        if stats.slowest_statement is not None and stats.slowest_time * 1000 >= entry["slowest_ms"]:
+            entry["slowest_ms"] = round(stats.slowest_time * 1000, 3)
+            entry["slowest_statement"] = _preview(stats.slowest_statement)
+
+    def stats(self) -> Dict[str, Any]:
+        routes = {}
+        # Only routes that touch the database; the rest would just be noise
+        for route, entry in sorted(self._routes.items()):
+            if not entry["statements"] and not entry["commits"]:
+                continue
+            requests = entry["requests"]
+            routes[route] = {
+                "requests": requests,
+                "commits": entry["commits"],
+                "commits_per_request": round(entry["commits"] / requests, 3),
+                "max_commits": entry["max_commits"],
+                "statements_per_request": round(entry["statements"] / requests, 3),
+                "max_statements": entry["max_statements"],
+                "avg_db_ms": round(entry["db_time"] / requests * 1000, 3),
+                "slowest_ms": entry["slowest_ms"],
+                "slowest_statement": entry["slowest_statement"],
+            }
+        return {
+            "requests": self.requests,
+            "commits": self.commits,
+            "commits_per_request": round(self.commits / self.requests, 3) if self.requests else 0.0,
+            "max_commits_per_request": self.max_commits,
+            "statements": self.statements,
+            "statements_per_request": round(self.statements / self.requests, 3) if self.requests else 0.0,
+            "max_statements_per_request": self.max_statements,
+            "avg_db_ms_per_request": round(self.db_time / self.requests * 1000, 3) if self.requests else 0.0,
+            "slow_statements": self.slow_statements,
+            "routes": routes,
+        }
+
+
+db_stats = DBStats()
+
+
+@event.listens_for(Session, "after_commit")
+def _count_commit(session: Session) -> None:
+    stats = _current.get()
+    if stats is not None:
+        stats.commits += 1
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_statement(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+    conn.info.setdefault(_STATEMENT_STARTS, []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _end_statement(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+    starts = conn.info.get(_STATEMENT_STARTS)
+    if not starts:
+        return
+    seconds = time.perf_counter() - starts.pop()
+
+    stats = _current.get()
+    if stats is not None:
+        stats.record_statement(statement, seconds)
+
+    if settings.SLOW_QUERY_MS > 0 and seconds * 1000 >= settings.SLOW_QUERY_MS:
+        db_stats.slow_statements += 1
+        logger.warning("Slow SQL statement (%.1f ms): %s", seconds * 1000, _preview(statement))
+
+
+@event.listens_for(Engine, "handle_error")
+def _drop_failed_statement(exception_context: Any) -> None:
+    # after_cursor_execute does not run for a failed statement
+    connection = exception_context.connection
+    if connection is not None:
+        starts = connection.info.get(_STATEMENT_STARTS)
+        if starts:
+            starts.pop()
+
+
+def _report(route: str, stats: RequestDBStats) -> None:
+    if (
+        (settings.REQUEST_QUERY_COUNT_WARN > 0 and stats.statements >= settings.REQUEST_QUERY_COUNT_WARN)
+        or (settings.REQUEST_DB_TIME_WARN_MS > 0 and stats.db_time * 1000 >= settings.REQUEST_DB_TIME_WARN_MS)
+    ):
+        logger.warning(
+            "%s: %d SQL statements, %.1f ms in the database, slowest %.1f ms: %s",
+            route, stats.statements, stats.db_time * 1000, stats.slowest_time * 1000,
+            _preview(stats.slowest_statement or ""),
+        )
+    if stats.repeats:
+        for statement, count in stats.repeats.most_common():
+            if count < settings.SQL_REPEAT_WARN_THRESHOLD:
+                break
+            logger.warning("%s: possible N+1, same statement run %d times: %s", route, count, _preview(statement))
+
+
+class DBStatsMiddleware:
+    """
+    Collects `RequestDBStats` for every HTTP request into `db_stats`,
+    keyed by method and route template, adds them to the response as a
+    `Server-Timing` entry, and logs requests that pass the thresholds.
+
+    The header is written when the response starts, so it leaves out
+    statements run after that (e.g. by request-scoped dependencies).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Repeated statements are only tracked in DEBUG, they cost a counter per request
+        stats = RequestDBStats(track_repeats=settings.DEBUG and settings.SQL_REPEAT_WARN_THRESHOLD > 0)
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start" and settings.SERVER_TIMING_HEADER:
+                MutableHeaders(scope=message).append("Server-Timing", stats.server_timing())
+            await send(message)
+
+        token = _current.set(stats)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "<unmatched>"
+            label = f"{scope['method']} {path}"
+            db_stats.record(label, stats)
+            _report(label, stats)
+
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[List[str]]:
+    """
+    Fails with AssertionError if the block runs more than `limit` SQL
+    statements, listing them. Meant for query budgets in tests:
+
+        with assert_max_queries(3):
+            client.get("/api/v1/students/")
+
+    Counts every statement of every engine in the process while the block
+    runs, wherever it comes from (TestClient runs the app in another
+    thread), so keep background tasks quiet in such tests.
+    """
+    statements: List[str] = []
+
+    def record(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+        statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+    if len(statements) > limit:
+        listing = "\n".join(f"  {i}. {_preview(statement)}" for i, statement in enumerate(statements, 1))
+        raise AssertionError(f"{len(statements)} SQL statements, budget is {limit}:\n{listing}")
@@ -0,0 +1,140 @@
+import time
+from typing import Dict, Iterable, List, Tuple
+
+from .. import models
+from ..config import settings
+
+FULL_ACCESS = "admin:full_access"
+
+# Core permissions seeded by `services.initialization.seed_database`.
+# The position in this list is the permission's bit in a compiled mask, so
+# new entries must be appended at the end.
+CORE_PERMISSIONS = [
+    {"name": FULL_ACCESS, "description": "Grants full administrative access"},
+
+    # Users & Roles
+    {"name": "users:view", "description": "View user accounts"},
+    {"name": "users:manage", "description": "Create, update, and delete user accounts"},
+    {"name": "roles:view", "description": "View roles and their permissions"},
+    {"name": "roles:manage", "description": "Create, update, and delete roles and permissions"},
+
+    # Students
+    {"name": "students:view_own", "description": "View own student information"},
+    {"name": "students:view_all", "description": "View all student information"},
+    {"name": "students:manage", "description": "Create, update, and delete student information"},
+
+    # Rooms
+    {"name": "rooms:view", "description": "View room information"},
+    {"name": "rooms:manage", "description": "Create, update, and delete room information"},
+
+    # Inspections
+    {"name": "inspections:view_own", "description": "View own inspection records"},
+    {"name": "inspections:view_all", "description": "View all inspection records"},
+    {"name": "inspections:submit_own", "description": "Submit own inspection records"},
+    {"name": "inspections:submit_any", "description": "Submit inspection records for any student"},
+    {"name": "inspections:review", "description": "Review and approve inspection records"},
+    {"name": "inspections:reinspect", "description": "Mark for reinspection or perform reinspection"},
+    {"name": "inspections:delete", "description": "Delete inspection records"},
+
+    # Announcements
+    {"name": "announcements:view", "description": "View announcements"},
+    {"name": "announcements:create", "description": "Create announcements"},
+    {"name": "announcements:edit", "description": "Edit announcements"},
+    {"name": "announcements:delete", "description": "Delete announcements"},
+
+    # Patrols (LightsOutPatrol)
+    {"name": "patrol_locations:view", "description": "View patrol locations"},
+    {"name": "patrol_locations:manage", "description": "Create, update, and delete patrol locations"},
+    {"name": "patrols:perform", "description": "Perform and submit lights out patrols"},
+    {"name": "patrols:view_all", "description": "View all lights out patrol history"},
+
+    # Reports & Statistics
+    {"name": "reports:view_statistics", "description": "View dashboard statistics and charts"},
+    {"name": "reports:export", "description": "Export data and reports"},
+
+    # Data Management
+    {"name": "data:import", "description": "Import bulk data"},
+
+    # Others
+    {"name": "audit_logs:view", "description": "View system audit logs"},
+    {"name": "manage_items", "description": "Manage inspection items"},
+    {"name": "system:settings", "description": "Manage system-wide settings"},
+]
+
+
+class PermissionRegistry:
+    """
+    Maps permission names to fixed bits and compiles roles into integer masks.
+
+    Core permissions get their bit from `CORE_PERMISSIONS`. Any other name
+    (custom permissions created through the API, or names only referenced by
+    a `PermissionChecker`) gets the next free bit the first time it is seen.
+    Bits are process-local and never persisted.
+
+    Compiled role masks are cached by role id. `crud_role` invalidates them on
+    update and delete; the TTL bounds staleness across workers.
+    """
+
+    def __init__(self, names: Iterable[str], ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._bits: Dict[str, int] = {}
+        self._role_masks: Dict[str, Tuple[int, float]] = {}
+        for name in names:
+            self.bit(name)
+        self.full_access = self.bit(FULL_ACCESS)
+
+    def bit(self, name: str) -> int:
+        if name not in self._bits:
+            self._bits[name] = 1 << len(self._bits)
+        return self._bits[name]
+
+    def mask(self, names: Iterable[str]) -> int:
+        mask = 0
+        for name in names:
+            mask |= self.bit(name)
+        return mask
+
+    def names(self, mask: int) -> List[str]:
+        return [name for name, bit in self._bits.items() if mask & bit]
+
+    def role_mask(self, role: models.Role) -> int:
+        """
+        Returns the compiled mask of a role whose permissions are loaded.
+        """
+        key = str(role.id)
+        entry = self._role_masks.get(key)
+        now = time.monotonic()
+        if entry is not None and entry[1] > now:
+            return entry[0]
+
+        mask = self.mask(perm.name for perm in role.permissions)
+        if self.ttl_seconds > 0:
+            self._role_masks[key] = (mask, now + self.ttl_seconds)
+        return mask
+
+    def user_mask(self, user: models.User) -> int:
+        mask = 0
+        for role in user.roles or []:
+            mask |= self.role_mask(role)
+        return mask
+
+    def has(self, user: models.User, name: str) -> bool:
+        """
+        True if the user holds `name` or full access.
+        """
+        return bool(self.user_mask(user) & (self.bit(name) | self.full_access))
+
+    def invalidate_role(self, role_id) -> None:
+        self._role_masks.pop(str(role_id), None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "registered_permissions": len(self._bits),
+            "compiled_roles": len(self._role_masks),
+        }
+
+
+permission_registry = PermissionRegistry(
+    (p["name"] for p in CORE_PERMISSIONS),
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
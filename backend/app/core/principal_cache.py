@@ -0,0 +1,144 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import models
+from ..config import settings
+
+# session.info keys for the invalidations to repeat once the session commits
+_INVALIDATED_USERS = "principal_cache_users"
+_BUMP_VERSION = "principal_cache_bump_version"
+
+
+class PrincipalCache:
+    """
+    Per-process TTL/LRU cache of authenticated users, keyed by token subject.
+
+    Entries are detached copies of the `User` graph loaded by
+    `crud_user.get_by_username` (roles, permissions and student). On a hit the
+    copy is merged into the request session with `load=False`, so no SQL is
+    emitted and the cached object itself is never attached to a session.
+
+    Every entry is stamped with the cache `version`. Role and permission edits
+    bump the version, which invalidates all entries at once.
+
+    Writers use the `*_on_commit` variants: until the write commits, another
+    request can still load the old row and cache it, so the invalidation is
+    repeated after the commit.
+    """
+
+    def __init__(self, ttl_seconds: int, max_size: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[models.User, int, float]]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_size > 0
+
+    async def get(self, db: AsyncSession, username: str) -> Optional[models.User]:
+        """
+        Returns a session-bound copy of the cached user, or None on a miss.
+        """
+        if not self.enabled:
+            return None
+
+        entry = self._entries.get(username)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        snapshot, version, expires_at = entry
+        if version != self.version or expires_at < time.monotonic():
+            del self._entries[username]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(username)
+        self.hits += 1
+        return await db.merge(snapshot, load=False)
+
+    def put(self, user: models.User) -> None:
+        """
+        Stores a detached copy of a freshly loaded user.
+        """
+        if not self.enabled:
+            return
+
+        scratch = Session()
+        snapshot = scratch.merge(user, load=False)
+        scratch.expunge_all()
+
+        self._entries[user.username] = (snapshot, self.version, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(user.username)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, username: Optional[str]) -> None:
+        """
+        Drops a single user, e.g. after deactivation or a password change.
+        """
+        if username:
+            self._entries.pop(username, None)
+
+    def invalidate_on_commit(self, db: AsyncSession, username: Optional[str]) -> None:
+        """
+        Drops a user now and again once `db` commits.
+        """
+        if username:
+            self.invalidate(username)
+            db.info.setdefault(_INVALIDATED_USERS, set()).add(username)
+
+    def bump_version(self) -> None:
+        """
+        Invalidates every entry. Called when roles or their permissions change.
+        """
+        self.version += 1
+        self._entries.clear()
+
+    def bump_version_on_commit(self, db: AsyncSession) -> None:
+        """
+        Invalidates every entry now and again once `db` commits.
+        """
+        self.bump_version()
+        db.info[_BUMP_VERSION] = True
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    if session.info.pop(_BUMP_VERSION, False):
+        principal_cache.bump_version()
+    for username in session.info.pop(_INVALIDATED_USERS, ()):
+        principal_cache.invalidate(username)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_BUMP_VERSION, None)
+    session.info.pop(_INVALIDATED_USERS, None)
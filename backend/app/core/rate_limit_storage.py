@@ -0,0 +1,187 @@
+import os
+import sqlite3
+import threading
+import time
+from math import floor
+from typing import Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from limits.storage import SlidingWindowCounterSupport, Storage
+from limits.storage.base import TimestampedSlidingWindow
+
+
+class SQLiteStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """
+    Rate limit storage backed by a SQLite file in WAL mode.
+
+    Every uvicorn worker on the host opens the same file, so counters are
+    shared instead of each worker enforcing its own copy of the limit.
+    Registered with `limits` under the `sqlite` scheme and addressed like a
+    SQLAlchemy URL: `sqlite:///relative/path.db` or `sqlite:////abs/path.db`.
+
+    Supports the fixed window and sliding window counter strategies.
+    Increments are a single UPSERT (which also resets an expired counter), and
+    a sliding window acquisition runs inside `BEGIN IMMEDIATE`, so both are
+    atomic across processes. Expired rows are purged every `PURGE_EVERY`
+    increments.
+
+    The calls block the event loop, so a locked database is waited on for
+    at most `timeout` seconds (50 ms by default, `?timeout=` in the URI).
+    A hit that still finds it locked is let through and counted in
+    `busy_failures` rather than stalling every request behind the lock.
+    """
+
+    STORAGE_SCHEME = ["sqlite"]
+    PURGE_EVERY = 1000
+
+    DEFAULT_TIMEOUT = 0.05
+
+    def __init__(self, uri: str, wrap_exceptions: bool = False, timeout: Optional[float] = None, **options: str):
+        parts = urlsplit(uri)
+        path = unquote(parts.path)
+        self.path = path[1:] if path.startswith("/") else path
+        if timeout is None:
+            timeout = parse_qs(parts.query).get("timeout", [self.DEFAULT_TIMEOUT])[-1]
+        self.timeout = float(timeout)
+        self._local = threading.local()
+        self._incr_calls = 0
+        self.busy_failures = 0
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits ("
+                " key TEXT PRIMARY KEY,"
+                " count INTEGER NOT NULL,"
+                " expiry REAL NOT NULL)"
+            )
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @property
+    def base_exceptions(self) -> type[Exception]:
+        return sqlite3.Error
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _is_busy(self, error: sqlite3.OperationalError) -> bool:
+        if "locked" not in str(error):
+            return False
+        self.busy_failures += 1
+        return True
+
+    def _incr(self, conn: sqlite3.Connection, key: str, expiry: float, amount: int, now: float) -> int:
+        row = conn.execute(
+            "INSERT INTO rate_limits (key, count, expiry) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET "
+            " count = CASE WHEN expiry <= ? THEN excluded.count ELSE count + excluded.count END,"
+            " expiry = CASE WHEN expiry <= ? THEN excluded.expiry ELSE expiry END "
+            "RETURNING count",
+            (key, amount, now + expiry, now, now),
+        ).fetchone()
+        return row[0]
+
+    def _get(self, conn: sqlite3.Connection, key: str, now: float) -> Tuple[int, Optional[float]]:
+        row = conn.execute(
+            "SELECT count, expiry FROM rate_limits WHERE key = ? AND expiry > ?", (key, now)
+        ).fetchone()
+        return (row[0], row[1]) if row else (0, None)
+
+    def _maybe_purge(self, conn: sqlite3.Connection, now: float) -> None:
+        self._incr_calls += 1
+        if self._incr_calls % self.PURGE_EVERY == 0:
+            conn.execute("DELETE FROM rate_limits WHERE expiry <= ?", (now,))
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        now = time.time()
+        try:
+            conn = self._connection()
+            count = self._incr(conn, key, expiry, amount, now)
+            self._maybe_purge(conn, now)
+        except sqlite3.OperationalError as e:
+            if not self._is_busy(e):
+                raise
+            # Under any limit, so the hit is allowed
+            return 0
+        return count
+
+    def get(self, key: str) -> int:
+        return self._get(self._connection(), key, time.time())[0]
+
+    def get_expiry(self, key: str) -> float:
+        now = time.time()
+        expiry = self._get(self._connection(), key, now)[1]
+        return expiry if expiry is not None else now
+
+    def clear(self, key: str) -> None:
+        self._connection().execute("DELETE FROM rate_limits WHERE key = ?", (key,))
+
+    def check(self) -> bool:
+        try:
+            self._connection().execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self) -> Optional[int]:
+        return self._connection().execute("DELETE FROM rate_limits").rowcount
+
+    def _sliding_window_info(
+        self, conn: sqlite3.Connection, previous_key: str, current_key: str, expiry: int, now: float
+    ) -> Tuple[int, float, int, float]:
+        previous_count = self._get(conn, previous_key, now)[0]
+        current_count = self._get(conn, current_key, now)[0]
+        if previous_count == 0:
+            previous_ttl = 0.0
+        else:
+            previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def acquire_sliding_window_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        if amount > limit:
+            return False
+        now = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        try:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                previous_count, previous_ttl, current_count, _ = self._sliding_window_info(
+                    conn, previous_key, current_key, expiry, now
+                )
+                weighted_count = previous_count * previous_ttl / expiry + current_count
+                acquired = floor(weighted_count) + amount <= limit
+                if acquired:
+                    # The current window is read again as the previous one, so keep it for two periods
+                    self._incr(conn, current_key, 2 * expiry, amount, now)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            if acquired:
+                self._maybe_purge(conn, now)
+        except sqlite3.OperationalError as e:
+            if not self._is_busy(e):
+                raise
+            return True
+        return acquired
+
+    def get_sliding_window(self, key: str, expiry: int) -> Tuple[int, float, int, float]:
+        now = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        return self._sliding_window_info(self._connection(), previous_key, current_key, expiry, now)
+
+    def clear_sliding_window(self, key: str, expiry: int) -> None:
+        now = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        self.clear(previous_key)
+        self.clear(current_key)
@@ -1,11 +1,19 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Generic, List, Optional, Sequence, Set, Tuple, Type, TypeVar, Union
 from uuid import UUID
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy import select
+from sqlalchemy import Select, insert, select, tuple_
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..core.count_cache import count_cache
+from ..database import commit_or_flush
 from ..models import Base # Assuming your Base declarative model is in app.models
 
 ModelType = TypeVar("ModelType", bound=Base)
@@ -13,6 +21,43 @@ CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 
+class InvalidCursorError(ValueError):
+    """
+    Raised for a cursor that was not produced by `encode_cursor` for this listing.
+    """
+
+
+def _cursor_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Opaque keyset cursor holding the sort key values of the row a page ended on.
+    """
+    raw = json.dumps([_cursor_value(value) for value in values]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, ...]:
+    """
+    Inverse of `encode_cursor`. Raises InvalidCursorError for a malformed cursor.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        return tuple(
+            datetime.fromisoformat(value["dt"]) if isinstance(value, dict) else value
+            for value in values
+        )
+    except (TypeError, ValueError, KeyError) as e:
+        raise InvalidCursorError("Invalid cursor") from e
+
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def __init__(self, model: Type[ModelType]):
         """
@@ -36,15 +81,81 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         result = await db.execute(stmt)
         return result.scalar_one_or_none()
 
+    async def count(self, db: AsyncSession, query: Select) -> int:
+        """
+        Number of records `query` matches. Loader options and ORDER BY are
+        dropped, and totals are cached briefly per filter signature.
+        """
+        return await count_cache.count(db, query, self.model.id)
+
+    async def paginate(
+        self,
+        db: AsyncSession,
+        query: Select,
+        *,
+        order_by: Sequence[Any] = (),
+        descending: bool = False,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        unique: bool = False,
+        rows: bool = False,
+    ) -> Tuple[List[Any], Optional[str]]:
+        """
+        Runs `query` ordered by `order_by` plus the primary key, and returns
+        one page of records and the cursor of the next page (None on the last).
+
+        Without a cursor the page starts at `skip` (OFFSET). With the cursor
+        of the previous page it seeks past that row on the sort key instead,
+        which stays fast on deep pages. Set `unique` for queries that
+        joinedload collections, and `rows` for column projections, which
+        then come back as `Row`s; they must select the sort keys under their
+        own names.
+        """
+        keys = list(order_by)
+        if not any(key is self.model.id for key in keys):
+            keys.append(self.model.id)
+
+        if cursor:
+            values = decode_cursor(cursor)
+            if len(values) != len(keys):
+                raise InvalidCursorError("Invalid cursor")
+            position = tuple_(*keys) < tuple_(*values) if descending else tuple_(*keys) > tuple_(*values)
+            query = query.filter(position)
+        else:
+            query = query.offset(skip)
+
+        query = query.order_by(*(key.desc() if descending else key.asc() for key in keys))
+        # One extra row tells whether there is a next page
+        result = await db.execute(query.limit(limit + 1))
+        if rows:
+            records = list(result.all())
+        else:
+            scalars = result.scalars()
+            records = list(scalars.unique().all() if unique else scalars.all())
+
+        next_cursor = None
+        if len(records) > limit:
+            records = records[:limit]
+            next_cursor = encode_cursor(*(getattr(records[-1], key.key) for key in keys))
+        return records, next_cursor
+
+    async def get_page(
+        self, db: AsyncSession, *, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+    ) -> Tuple[List[ModelType], Optional[str]]:
+        """
+        Retrieve a page of records ordered by ID, and the cursor of the next page.
+        """
+        return await self.paginate(db, select(self.model), skip=skip, limit=limit, cursor=cursor)
+
     async def get_multi(
-        self, db: AsyncSession, *, skip: int = 0, limit: int = 100
+        self, db: AsyncSession, *, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
     ) -> List[ModelType]:
         """
         Retrieve multiple records with optional skipping and limiting.
         """
-        stmt = select(self.model).offset(skip).limit(limit)
-        result = await db.execute(stmt)
-        return result.scalars().all()
+        records, _ = await self.get_page(db, skip=skip, limit=limit, cursor=cursor)
+        return records
 
     async def create(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
         """
@@ -53,10 +164,120 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         obj_in_data = jsonable_encoder(obj_in)
         db_obj = self.model(**obj_in_data)  # type: ignore
         db.add(db_obj)
-        await db.commit()
+        await commit_or_flush(db)
         await db.refresh(db_obj)
         return db_obj
 
+    def _insert_rows(self, objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Column values for a multi-row INSERT. UUID keys are generated here
+        with the column's own default, so ids are known without a flush.
+        """
+        columns = {attr.key for attr in sa_inspect(self.model).column_attrs}
+        id_default = self.model.__table__.c.id.default
+        client_keys = id_default is not None and id_default.is_callable
+
+        rows = []
+        for obj_in in objs_in:
+            data = obj_in if isinstance(obj_in, dict) else obj_in.model_dump()
+            row = {key: str(value) if isinstance(value, UUID) else value for key, value in data.items() if key in columns}
+            if client_keys and row.get("id") is None:
+                row["id"] = id_default.arg(None)
+            rows.append(row)
+        if rows and any(row.keys() != rows[0].keys() for row in rows):
+            raise ValueError("Every row of a bulk insert must set the same columns")
+        return rows
+
+    async def bulk_create(
+        self,
+        db: AsyncSession,
+        *,
+        objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]],
+        chunk_size: int = 500,
+        commit: bool = True,
+    ) -> List[Any]:
+        """
+        Create many records with one multi-row INSERT per `chunk_size` rows,
+        and return their ids in input order. Nothing is loaded back.
+        """
+        rows = self._insert_rows(objs_in)
+        if not rows:
+            return []
+        if "id" in rows[0]:
+            for start in range(0, len(rows), chunk_size):
+                await db.execute(insert(self.model).values(rows[start:start + chunk_size]))
+            ids = [row["id"] for row in rows]
+        else:
+            # Autoincrement keys are only known after the INSERT
+            db_objs = [self.model(**row) for row in rows]
+            db.add_all(db_objs)
+            await db.flush()
+            ids = [db_obj.id for db_obj in db_objs]
+        if commit:
+            await commit_or_flush(db)
+        return ids
+
+    async def bulk_upsert(
+        self,
+        db: AsyncSession,
+        *,
+        objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]],
+        conflict_keys: Sequence[str],
+        update_keys: Optional[Sequence[str]] = None,
+        chunk_size: int = 500,
+        commit: bool = True,
+    ) -> List[Any]:
+        """
+        Insert many records, updating `update_keys` (default: every other
+        column given) of the existing row instead where one with the same
+        `conflict_keys` already exists. Returns the ids, new or existing, in
+        input order. Objects already loaded in the session are not refreshed.
+
+        MySQL uses INSERT ... ON DUPLICATE KEY UPDATE, which reacts to *any*
+        unique key of the table, so `conflict_keys` should be the only unique
+        key besides the primary key. SQLite uses ON CONFLICT ... DO UPDATE.
+        """
+        rows = self._insert_rows(objs_in)
+        if not rows:
+            return []
+        if update_keys is None:
+            update_keys = [key for key in rows[0] if key != "id" and key not in conflict_keys]
+        dialect = db.get_bind().dialect.name
+        key_columns = [getattr(self.model, key) for key in conflict_keys]
+
+        ids_by_key: Dict[Tuple[Any, ...], Any] = {}
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            if dialect in ("mysql", "mariadb"):
+                stmt = mysql_insert(self.model).values(chunk)
+                # ON DUPLICATE KEY needs at least one assignment
+                assignments = update_keys or conflict_keys[:1]
+                stmt = stmt.on_duplicate_key_update({key: stmt.inserted[key] for key in assignments})
+            elif dialect == "sqlite":
+                stmt = sqlite_insert(self.model).values(chunk)
+                if update_keys:
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=list(conflict_keys), set_={key: stmt.excluded[key] for key in update_keys}
+                    )
+                else:
+                    stmt = stmt.on_conflict_do_nothing(index_elements=list(conflict_keys))
+            else:
+                raise NotImplementedError(f"bulk_upsert does not support the {dialect} dialect")
+            await db.execute(stmt)
+
+            # Rows that hit an existing record kept that record's id
+            keys = [tuple(row[key] for key in conflict_keys) for row in chunk]
+            if len(key_columns) == 1:
+                condition = key_columns[0].in_([key[0] for key in keys])
+            else:
+                condition = tuple_(*key_columns).in_(keys)
+            result = await db.execute(select(self.model.id, *key_columns).where(condition))
+            ids_by_key.update({tuple(found[1:]): found[0] for found in result.all()})
+
+        if commit:
+            await commit_or_flush(db)
+        return [ids_by_key.get(tuple(row[key] for key in conflict_keys)) for row in rows]
+
     async def update(
         self,
         db: AsyncSession,
@@ -66,22 +287,56 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     ) -> ModelType:
         """
         Update an existing record.
+
+        Only mapped columns whose value differs are assigned, and nothing is
+        written when none does. After the commit, only what the UPDATE made
+        stale is reloaded (see `_reload_stale`) instead of the whole row.
         """
-        obj_data = jsonable_encoder(db_obj)
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
             update_data = obj_in.model_dump(exclude_unset=True)
-        
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
+
+        state = sa_inspect(db_obj)
+        changed = set()
+        for attr in state.mapper.column_attrs:
+            if attr.key not in update_data:
+                continue
+            value = update_data[attr.key]
+            # An unloaded attribute is assigned rather than loaded to compare
+            if attr.key not in state.dict or state.dict[attr.key] != value:
+                setattr(db_obj, attr.key, value)
+                changed.add(attr.key)
+
+        if not changed and not (db.new or db.dirty or db.deleted):
+            return db_obj
 
         db.add(db_obj)
-        await db.commit()
-        await db.refresh(db_obj)
+        await commit_or_flush(db)
+        if changed:
+            await self._reload_stale(db, db_obj, changed)
         return db_obj
 
+    async def _reload_stale(self, db: AsyncSession, db_obj: ModelType, changed: Set[str]) -> None:
+        """
+        After an UPDATE of `changed`, reloads the columns the flush expired
+        (`onupdate` SQL defaults such as `updated_at`), or the whole row if a
+        loaded relationship now points elsewhere.
+        """
+        state = sa_inspect(db_obj)
+        mapper = state.mapper
+        for relationship in mapper.relationships:
+            if relationship.key in state.dict and any(
+                mapper.get_property_by_column(column).key in changed
+                for column in relationship.local_columns
+            ):
+                await db.refresh(db_obj)
+                return
+
+        expired = [attr.key for attr in mapper.column_attrs if attr.key in state.expired_attributes]
+        if expired:
+            await db.refresh(db_obj, attribute_names=expired)
+
     async def remove(self, db: AsyncSession, *, id: Union[Any, UUID]) -> Optional[ModelType]:
         """
         Remove a record by its ID.
@@ -95,5 +350,5 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         obj = result.scalar_one_or_none()
         if obj:
             await db.delete(obj)
-            await db.commit()
+            await commit_or_flush(db)
         return obj
@@ -6,6 +6,7 @@ from sqlalchemy import select, desc
 from typing import List, Optional, Any
 import uuid
 
+from app.database import commit_or_flush
 from app.models import Announcement
 from app.schemas import AnnouncementCreate, AnnouncementUpdate
 from .base import CRUDBase
@@ -57,7 +58,7 @@ class CRUDAnnouncement(CRUDBase[Announcement, AnnouncementCreate, AnnouncementUp
             created_by=owner_id
         )
         db.add(db_obj)
-        await db.commit()
+        await commit_or_flush(db)
         await db.refresh(db_obj)
         return db_obj
 
@@ -1,17 +1,23 @@
 from typing import Optional, Dict, Any, List
+import asyncio
+import heapq
 import uuid
 from datetime import datetime
+from itertools import chain
 
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import func # Added import
+from sqlalchemy import delete, func, insert, text, tuple_
 
+from ..core.audit_segments import as_naive, audit_segments
 from ..models import AuditLog
 from ..schemas import AuditLogCreate # Assuming this exists or use Dict
-from .base import CRUDBase
+from .base import CRUDBase, InvalidCursorError, decode_cursor
 
 class CRUDAudit(CRUDBase[AuditLog, Dict[str, Any], Dict[str, Any]]):
-    
+    # Approximate counts stop here instead of scanning every matching row
+    APPROXIMATE_COUNT_CAP = 10000
+
     async def create(
         self,
         db: AsyncSession,
@@ -34,12 +40,23 @@ class CRUDAudit(CRUDBase[AuditLog, Dict[str, Any], Dict[str, Any]]):
         await db.refresh(db_obj)
         return db_obj
 
+    async def create_many(self, db: AsyncSession, *, rows: List[Dict[str, Any]]) -> int:
+        """
+        Inserts pre-built audit rows with a single multi-row INSERT.
+        Each row must carry its own `id` and `created_at`.
+        """
+        if not rows:
+            return 0
+        await db.execute(insert(AuditLog).values(rows))
+        await db.commit()
+        return len(rows)
+
     async def get_audit_logs(self, *args, **kwargs):
         return await self.get_multi_filtered(*args, **kwargs)
 
-    async def get_count(
+    def _apply_filters(
         self,
-        db: AsyncSession,
+        query,
         *,
         user_id: Optional[uuid.UUID] = None,
         action: Optional[str] = None,
@@ -47,10 +64,9 @@ class CRUDAudit(CRUDBase[AuditLog, Dict[str, Any], Dict[str, Any]]):
         resource_id: Optional[str] = None,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
-    ) -> int:
-        query = select(func.count(AuditLog.id))
+    ):
         if user_id:
-            query = query.filter(AuditLog.user_id == user_id)
+            query = query.filter(AuditLog.user_id == str(user_id))
         if action:
             query = query.filter(AuditLog.action == action)
         if resource_type:
@@ -61,9 +77,57 @@ class CRUDAudit(CRUDBase[AuditLog, Dict[str, Any], Dict[str, Any]]):
             query = query.filter(AuditLog.created_at >= start_date)
         if end_date:
             query = query.filter(AuditLog.created_at <= end_date)
-        
+        return query
+
+    async def get_count(
+        self,
+        db: AsyncSession,
+        *,
+        approximate: bool = False,
+        **filters: Any,
+    ) -> int:
+        """
+        Counts the logs matching `filters` (see `get_multi_filtered`).
+
+        With `approximate=True` the count stops at `APPROXIMATE_COUNT_CAP`
+        rows, and an unfiltered count on MySQL reads the table statistics
+        instead of scanning.
+        """
+        snapshot = audit_segments.snapshot() if audit_segments.reaches(filters.get("start_date")) else None
+        archived = 0
+        if snapshot is not None:
+            # Unfiltered and date-only counts come from the index; the rest read segments
+            archived = await asyncio.to_thread(
+                audit_segments.count, snapshot, self.APPROXIMATE_COUNT_CAP if approximate else None, **filters
+            )
+
+        if approximate and not any(filters.values()) and db.bind.dialect.name == "mysql":
+            result = await db.execute(
+                text(
+                    "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table"
+                ),
+                {"table": AuditLog.__tablename__},
+            )
+            estimate = result.scalar_one_or_none()
+            if estimate is not None:
+                return int(estimate) + archived
+
+        if approximate:
+            capped = self._apply_filters(select(AuditLog.id), **filters)
+            capped = self._exclude_pending(capped, snapshot).limit(self.APPROXIMATE_COUNT_CAP)
+            query = select(func.count()).select_from(capped.subquery())
+        else:
+            query = self._exclude_pending(self._apply_filters(select(func.count(AuditLog.id)), **filters), snapshot)
+
         result = await db.execute(query)
-        return result.scalar_one()
+        return result.scalar_one() + archived
+
+    @staticmethod
+    def _exclude_pending(query, snapshot: Optional[Dict[str, Any]]):
+        # Rows archived but not deleted yet are read from the archive only
+        pending = audit_segments.pending_ids(snapshot) if snapshot is not None else []
+        return query.filter(AuditLog.id.notin_(pending)) if pending else query
 
     async def get_multi_filtered(
         self,
@@ -76,24 +140,75 @@ class CRUDAudit(CRUDBase[AuditLog, Dict[str, Any], Dict[str, Any]]):
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        cursor: Optional[str] = None,
     ) -> List[AuditLog]:
-        query = select(AuditLog)
-        if user_id:
-            query = query.filter(AuditLog.user_id == user_id)
-        if action:
-            query = query.filter(AuditLog.action == action)
-        if resource_type:
-            query = query.filter(AuditLog.resource_type == resource_type)
-        if resource_id:
-            query = query.filter(AuditLog.resource_id == resource_id)
-        if start_date:
-            query = query.filter(AuditLog.created_at >= start_date)
-        if end_date:
-            query = query.filter(AuditLog.created_at <= end_date)
-        
-        query = query.order_by(AuditLog.created_at.desc()) # Default sort by date desc
-        result = await db.execute(query.offset(skip).limit(limit))
+        """
+        Newest first. Pass the `cursor` of the previous page (see
+        `crud.base.encode_cursor`) to seek past it on the `(created_at, id)`
+        index instead of using OFFSET; `skip` is ignored when a cursor is given.
+        """
+        filters = {
+            "user_id": user_id,
+            "action": action,
+            "resource_type": resource_type,
+            "resource_id": resource_id,
+            "start_date": start_date,
+            "end_date": end_date,
+        }
+        query = self._apply_filters(select(AuditLog), **filters)
+        after = None
+        if cursor:
+            after = decode_cursor(cursor)
+            if len(after) != 2:
+                raise InvalidCursorError("Invalid cursor")
+            query = query.filter(tuple_(AuditLog.created_at, AuditLog.id) < tuple_(*after))
+            skip = 0
+        query = query.order_by(AuditLog.created_at.desc(), AuditLog.id.desc())
+
+        if not audit_segments.reaches(start_date):
+            result = await db.execute(query.offset(skip).limit(limit))
+            return list(result.scalars().all())
+
+        # The range reaches into the archive: take the first skip + limit rows of
+        # both sources and merge them. Archived rows are all older than
+        # archived_before, so a full live page ending after it needs no archive read.
+        snapshot = audit_segments.snapshot()
+        wanted = skip + limit
+        result = await db.execute(self._exclude_pending(query, snapshot).limit(wanted))
+        live = list(result.scalars().all())
+        archived_before = datetime.fromisoformat(snapshot["archived_before"])
+        if len(live) == wanted and _sort_key(live[-1])[0] >= archived_before:
+            return live[skip:]
+
+        before = (as_naive(after[0]), str(after[1])) if after is not None else None
+        archived = await asyncio.to_thread(audit_segments.newest, snapshot, wanted, before, **filters)
+        merged = heapq.nlargest(wanted, chain(live, map(audit_segments.to_model, archived)), key=_sort_key)
+        return merged[skip:]
+
+    async def get_older_than(self, db: AsyncSession, *, before: datetime, limit: int) -> List[AuditLog]:
+        """
+        Oldest rows created before `before`, for archiving.
+        """
+        query = (
+            select(AuditLog)
+            .filter(AuditLog.created_at < before)
+            .order_by(AuditLog.created_at, AuditLog.id)
+            .limit(limit)
+        )
+        result = await db.execute(query)
         return list(result.scalars().all())
 
+    async def remove_many(self, db: AsyncSession, *, ids: List[str]) -> int:
+        if not ids:
+            return 0
+        result = await db.execute(delete(AuditLog).where(AuditLog.id.in_(ids)))
+        await db.commit()
+        return result.rowcount
+
+
+def _sort_key(row: AuditLog):
+    return as_naive(row.created_at), str(row.id)
+
+
 audit_log_crud = CRUDAudit(AuditLog)
@@ -4,6 +4,7 @@ from sqlalchemy import insert, select
 from sqlalchemy.orm import class_mapper
 
 from .. import models
+from .crud_inspection import crud_inspection
 
 class CRUDBackup:
     async def get_all_records_from_model(self, db: AsyncSession, model: Type[models.Base]) -> List[Dict[str, Any]]:
@@ -51,5 +52,9 @@ class CRUDBackup:
                 if mapped_records:
                     await db.execute(insert(model).values(mapped_records))
 
+            # Backups made before the records carried detail counts lack them
+            if data_to_import.get(models.InspectionRecord.__tablename__):
+                await crud_inspection.recount_details(db)
+
 backup_crud = CRUDBackup()
 
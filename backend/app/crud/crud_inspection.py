@@ -1,28 +1,73 @@
-from typing import List, Optional, Any, Dict
+from typing import List, Optional, Any, Dict, Tuple
 import uuid
 from datetime import datetime
 
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload, joinedload
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import or_, func
+from sqlalchemy import Select, or_, func, update
 
-from app.models import Bed, InspectionItem, Photo, InspectionDetail, InspectionRecord, Student, Room, InspectionStatus
+from app.database import commit_or_flush
+from app.models import Bed, Building, InspectionItem, Photo, InspectionDetail, InspectionRecord, Student, Room, InspectionStatus
 from app.schemas import InspectionRecordCreate, InspectionRecordUpdate, InspectionCreate, ItemStatus
 from .base import CRUDBase
 
+# Child rows written in bulk alongside their records
+detail_crud = CRUDBase(InspectionDetail)
+photo_crud = CRUDBase(Photo)
+
 class CRUDInspection(CRUDBase[InspectionRecord, InspectionRecordCreate, InspectionRecordUpdate]):
     
+    def _full_record_options(self) -> tuple:
+        return (
+            joinedload(InspectionRecord.student).joinedload(Student.bed).joinedload(Bed.room).joinedload(Room.building),
+            selectinload(InspectionRecord.room).selectinload(Room.building),
+            selectinload(InspectionRecord.details).selectinload(InspectionDetail.item),
+            selectinload(InspectionRecord.details).selectinload(InspectionDetail.photos)
+        )
+
+    @staticmethod
+    def _detail_counts(details: List[Any]) -> Dict[str, int]:
+        """
+        The record's item/damaged/missing counts for the details it is created with.
+        """
+        statuses = [detail.status for detail in details]
+        return {
+            "item_count": len(statuses),
+            "damaged_count": statuses.count(ItemStatus.damaged),
+            "missing_count": statuses.count(ItemStatus.missing),
+        }
+
+    async def recount_details(self, db: AsyncSession, record_ids: Optional[List[str]] = None) -> None:
+        """
+        Recomputes the detail counts of `record_ids` (all records if None)
+        from their details. Call it after adding, removing or changing the
+        status of details of existing records. Does not commit.
+        """
+        def detail_count(*conditions: Any):
+            return (
+                select(func.count(InspectionDetail.id))
+                .where(InspectionDetail.record_id == InspectionRecord.id, *conditions)
+                .scalar_subquery()
+            )
+
+        statement = update(InspectionRecord).values(
+            item_count=detail_count(),
+            damaged_count=detail_count(InspectionDetail.status == ItemStatus.damaged),
+            missing_count=detail_count(InspectionDetail.status == ItemStatus.missing),
+        )
+        if record_ids is not None:
+            if not record_ids:
+                return
+            statement = statement.where(InspectionRecord.id.in_([str(record_id) for record_id in record_ids]))
+        await db.execute(statement.execution_options(synchronize_session="fetch"))
+
     async def get(self, db: AsyncSession, id: Any) -> Optional[InspectionRecord]:
         result = await db.execute(
             select(InspectionRecord)
             .filter(InspectionRecord.id == str(id))
-            .options(
-                joinedload(InspectionRecord.student).joinedload(Student.bed).joinedload(Bed.room).joinedload(Room.building),
-                selectinload(InspectionRecord.room).selectinload(Room.building),
-                selectinload(InspectionRecord.details).selectinload(InspectionDetail.item),
-                selectinload(InspectionRecord.details).selectinload(InspectionDetail.photos)
-            )
+            .options(*self._full_record_options())
         )
         return result.scalars().first()
 
@@ -37,6 +82,47 @@ class CRUDInspection(CRUDBase[InspectionRecord, InspectionRecordCreate, Inspecti
         )
         return result.scalars().first()
 
+    async def get_image_student_id(self, db: AsyncSession, filename: str) -> Optional[str]:
+        """
+        Id of the student whose record has the image `filename`, as a
+        photo or as the signature; None if no record uses it.
+        """
+        photo_owner = (
+            select(InspectionRecord.student_id)
+            .join(InspectionDetail, InspectionDetail.record_id == InspectionRecord.id)
+            .join(Photo, Photo.detail_id == InspectionDetail.id)
+            .filter(Photo.file_path == filename)
+        )
+        signature_owner = select(InspectionRecord.student_id).filter(InspectionRecord.signature == filename)
+        result = await db.execute(photo_owner.union_all(signature_owner).limit(1))
+        return result.scalars().first()
+
+    def _summary_query(self) -> Select:
+        """
+        One row per record with the columns of `InspectionRecordSummary`,
+        and no ORM objects.
+        """
+        return (
+            select(
+                InspectionRecord.id,
+                InspectionRecord.student_id,
+                Student.full_name.label("student_name"),
+                InspectionRecord.room_id,
+                Room.room_number,
+                Building.name.label("building_name"),
+                InspectionRecord.status,
+                InspectionRecord.created_at,
+                InspectionRecord.submitted_at,
+                InspectionRecord.item_count,
+                InspectionRecord.damaged_count,
+                InspectionRecord.missing_count,
+            )
+            .select_from(InspectionRecord)
+            .join(Student, InspectionRecord.student_id == Student.id)
+            .join(Room, InspectionRecord.room_id == Room.id)
+            .outerjoin(Building, Room.building_id == Building.id)
+        )
+
     async def get_multi_filtered(
         self,
         db: AsyncSession,
@@ -54,22 +140,37 @@ class CRUDInspection(CRUDBase[InspectionRecord, InspectionRecordCreate, Inspecti
         room_number: Optional[str] = None,
         item_status: Optional[ItemStatus] = None,
         sort_by: Optional[str] = "created_at",
-        sort_direction: Optional[str] = "desc"
+        sort_direction: Optional[str] = "desc",
+        cursor: Optional[str] = None,
+        include_total: bool = True,
+        summary: bool = False,
     ) -> Dict[str, Any]:
-        
-        query = select(InspectionRecord).options(
-            joinedload(InspectionRecord.student).joinedload(Student.bed).joinedload(Bed.room).joinedload(Room.building),
-            selectinload(InspectionRecord.room).selectinload(Room.building),
-            selectinload(InspectionRecord.details).selectinload(InspectionDetail.item),
-            selectinload(InspectionRecord.details).selectinload(InspectionDetail.photos)
-        )
+        """
+        Filtered page of records. With `summary` the records are plain dicts
+        shaped like `InspectionRecordSummary`, from a single projection query,
+        instead of fully loaded `InspectionRecord`s.
+        """
+        if summary:
+            # Student and Room are already joined for their columns
+            query = self._summary_query()
+            joined = {Student, Room}
+        else:
+            query = select(InspectionRecord).options(*self._full_record_options())
+            joined = set()
+
+        def join(target: Any) -> None:
+            nonlocal query
+            if target not in joined:
+                query = query.join(target)
+                joined.add(target)
 
         if student_id:
             query = query.filter(InspectionRecord.student_id == student_id)
         if room_id:
             query = query.filter(InspectionRecord.room_id == room_id)
         if building_id: # Added filter
-            query = query.join(Room).filter(Room.building_id == building_id)
+            join(Room)
+            query = query.filter(Room.building_id == building_id)
         if status:
             query = query.filter(InspectionRecord.status == status)
         if start_date:
@@ -80,27 +181,139 @@ class CRUDInspection(CRUDBase[InspectionRecord, InspectionRecordCreate, Inspecti
         # Handle both parameter names for student name search
         search_name = student_full_name or student_name
         if search_name:
-            query = query.join(Student).filter(Student.full_name.ilike(f"%{search_name}%"))
+            join(Student)
+            query = query.filter(Student.full_name.ilike(f"%{search_name}%"))
             
         if room_number:
-             query = query.join(Room).filter(Room.room_number.ilike(f"%{room_number}%"))
+            join(Room)
+            query = query.filter(Room.room_number.ilike(f"%{room_number}%"))
 
-        if item_status:
-            query = query.join(InspectionRecord.details).filter(InspectionDetail.status == item_status)
+        if item_status == ItemStatus.damaged:
+            query = query.filter(InspectionRecord.damaged_count > 0)
+        elif item_status == ItemStatus.missing:
+            query = query.filter(InspectionRecord.missing_count > 0)
+        elif item_status == ItemStatus.ok:
+            query = query.filter(
+                InspectionRecord.item_count > InspectionRecord.damaged_count + InspectionRecord.missing_count
+            )
 
-        count_query = select(func.count()).select_from(query.subquery())
-        total_result = await db.execute(count_query)
-        total = total_result.scalar_one()
+        total = await self.count(db, query) if include_total else None
 
-        if sort_by == "created_at":
-            order_by_column = InspectionRecord.created_at.desc() if sort_direction == "desc" else InspectionRecord.created_at.asc()
-            query = query.order_by(order_by_column)
+        # created_at is the only sort key; id breaks ties so pages never overlap
+        records, next_cursor = await self.paginate(
+            db,
+            query,
+            order_by=[InspectionRecord.created_at],
+            descending=sort_direction != "asc",
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            unique=not summary,
+            rows=summary,
+        )
+        if summary:
+            records = [row._asdict() for row in records]
 
-        records_query = query.offset(skip).limit(limit)
-        records_result = await db.execute(records_query)
-        records = list(records_result.scalars().unique().all())
+        return {"total": total, "records": records, "next_cursor": next_cursor}
 
-        return {"total": total, "records": records}
+    async def _insert_graph(
+        self,
+        db: AsyncSession,
+        entries: List[Tuple[InspectionCreate, str, Optional[str]]],
+        inspector_id: uuid.UUID,
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Inserts one record per (inspection_in, student_id, signature_filename)
+        entry with a multi-row INSERT each for the records, their details and
+        the photos, and returns the rows written. Ids and timestamps are set
+        here, so nothing waits on a flush or needs reading back. Does not commit.
+        """
+        records, details, photos = [], [], []
+        now = datetime.now()
+
+        for inspection_in, student_id, signature_filename in entries:
+            record_id = str(uuid.uuid4())
+            records.append({
+                "id": record_id,
+                "student_id": str(student_id),
+                "room_id": inspection_in.room_id,
+                "inspector_id": str(inspector_id),
+                "signature": signature_filename,
+                "status": InspectionStatus.submitted,
+                "created_at": now,
+                "submitted_at": now,
+                **self._detail_counts(inspection_in.details),
+            })
+
+            for detail_in in inspection_in.details:
+                detail_id = str(uuid.uuid4())
+                details.append({
+                    "id": detail_id,
+                    "record_id": record_id,
+                    "item_id": str(detail_in.item_id),
+                    "status": detail_in.status,
+                    "comment": detail_in.comment,
+                })
+                for photo_in in detail_in.photos or []:
+                    photos.append({
+                        "id": str(uuid.uuid4()),
+                        "detail_id": detail_id,
+                        "file_path": photo_in.file_path,
+                        "uploaded_at": now,
+                    })
+
+        await self.bulk_create(db, objs_in=records, commit=False)
+        await detail_crud.bulk_create(db, objs_in=details, commit=False)
+        await photo_crud.bulk_create(db, objs_in=photos, commit=False)
+        return records, details, photos
+
+    async def _build_graph(
+        self,
+        db: AsyncSession,
+        records: List[Dict[str, Any]],
+        details: List[Dict[str, Any]],
+        photos: List[Dict[str, Any]],
+    ) -> List[InspectionRecord]:
+        """
+        `InspectionRecord`s shaped like `get` returns them, built from the rows
+        `_insert_graph` wrote. Only the rows they point at (students, rooms,
+        items) are loaded, one query each. The objects are not part of the
+        session; relationships are set as loaded values so they trigger no
+        lazy loads or backrefs.
+        """
+        async def load(query: Select) -> Dict[str, Any]:
+            result = await db.execute(query)
+            return {str(obj.id): obj for obj in result.scalars().unique().all()}
+
+        students = await load(
+            select(Student)
+            .filter(Student.id.in_({row["student_id"] for row in records}))
+            .options(joinedload(Student.bed).joinedload(Bed.room).joinedload(Room.building))
+        )
+        rooms = await load(
+            select(Room).filter(Room.id.in_({row["room_id"] for row in records})).options(joinedload(Room.building))
+        )
+        items = await load(select(InspectionItem).filter(InspectionItem.id.in_({row["item_id"] for row in details})))
+
+        photos_by_detail: Dict[str, List[Photo]] = {}
+        for row in photos:
+            photos_by_detail.setdefault(row["detail_id"], []).append(Photo(**row))
+
+        details_by_record: Dict[str, List[InspectionDetail]] = {}
+        for row in details:
+            detail = InspectionDetail(**row)
+            set_committed_value(detail, "item", items.get(row["item_id"]))
+            set_committed_value(detail, "photos", photos_by_detail.get(row["id"], []))
+            details_by_record.setdefault(row["record_id"], []).append(detail)
+
+        built = []
+        for row in records:
+            record = InspectionRecord(**row)
+            set_committed_value(record, "student", students.get(row["student_id"]))
+            set_committed_value(record, "room", rooms.get(str(row["room_id"])))
+            set_committed_value(record, "details", details_by_record.get(row["id"], []))
+            built.append(record)
+        return built
 
     async def create_with_details(
         self,
@@ -110,86 +323,42 @@ class CRUDInspection(CRUDBase[InspectionRecord, InspectionRecordCreate, Inspecti
         inspector_id: uuid.UUID,
         signature_filename: Optional[str] = None
     ) -> InspectionRecord:
-        db_inspection_record = InspectionRecord(
-            student_id=str(student_id),
-            room_id=inspection_in.room_id,
-            inspector_id=str(inspector_id),
-            signature=signature_filename,
-            status=InspectionStatus.submitted,
-            submitted_at=datetime.now(),
-        )
-        db.add(db_inspection_record)
-        await db.flush()
-
-        for detail_in in inspection_in.details:
-            db_inspection_detail = InspectionDetail(
-                record_id=str(db_inspection_record.id),
-                item_id=str(detail_in.item_id),
-                status=detail_in.status,
-                comment=detail_in.comment
-            )
-            db.add(db_inspection_detail)
-            await db.flush()
-
-            if detail_in.photos:
-                for photo_in in detail_in.photos:
-                    db_inspection_image = Photo(
-                        detail_id=str(db_inspection_detail.id),
-                        file_path=photo_in.file_path
-                    )
-                    db.add(db_inspection_image)
-        
-        await db.commit()
-        
-        # Re-fetch
-        return await self.get(db, db_inspection_record.id)
+        records = await self.create_many(db, [(inspection_in, str(student_id), signature_filename)], inspector_id)
+        return records[0]
+
+    async def create_many(
+        self,
+        db: AsyncSession,
+        entries: List[Tuple[InspectionCreate, str, Optional[str]]],
+        inspector_id: uuid.UUID,
+    ) -> List[InspectionRecord]:
+        """
+        Creates one record per (inspection_in, student_id, signature_filename)
+        entry with three INSERTs in all, and returns the records with the
+        relationships of `get`, built in memory rather than read back.
+        """
+        graph = await self._insert_graph(db, entries, inspector_id)
+        await commit_or_flush(db)
+        return await self._build_graph(db, *graph)
 
     async def batch_create(
         self,
         db: AsyncSession,
         data: List[tuple[InspectionCreate, Optional[str]]],
         inspector_id: uuid.UUID
-    ) -> List[InspectionRecord]:
-        created_records = []
-        
-        for inspection_in, signature_filename in data:
-            if not inspection_in.student_id:
-                continue
-
-            db_inspection_record = InspectionRecord(
-                student_id=str(inspection_in.student_id),
-                room_id=inspection_in.room_id,
-                inspector_id=str(inspector_id),
-                signature=signature_filename,
-                status=InspectionStatus.submitted,
-                submitted_at=datetime.now(),
-            )
-            
-            db.add(db_inspection_record)
-            await db.flush()
-
-            for detail_in in inspection_in.details:
-                db_inspection_detail = InspectionDetail(
-                    record_id=str(db_inspection_record.id),
-                    item_id=str(detail_in.item_id),
-                    status=detail_in.status,
-                    comment=detail_in.comment
-                )
-                db.add(db_inspection_detail)
-                await db.flush()
-
-                if detail_in.photos:
-                    for photo_in in detail_in.photos:
-                        db_inspection_image = Photo(
-                            detail_id=str(db_inspection_detail.id),
-                            file_path=photo_in.file_path
-                        )
-                        db.add(db_inspection_image)
-            
-            created_records.append(db_inspection_record)
-
-        await db.commit()
-        return created_records
+    ) -> List[str]:
+        """
+        Creates one record per entry that names a student, like `create_many`,
+        and returns the record ids.
+        """
+        entries = [
+            (inspection_in, str(inspection_in.student_id), signature_filename)
+            for inspection_in, signature_filename in data
+            if inspection_in.student_id
+        ]
+        records, _, _ = await self._insert_graph(db, entries, inspector_id)
+        await commit_or_flush(db)
+        return [row["id"] for row in records]
 
     async def update(self, db: AsyncSession, *, db_obj: InspectionRecord, obj_in: Any) -> InspectionRecord:
         # Default update mostly works, but if details change, logic is complex.
@@ -198,7 +367,7 @@ class CRUDInspection(CRUDBase[InspectionRecord, InspectionRecordCreate, Inspecti
         for field, value in update_data.items():
             setattr(db_obj, field, value)
         db.add(db_obj)
-        await db.commit()
+        await commit_or_flush(db)
         await db.refresh(db_obj)
         return db_obj
 
@@ -212,11 +381,11 @@ class CRUDInspection(CRUDBase[InspectionRecord, InspectionRecordCreate, Inspecti
         return result.scalar_one()
 
     async def get_issues_count(self, db: AsyncSession) -> int:
+        # Damaged or missing details, from the per-record counts
         result = await db.execute(
-            select(func.count(InspectionDetail.id))
-            .filter(InspectionDetail.status.in_(['damaged', 'missing']))
+            select(func.coalesce(func.sum(InspectionRecord.damaged_count + InspectionRecord.missing_count), 0))
         )
-        return result.scalar_one()
+        return int(result.scalar_one())
 
     async def get_status_distribution(self, db: AsyncSession) -> dict:
         result = await db.execute(
@@ -257,9 +426,7 @@ class CRUDInspection(CRUDBase[InspectionRecord, InspectionRecordCreate, Inspecti
         )
 
         # Get total count
-        count_query = select(func.count()).select_from(base_query.subquery())
-        total_result = await db.execute(count_query)
-        total = total_result.scalar_one()
+        total = await self.count(db, base_query)
 
         # Get paginated records
         records_query = base_query.order_by(InspectionRecord.created_at.desc()).offset(skip).limit(limit)
@@ -3,6 +3,7 @@ from sqlalchemy import select, func, desc
 from typing import List, Optional
 import uuid
 
+from app.database import commit_or_flush
 from app.models import InspectionItem
 from app.schemas import InspectionItemCreate, InspectionItemUpdate
 from .base import CRUDBase
@@ -33,7 +34,7 @@ class CRUDItem(CRUDBase[InspectionItem, InspectionItemCreate, InspectionItemUpda
             db.add(item)
             updated_items.append(item)
         
-        await db.commit()
+        await commit_or_flush(db)
         # Refresh needed? Usually not for batch unless we need updated timestamps from DB
         return updated_items
 
@@ -5,7 +5,6 @@ from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import joinedload
-from sqlalchemy import func
 
 from app.models import LightsOutPatrol, LightsOutCheck, PatrolLocation, Building, User
 from app.schemas import LightsOutPatrolCreate, LightsOutCheckCreate
@@ -28,7 +27,9 @@ class CRUDLightsOutPatrol(CRUDBase[LightsOutPatrol, LightsOutPatrolCreate, Dict[
         self, db: AsyncSession, *, skip: int = 0, limit: int = 100, 
         building_id: Optional[int] = None,
         start_date: Optional[datetime] = None,
-        end_date: Optional[datetime] = None
+        end_date: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
     ) -> Dict[str, Any]:
         query = select(LightsOutPatrol).options(
             joinedload(LightsOutPatrol.building),
@@ -44,15 +45,20 @@ class CRUDLightsOutPatrol(CRUDBase[LightsOutPatrol, LightsOutPatrolCreate, Dict[
         if end_date:
             query = query.filter(LightsOutPatrol.patrol_time <= end_date)
             
-        count_query = select(func.count()).select_from(query.subquery())
-        total_result = await db.execute(count_query)
-        total = total_result.scalar_one()
+        total = await self.count(db, query) if include_total else None
 
-        records_query = query.order_by(LightsOutPatrol.patrol_time.desc()).offset(skip).limit(limit)
-        records_result = await db.execute(records_query)
-        records = list(records_result.scalars().unique().all())
+        records, next_cursor = await self.paginate(
+            db,
+            query,
+            order_by=[LightsOutPatrol.patrol_time],
+            descending=True,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            unique=True,
+        )
 
-        return {"total": total, "records": records}
+        return {"total": total, "records": records, "next_cursor": next_cursor}
     
     async def create_with_checks(self, db: AsyncSession, patrol_in: LightsOutPatrolCreate, patroller_id: uuid.UUID) -> LightsOutPatrol:
         async with db.begin_nested(): # Use begin_nested for transactions within an async session
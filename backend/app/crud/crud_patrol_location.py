@@ -5,6 +5,7 @@ from sqlalchemy.future import select
 from sqlalchemy.orm import joinedload
 from sqlalchemy import func
 
+from app.database import commit_or_flush
 from app.models import PatrolLocation, Building
 from app.schemas import PatrolLocationCreate, PatrolLocationUpdate
 from .base import CRUDBase
@@ -47,7 +48,7 @@ class CRUDPatrolLocation(CRUDBase[PatrolLocation, PatrolLocationCreate, PatrolLo
             household=obj_in.household
         )
         db.add(db_obj)
-        await db.commit()
+        await commit_or_flush(db)
         await db.refresh(db_obj)
         # Re-fetch to ensure relationships are loaded
         return await self.get(db, db_obj.id)
@@ -57,7 +58,7 @@ class CRUDPatrolLocation(CRUDBase[PatrolLocation, PatrolLocationCreate, PatrolLo
         for field in update_data:
             setattr(db_obj, field, update_data[field])
         db.add(db_obj)
-        await db.commit()
+        await commit_or_flush(db)
         await db.refresh(db_obj)
         # Re-fetch to ensure relationships are loaded
         return await self.get(db, db_obj.id)
@@ -5,8 +5,11 @@ from sqlalchemy.future import select
 from sqlalchemy.orm import joinedload
 from sqlalchemy import func
 
+from app.database import commit_or_flush
 from app.models import Role, Permission
 from app.schemas import RoleCreate, RoleUpdate
+from app.core.principal_cache import principal_cache
+from app.core.permissions import permission_registry
 from .base import CRUDBase
 
 class CRUDRole(CRUDBase[Role, RoleCreate, RoleUpdate]):
@@ -36,7 +39,7 @@ class CRUDRole(CRUDBase[Role, RoleCreate, RoleUpdate]):
             db_role.permissions = list(permissions_result.scalars().all())
         
         db.add(db_role)
-        await db.commit()
+        await commit_or_flush(db)
         await db.refresh(db_role)
         # Re-fetch to ensure relationships are loaded for Pydantic serialization
         return await self.get(db, db_role.id)
@@ -59,12 +62,22 @@ class CRUDRole(CRUDBase[Role, RoleCreate, RoleUpdate]):
         for field in update_data:
             setattr(db_obj, field, update_data[field])
             
+        # Cached principals and the compiled mask carry the old permission set
+        principal_cache.bump_version_on_commit(db)
         db.add(db_obj)
-        await db.commit()
+        await commit_or_flush(db)
+        permission_registry.invalidate_role(db_obj.id)
         await db.refresh(db_obj)
         # Re-fetch to ensure relationships are loaded for Pydantic serialization
         return await self.get(db, db_obj.id)
         
+    async def remove(self, db: AsyncSession, *, id: Any) -> Optional[Role]:
+        principal_cache.bump_version_on_commit(db)
+        obj = await super().remove(db, id=id)
+        if obj:
+            permission_registry.invalidate_role(obj.id)
+        return obj
+
     async def get_count(self, db: AsyncSession) -> int:
         result = await db.execute(select(func.count(Role.id)))
         return result.scalar_one()
@@ -5,6 +5,7 @@ from sqlalchemy import or_, func
 from sqlalchemy.orm import joinedload
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.database import commit_or_flush
 from app.models import Student, Bed, Room, Building
 from app.schemas import StudentCreate, StudentUpdate
 from .base import CRUDBase
@@ -45,6 +46,8 @@ class CRUDStudent(CRUDBase[Student, StudentCreate, StudentUpdate]):
         room_id: Optional[int] = None,
         building_id: Optional[int] = None,
         household: Optional[str] = None,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
     ) -> Dict[str, Any]:
         query = select(Student).options(
             joinedload(Student.bed).joinedload(Bed.room).joinedload(Room.building)
@@ -72,17 +75,15 @@ class CRUDStudent(CRUDBase[Student, StudentCreate, StudentUpdate]):
                 if household:
                     query = query.filter(Room.household == household)
 
-        # Get total count before applying offset and limit
-        count_query = select(func.count()).select_from(query.subquery())
-        total_result = await db.execute(count_query)
-        total = total_result.scalar_one()
+        # Total before offset and limit; callers that only page forward can skip it
+        total = await self.count(db, query) if include_total else None
 
         # Get paginated results
-        records_query = query.order_by(Student.student_id_number).offset(skip).limit(limit)
-        records_result = await db.execute(records_query)
-        records = list(records_result.scalars().all())
+        records, next_cursor = await self.paginate(
+            db, query, order_by=[Student.student_id_number], skip=skip, limit=limit, cursor=cursor
+        )
 
-        return {"total": total, "records": records}
+        return {"total": total, "records": records, "next_cursor": next_cursor}
 
     async def assign_bed(self, db: AsyncSession, db_student: Student, bed_id: Optional[int]) -> Student:
         # 1. If student had a previous bed, free it
@@ -106,7 +107,7 @@ class CRUDStudent(CRUDBase[Student, StudentCreate, StudentUpdate]):
                 db.add(new_bed)
             
         db.add(db_student)
-        await db.commit()
+        await commit_or_flush(db)
         await db.refresh(db_student)
         return db_student
     
@@ -123,7 +124,7 @@ class CRUDStudent(CRUDBase[Student, StudentCreate, StudentUpdate]):
                     db.add(bed)
             
             await db.delete(obj)
-            await db.commit()
+            await commit_or_flush(db)
         return obj
 
     async def get_count(self, db: AsyncSession) -> int:
@@ -142,9 +143,7 @@ class CRUDStudent(CRUDBase[Student, StudentCreate, StudentUpdate]):
         )
 
         # Get total count
-        count_query = select(func.count()).select_from(base_query.subquery())
-        total_result = await db.execute(count_query)
-        total = total_result.scalar_one()
+        total = await self.count(db, base_query)
 
         # Get paginated records
         records_query = base_query.offset(skip).limit(limit)
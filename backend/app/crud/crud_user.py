@@ -1,15 +1,17 @@
-from typing import List, Optional, Any, Union
+from typing import List, Optional, Any, Union, Set, Tuple
 import uuid
 from datetime import datetime, timedelta
 
 from sqlalchemy.future import select
 from sqlalchemy.orm import joinedload
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import func, select
+from sqlalchemy import select, delete
 
+from app.database import commit_or_flush
 from app.models import User, Role, TokenBlocklist, TokenType, Student, Bed, Room
 from app.schemas import UserCreate, UserUpdate
-from app.utils.security import get_password_hash
+from app.utils.security import get_password_hash_async
+from app.core.principal_cache import principal_cache
 from .base import CRUDBase
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
@@ -31,7 +33,15 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         result = await db.execute(select(User).filter(User.email == email))
         return result.scalars().first()
 
-    async def get_multi(self, db: AsyncSession, *, skip: int = 0, limit: int = 100, username: Optional[str] = None) -> List[User]:
+    async def get_page(
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        username: Optional[str] = None,
+    ) -> Tuple[List[User], Optional[str]]:
         query = select(User).options(
             joinedload(User.roles).joinedload(Role.permissions),
             joinedload(User.student).joinedload(Student.bed).joinedload(Bed.room).joinedload(Room.building)
@@ -39,22 +49,33 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         if username:
             query = query.filter(User.username.ilike(f"%{username}%"))
 
-        query = query.order_by(User.username).offset(skip).limit(limit)
-        result = await db.execute(query)
-        records = list(records_result := result.scalars().unique().all())
+        records, next_cursor = await self.paginate(
+            db, query, order_by=[User.username], skip=skip, limit=limit, cursor=cursor, unique=True
+        )
 
         # Attach flattened permissions
         for user in records:
             user.permissions = [perm.name for role in user.roles for perm in role.permissions]
         
+        return records, next_cursor
+
+    async def get_multi(
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        username: Optional[str] = None,
+    ) -> List[User]:
+        records, _ = await self.get_page(db, skip=skip, limit=limit, cursor=cursor, username=username)
         return records
 
     async def get_count(self, db: AsyncSession, username: Optional[str] = None) -> int:
-        query = select(func.count()).select_from(User)
+        query = select(User)
         if username:
             query = query.filter(User.username.ilike(f"%{username}%"))
-        result = await db.execute(query)
-        return result.scalar()
+        return await self.count(db, query)
 
     async def create(self, db: AsyncSession, *, obj_in: UserCreate, role_names: Optional[List[str]] = None) -> User:
         # This customized create handles password hashing and verification token generation
@@ -64,7 +85,7 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         # BUT, UserCreate has student_id_number.
         # Let's keep the logic here for backward compatibility.
         
-        hashed_password = get_password_hash(obj_in.password)
+        hashed_password = await get_password_hash_async(obj_in.password)
         
         # Check student logic
         db_student = None
@@ -121,7 +142,7 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         )
         db.add(token_entry)
         
-        await db.commit()
+        await commit_or_flush(db)
         await db.refresh(db_user)
         
         # Attach the token to the user object temporarily if needed for response?
@@ -136,6 +157,8 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
 
     async def update(self, db: AsyncSession, *, db_obj: User, obj_in: Union[UserUpdate, dict[str, Any]]) -> User:
         update_data = obj_in if isinstance(obj_in, dict) else obj_in.model_dump(exclude_unset=True)
+        # Roles, activation state or the username itself may change
+        principal_cache.invalidate_on_commit(db, db_obj.username)
         
         if "roles" in update_data:
             role_ids = update_data.pop("roles")
@@ -150,7 +173,7 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             setattr(db_obj, key, value)
         
         db.add(db_obj)
-        await db.commit()
+        await commit_or_flush(db)
         await db.refresh(db_obj)
         return db_obj
 
@@ -158,16 +181,18 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         user = await self.get_by_email(db, email=email)
         if not user:
             return None
-        user.hashed_password = get_password_hash(new_password)
-        db.add(user)
-        await db.commit()
-        await db.refresh(user)
-        return user
+        hashed_password = await get_password_hash_async(new_password)
+        return await self.store_password_hash(db, db_user=user, hashed_password=hashed_password)
 
     async def update_password(self, db: AsyncSession, db_user: User, new_password: str) -> User:
-        db_user.hashed_password = get_password_hash(new_password)
+        hashed_password = await get_password_hash_async(new_password)
+        return await self.store_password_hash(db, db_user=db_user, hashed_password=hashed_password)
+
+    async def store_password_hash(self, db: AsyncSession, db_user: User, hashed_password: str) -> User:
+        db_user.hashed_password = hashed_password
+        principal_cache.invalidate_on_commit(db, db_user.username)
         db.add(db_user)
-        await db.commit()
+        await commit_or_flush(db)
         await db.refresh(db_user)
         return db_user
 
@@ -190,16 +215,52 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             return None
         
         user.is_active = True
+        principal_cache.invalidate_on_commit(db, user.username)
         db.add(user)
         await db.delete(token_entry)
-        await db.commit()
+        await commit_or_flush(db)
         await db.refresh(user)
         return user
 
     async def add_token_to_blocklist(self, db: AsyncSession, jti: str, expires_at: datetime):
         blocklisted_token = TokenBlocklist(jti=jti, expires_at=expires_at)
         db.add(blocklisted_token)
-        await db.commit()
+        await commit_or_flush(db)
+
+    async def get_revoked_token_jtis(self, db: AsyncSession) -> Set[str]:
+        """
+        Returns the ids of revoked access/refresh tokens that have not expired yet.
+        """
+        result = await db.execute(
+            select(TokenBlocklist.jti).filter(
+                TokenBlocklist.token_type.in_([TokenType.access, TokenType.refresh]),
+                TokenBlocklist.expires_at > datetime.utcnow()
+            )
+        )
+        return set(result.scalars().all())
+
+    async def is_token_revoked(self, db: AsyncSession, jti: str) -> bool:
+        result = await db.execute(
+            select(TokenBlocklist.id).filter(TokenBlocklist.jti == jti).limit(1)
+        )
+        return result.scalar_one_or_none() is not None
+
+    async def purge_expired_tokens(self, db: AsyncSession, batch_size: int = 1000) -> int:
+        """
+        Deletes up to `batch_size` expired blocklist rows and returns how many were removed.
+        """
+        # Stored expiry times are UTC (JWT exp) or local time (verification tokens);
+        # comparing against UTC never removes a row early.
+        ids_result = await db.execute(
+            select(TokenBlocklist.id)
+            .filter(TokenBlocklist.expires_at < datetime.utcnow())
+            .limit(batch_size)
+        )
+        ids = list(ids_result.scalars().all())
+        if ids:
+            await db.execute(delete(TokenBlocklist).where(TokenBlocklist.id.in_(ids)))
+            await commit_or_flush(db)
+        return len(ids)
 
     def get_user_permissions(self, user: User) -> List[str]:
         """
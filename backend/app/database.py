@@ -1,23 +1,87 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import declarative_base
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from fastapi import Depends
+from sqlalchemy import Delete, Insert, Update, event
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, declarative_base
 
 from .config import settings
+from .core.db_pool import MonitoredQueuePool
 
-# Update the database URL for aiomysql
-ASYNC_SQLALCHEMY_DATABASE_URL = settings.SQLALCHEMY_DATABASE_URL.replace(
-    "mysql+mysqlconnector://", "mysql+aiomysql://"
-)
+def _async_url(url: str) -> str:
+    # Update the database URL for aiomysql
+    return url.replace("mysql+mysqlconnector://", "mysql+aiomysql://")
+
+ASYNC_SQLALCHEMY_DATABASE_URL = _async_url(settings.SQLALCHEMY_DATABASE_URL)
+
+def _pool_options() -> Dict[str, Any]:
+    return {
+        "poolclass": MonitoredQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
 
 async_engine = create_async_engine(
     ASYNC_SQLALCHEMY_DATABASE_URL,
     echo=settings.DEBUG, # Set to False in production
+    **_pool_options(),
 )
 
+# Optional replica for read-only sessions (see get_read_db)
+replica_engine: Optional[AsyncEngine] = None
+if settings.SQLALCHEMY_READ_REPLICA_URL:
+    replica_engine = create_async_engine(
+        _async_url(settings.SQLALCHEMY_READ_REPLICA_URL),
+        echo=settings.DEBUG,
+        **_pool_options(),
+    )
+
+# session.info keys used by RoutingSession
+READ_ONLY = "read_only"
+PINNED_TO_PRIMARY = "pinned_to_primary"
+READS_FROM_PRIMARY = "reads_from_primary"
+
+class RoutingSession(Session):
+    """
+    Sends the reads of a session marked read-only (see get_read_db) to the
+    replica, and everything else to the primary.
+
+    Once the session writes it is pinned to the primary for the rest of its
+    life, so a request always reads its own writes, committed or not. Reads
+    inside `reading_from_primary` go to the primary as well.
+    """
+
+    def get_bind(self, mapper: Any = None, clause: Any = None, **kw: Any) -> Any:
+        if (
+            replica_engine is not None
+            and self.info.get(READ_ONLY)
+            and not self.info.get(PINNED_TO_PRIMARY)
+            and not self.info.get(READS_FROM_PRIMARY)
+            and not self._flushing
+            and not isinstance(clause, (Insert, Update, Delete))
+        ):
+            return replica_engine.sync_engine
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+@event.listens_for(RoutingSession, "after_flush")
+def _pin_after_flush(session: Session, flush_context: Any) -> None:
+    session.info[PINNED_TO_PRIMARY] = True
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _pin_after_dml(orm_execute_state: Any) -> None:
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info[PINNED_TO_PRIMARY] = True
+
 AsyncSessionLocal = async_sessionmaker(
     autocommit=False,
     autoflush=False,
     bind=async_engine,
     class_=AsyncSession,
+    sync_session_class=RoutingSession,
     expire_on_commit=False,
 )
 
@@ -26,3 +90,83 @@ Base = declarative_base()
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
+
+async def warm_up_pools(connections: int) -> None:
+    """
+    Opens up to `connections` connections per engine (capped at the pool
+    size) and returns them to the pool, so the first requests after a start
+    do not pay for the connection handshakes.
+    """
+    engines = [async_engine] + ([replica_engine] if replica_engine is not None else [])
+    for engine in engines:
+        opened: List[Any] = []
+        try:
+            for _ in range(min(connections, settings.DB_POOL_SIZE)):
+                opened.append(await engine.connect())
+        finally:
+            for connection in opened:
+                await connection.close()
+
+def pool_stats() -> Dict[str, Any]:
+    stats = {"primary": async_engine.sync_engine.pool.stats()}
+    if replica_engine is not None:
+        stats["replica"] = replica_engine.sync_engine.pool.stats()
+    return stats
+
+async def get_read_db(db: AsyncSession = Depends(get_db)) -> AsyncIterator[AsyncSession]:
+    """
+    The request's session, for read-only endpoints (lists, search,
+    dashboard, reports, export). Its reads go to the replica when
+    SQLALCHEMY_READ_REPLICA_URL is set, until it writes; without a replica
+    it is just `get_db`.
+
+    Replication lag still applies across requests: a list fetched right
+    after another request's write may not include it yet.
+    """
+    db.info[READ_ONLY] = True
+    yield db
+
+@contextmanager
+def reading_from_primary(db: AsyncSession) -> Iterator[AsyncSession]:
+    """
+    Sends the reads of `db` made inside the block to the primary, even if
+    it is marked read-only. For data a lagging replica must not answer,
+    e.g. the authenticated user and the token blocklist.
+    """
+    previous = db.info.get(READS_FROM_PRIMARY)
+    db.info[READS_FROM_PRIMARY] = True
+    try:
+        yield db
+    finally:
+        db.info[READS_FROM_PRIMARY] = previous
+
+# session.info flag: CRUD methods flush instead of committing
+UNIT_OF_WORK = "unit_of_work"
+
+async def commit_or_flush(db: AsyncSession) -> None:
+    """
+    Commits, or only flushes when the session belongs to a unit of work,
+    which commits once at the end of the request.
+    """
+    if db.info.get(UNIT_OF_WORK):
+        await db.flush()
+    else:
+        await db.commit()
+
+async def unit_of_work(db: AsyncSession = Depends(get_db)) -> AsyncIterator[AsyncSession]:
+    """
+    Opt-in request transaction. Declare it on a route with
+    `Depends(unit_of_work, scope="function")`: the request's session then
+    commits once after the endpoint returns (before the response is sent)
+    and rolls back if it raises.
+    """
+    db.info[UNIT_OF_WORK] = True
+    try:
+        yield db
+        if db.in_transaction():
+            await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    finally:
+        db.info.pop(UNIT_OF_WORK, None)
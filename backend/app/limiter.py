@@ -1,8 +1,94 @@
 import os
+from collections import defaultdict
+from typing import Any, Dict
+
+from limits.storage import MemoryStorage
 from slowapi import Limiter
 from slowapi.util import get_remote_address
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+from .core.rate_limit_storage import SQLiteStorage  # also registers the sqlite:// storage scheme
 
 # Disable rate limiting during tests
 is_testing = os.getenv("TESTING") == "True"
 
-limiter = Limiter(key_func=get_remote_address, enabled=not is_testing)
+
+class MeteredLimiter(Limiter):
+    """
+    slowapi `Limiter` that counts checked and rejected requests per route.
+
+    The counts are taken by `RateLimitStatsMiddleware` from what slowapi
+    leaves on the request (`request.state.view_rate_limit`, set for every
+    request a limit was checked for) and the 429 status, so nothing here
+    depends on slowapi internals.
+
+    Counters are per worker; the limits themselves live in the configured
+    storage, which is shared between workers unless it is `memory://`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.hits: Dict[str, int] = defaultdict(int)
+        self.rejections: Dict[str, int] = defaultdict(int)
+
+    def record(self, route: str, rejected: bool) -> None:
+        self.hits[route] += 1
+        if rejected:
+            self.rejections[route] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        storage = self.limiter.storage
+        configured = settings.RATE_LIMIT_STORAGE_URI.split("://", 1)[0]
+        return {
+            "enabled": self.enabled,
+            "storage": configured,
+            "strategy": settings.RATE_LIMIT_STRATEGY,
+            # Per-worker counters in use because the shared storage failed
+            "storage_dead": configured != "memory" and isinstance(storage, MemoryStorage),
+            "storage_busy_failures": storage.busy_failures if isinstance(storage, SQLiteStorage) else 0,
+            "routes": {
+                route: {"hits": hits, "rejections": self.rejections.get(route, 0)}
+                for route, hits in self.hits.items()
+            },
+        }
+
+
+class RateLimitStatsMiddleware:
+    """
+    Feeds `limiter.record` with every request a rate limit was checked for,
+    keyed by method and route template like the DB statistics.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 0
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            if scope.get("state", {}).get("view_rate_limit") is not None:
+                path = getattr(scope.get("route"), "path", None) or "<unmatched>"
+                limiter.record(f"{scope['method']} {path}", rejected=status_code == 429)
+
+
+limiter = MeteredLimiter(
+    key_func=get_remote_address,
+    enabled=not is_testing,
+    storage_uri=settings.RATE_LIMIT_STORAGE_URI,
+    strategy=settings.RATE_LIMIT_STRATEGY,
+    # Keep limiting with per-worker counters if a shared backend goes away
+    in_memory_fallback_enabled=settings.RATE_LIMIT_STORAGE_URI != "memory://",
+)
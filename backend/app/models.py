@@ -11,6 +11,7 @@ from sqlalchemy import (
     Text,
     Table,
     UniqueConstraint,
+    Index,
     CHAR, # Use CHAR for UUIDs
 )
 from sqlalchemy.dialects.mysql import JSON
@@ -157,6 +158,12 @@ class InspectionRecord(Base):
     # Field to store the signature as a Base64 encoded string
     signature = Column(Text)
 
+    # Copies of the details' statuses, kept in sync by crud_inspection
+    # (see CRUDInspection.recount_details) so lists and the dashboard need not scan details
+    item_count = Column(Integer, nullable=False, default=0, server_default="0")
+    damaged_count = Column(Integer, nullable=False, default=0, server_default="0")
+    missing_count = Column(Integer, nullable=False, default=0, server_default="0")
+
     student = relationship("Student", back_populates="inspections")
     room = relationship("Room", back_populates="inspections")
     inspector = relationship("User", foreign_keys=[inspector_id])
@@ -273,6 +280,14 @@ class AuditLog(Base):
 
     user = relationship("User")
 
+    # Newest-first browsing and keyset pagination on (created_at, id), optionally filtered
+    __table_args__ = (
+        Index('ix_audit_logs_created_at_id', 'created_at', 'id'),
+        Index('ix_audit_logs_user_id_created_at', 'user_id', 'created_at', 'id'),
+        Index('ix_audit_logs_resource_type_created_at', 'resource_type', 'created_at', 'id'),
+        Index('ix_audit_logs_action_created_at', 'action', 'created_at', 'id'),
+    )
+
 
 # --- Announcement Models ---
 
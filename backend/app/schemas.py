@@ -1,9 +1,10 @@
 import uuid
-from pydantic import BaseModel, ConfigDict, EmailStr, field_validator
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator, model_validator
 from typing import List, Optional, Any
 from datetime import datetime
 
 from .models import InspectionStatus, ItemStatus, LightStatus, TagType
+from .utils.audit_payload import decode_details
 
 # --- Permission Schemas ---
 class PermissionBase(BaseModel):
@@ -24,6 +25,7 @@ class Permission(PermissionBase):
 class PaginatedPermissions(BaseModel):
     total: int
     records: List[Permission]
+    next_cursor: Optional[str] = None
 
 # --- Role Schemas ---
 class RoleBase(BaseModel):
@@ -155,8 +157,9 @@ class Student(StudentBase):
     model_config = ConfigDict(from_attributes=True)
 
 class PaginatedStudents(BaseModel):
-    total: int
+    total: Optional[int]
     records: List[Student]
+    next_cursor: Optional[str] = None
 
 # --- User Schemas ---
 class UserBase(BaseModel):
@@ -203,8 +206,9 @@ class UserResponse(UserBase):
     model_config = ConfigDict(from_attributes=True)
 
 class PaginatedUsers(BaseModel):
-    total: int
+    total: Optional[int]
     records: List[User]
+    next_cursor: Optional[str] = None
 
 # --- Token Schemas ---
 class Token(BaseModel):
@@ -248,16 +252,35 @@ class PhotoBase(BaseModel):
     pass
 
 class PhotoCreate(PhotoBase):
-    file_content: str # Base64 encoded image content
-    file_name: str # Original file name with extension
+    # Either an upload from POST /uploads/, or (legacy) the image inline as Base64
+    upload_id: Optional[uuid.UUID] = None
+    file_content: Optional[str] = None # Base64 encoded image content
+    file_name: Optional[str] = None # Original file name with extension
     file_path: Optional[str] = None # To be populated by the service
 
+    @model_validator(mode='after')
+    def check_source(self):
+        if self.upload_id is None and not self.file_content:
+            raise ValueError("Either upload_id or file_content is required")
+        return self
+
 class Photo(PhotoBase):
     id: uuid.UUID
     file_path: str # Path to the stored image (generated on backend)
     uploaded_at: datetime
     model_config = ConfigDict(from_attributes=True)
 
+# --- Upload Schemas ---
+class UploadCreate(BaseModel):
+    size: int = Field(gt=0) # Total bytes of the file
+
+class UploadStatus(BaseModel):
+    upload_id: uuid.UUID
+    size: int
+    offset: int # Bytes received so far; the next chunk starts here
+    complete: bool
+    chunk_size: int # Suggested bytes per chunk
+
 # --- Inspection Detail Schemas ---
 class InspectionDetailBase(BaseModel):
     item_id: uuid.UUID
@@ -291,17 +314,42 @@ class InspectionRecord(InspectionRecordBase):
     room: Room
     details: List[InspectionDetail] = []
     signature: Optional[str] = None
+    item_count: int = 0
+    damaged_count: int = 0
+    missing_count: int = 0
     model_config = ConfigDict(from_attributes=True)
 
 class PaginatedInspectionRecords(BaseModel):
-    total: int
+    total: Optional[int]
     records: List[InspectionRecord]
+    next_cursor: Optional[str] = None
+
+# List row of an inspection record (view=summary); details stay on GET /inspections/{id}
+class InspectionRecordSummary(BaseModel):
+    id: uuid.UUID
+    student_id: uuid.UUID
+    student_name: str
+    room_id: int
+    room_number: str
+    building_name: Optional[str] = None
+    status: InspectionStatus
+    created_at: datetime
+    submitted_at: Optional[datetime] = None
+    item_count: int
+    damaged_count: int
+    missing_count: int
+
+class PaginatedInspectionSummaries(BaseModel):
+    total: Optional[int]
+    records: List[InspectionRecordSummary]
+    next_cursor: Optional[str] = None
 
 class InspectionCreate(BaseModel):
     room_id: Optional[int] = None
     student_id: Optional[uuid.UUID] = None
     details: List[InspectionDetailCreate]
-    signature_base64: Optional[str] = None
+    signature_upload_id: Optional[uuid.UUID] = None # From POST /uploads/
+    signature_base64: Optional[str] = None # Legacy, inline signature image
 
 class BatchInspectionCreate(BaseModel):
     inspections: List[InspectionCreate]
@@ -379,8 +427,9 @@ class LightsOutPatrol(LightsOutPatrolBase):
     model_config = ConfigDict(from_attributes=True)
 
 class PaginatedLightsOutPatrols(BaseModel):
-    total: int
+    total: Optional[int]
     records: List[LightsOutPatrol]
+    next_cursor: Optional[str] = None
 
 # --- Dashboard Schemas ---
 class DamageRankingItem(BaseModel):
@@ -478,9 +527,16 @@ class AuditLog(AuditLogBase):
 
     model_config = ConfigDict(from_attributes=True)
 
+    @field_validator('details', mode='before')
+    @classmethod
+    def decompress_details(cls, v):
+        return decode_details(v)
+
 class PaginatedAuditLogs(BaseModel):
     total: int
     records: List[AuditLog]
+    next_cursor: Optional[str] = None
+    total_is_estimate: bool = False
 
 
 # --- System Settings Schemas ---
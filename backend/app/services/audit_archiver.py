@@ -0,0 +1,118 @@
+# backend/app/services/audit_archiver.py
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from ..config import settings
+from ..core.audit_segments import COLUMNS, AuditSegmentStore, as_naive, audit_segments
+from ..crud import crud_audit
+from ..database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+class AuditArchiver:
+    """
+    Moves audit logs older than `AUDIT_ARCHIVE_AFTER_DAYS` from the
+    `audit_logs` table into the monthly segments of `audit_segments`.
+
+    Rows are copied in batches and deleted only after their segment write
+    has been fsynced. Until then their ids are pending in the archive index:
+    readers take those rows from the archive only, and if a run dies between
+    the two steps, the next one starts by deleting them from the table.
+    """
+
+    def __init__(self, store: AuditSegmentStore, after_days: int, batch_size: int, interval_seconds: int):
+        self.store = store
+        self.after_days = after_days
+        self.batch_size = batch_size
+        self.interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+        self.last_run_at: Optional[float] = None
+        self.last_run_rows = 0
+        self.archived_rows = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.after_days > 0
+
+    async def run_once(self, after_days: Optional[int] = None) -> int:
+        """
+        Archives every row older than the retention window. Returns the
+        number of rows moved, or 0 if another worker is already archiving.
+        """
+        days = self.after_days if after_days is None else after_days
+        cutoff = datetime.now() - timedelta(days=days)
+        total = 0
+        with self.store.lock() as acquired:
+            if not acquired:
+                logger.info("Audit archive run skipped: another worker holds the lock.")
+                return 0
+            self.store.mark_archived_before(cutoff)
+            async with AsyncSessionLocal() as db:
+                # Finish a batch an earlier run archived but did not get to delete
+                pending = self.store.pending_ids(self.store.index)
+                if pending:
+                    await crud_audit.remove_many(db, ids=pending)
+                    await asyncio.to_thread(self.store.clear_pending)
+                while True:
+                    logs = await crud_audit.get_older_than(db, before=cutoff, limit=self.batch_size)
+                    if not logs:
+                        break
+                    rows = [{column: getattr(log, column) for column in COLUMNS} for log in logs]
+                    for row in rows:
+                        row["created_at"] = as_naive(row["created_at"])
+                    # Blocking file I/O; keep it off the event loop
+                    await asyncio.to_thread(self.store.append, rows)
+                    total += await crud_audit.remove_many(db, ids=[row["id"] for row in rows])
+                    await asyncio.to_thread(self.store.clear_pending)
+                    db.expunge_all()
+                    if len(logs) < self.batch_size:
+                        break
+        self.last_run_at = time.time()
+        self.last_run_rows = total
+        self.archived_rows += total
+        if total:
+            logger.info(f"Archived {total} audit log rows older than {cutoff:%Y-%m-%d}.")
+        return total
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Audit archive run failed: {e}")
+
+    def start(self) -> None:
+        if self._task is None and self.enabled and self.interval_seconds > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "after_days": self.after_days,
+            "last_run_at": self.last_run_at,
+            "last_run_rows": self.last_run_rows,
+            "archived_rows": self.archived_rows,
+            **self.store.stats(),
+        }
+
+audit_archiver = AuditArchiver(
+    audit_segments,
+    after_days=settings.AUDIT_ARCHIVE_AFTER_DAYS,
+    batch_size=settings.AUDIT_ARCHIVE_BATCH_SIZE,
+    interval_seconds=settings.AUDIT_ARCHIVE_INTERVAL_SECONDS,
+)
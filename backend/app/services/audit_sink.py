@@ -0,0 +1,220 @@
+# backend/app/services/audit_sink.py
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..crud import crud_audit
+from ..database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+# session.info key holding the rows to emit once the session commits
+_PENDING_ROWS = "audit_sink_rows"
+
+class AuditSink:
+    """
+    Write-behind pipeline for audit logs.
+
+    `emit` builds the row (id and timestamp included) and puts it on a
+    bounded queue; a background task drains the queue and writes rows with
+    one multi-row INSERT per batch, either every `flush_interval_ms` or as
+    soon as `batch_size` rows are waiting. When the queue is full `emit`
+    waits for space, which slows producers down instead of growing memory.
+
+    Until `start()` is called (scripts, tests without lifespan) `emit` writes
+    the row directly in its own session.
+
+    `emit_on_commit` is for changes made in a unit of work: the row is only
+    emitted once that session commits, and dropped if it rolls back.
+    """
+
+    MAX_ATTEMPTS = 3
+
+    def __init__(self, max_queue: int, batch_size: int, flush_interval_ms: int):
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_queue = max_queue
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.peak_queued = 0
+        self.producer_waits = 0
+        # emit_on_commit rows on their way into the queue
+        self._emitting: Set[asyncio.Task] = set()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def emit(
+        self,
+        *,
+        action: str,
+        resource_type: str,
+        resource_id: Optional[str] = None,
+        details: Optional[Dict[str, Any]] = None,
+        user_id: Optional[Any] = None,
+        ip_address: Optional[str] = None,
+    ) -> None:
+        await self._put(self._row(action, resource_type, resource_id, details, user_id, ip_address))
+
+    def emit_on_commit(
+        self,
+        db: AsyncSession,
+        *,
+        action: str,
+        resource_type: str,
+        resource_id: Optional[str] = None,
+        details: Optional[Dict[str, Any]] = None,
+        user_id: Optional[Any] = None,
+        ip_address: Optional[str] = None,
+    ) -> None:
+        """
+        Like `emit`, once `db` commits; nothing is written if it rolls back.
+        """
+        row = self._row(action, resource_type, resource_id, details, user_id, ip_address)
+        db.info.setdefault(_PENDING_ROWS, []).append(row)
+
+    def _after_commit(self, rows: List[Dict[str, Any]]) -> None:
+        # Called from a synchronous session event, on the event loop thread
+        for row in rows:
+            task = asyncio.get_running_loop().create_task(self._put(row))
+            self._emitting.add(task)
+            task.add_done_callback(self._emitting.discard)
+
+    @staticmethod
+    def _row(
+        action: str,
+        resource_type: str,
+        resource_id: Optional[str],
+        details: Optional[Dict[str, Any]],
+        user_id: Optional[Any],
+        ip_address: Optional[str],
+    ) -> Dict[str, Any]:
+        return {
+            "id": str(uuid.uuid4()),
+            "action": action,
+            "resource_type": resource_type,
+            "resource_id": resource_id,
+            "user_id": str(user_id) if user_id is not None else None,
+            "details": details,
+            "ip_address": ip_address,
+            "created_at": datetime.now(),
+        }
+
+    async def _put(self, row: Dict[str, Any]) -> None:
+        if not self.running:
+            async with AsyncSessionLocal() as db:
+                self.written += await crud_audit.create_many(db, rows=[row])
+            return
+
+        if self._queue.full():
+            self.producer_waits += 1
+        await self._queue.put(row)
+        self.enqueued += 1
+        self.peak_queued = max(self.peak_queued, self._queue.qsize())
+
+    async def _write(self, rows: List[Dict[str, Any]]) -> None:
+        for attempt in range(1, self.MAX_ATTEMPTS + 1):
+            try:
+                async with AsyncSessionLocal() as db:
+                    self.written += await crud_audit.create_many(db, rows=rows)
+                self.batches += 1
+                return
+            except Exception as e:
+                if attempt == self.MAX_ATTEMPTS:
+                    self.dropped += len(rows)
+                    logger.error(f"Dropping {len(rows)} audit log rows after {attempt} failed writes: {e}")
+                    return
+                logger.warning(f"Audit log batch write failed (attempt {attempt}): {e}")
+                await asyncio.sleep(0.1 * attempt)
+
+    async def _next(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        if timeout is None:
+            return await self._queue.get()
+        return await asyncio.wait_for(self._queue.get(), timeout)
+
+    async def _run(self) -> None:
+        # A None item is the shutdown marker queued by stop(), behind every real row
+        stopping = False
+        while not stopping:
+            row = await self._next()
+            if row is None:
+                break
+            rows = [row]
+            deadline = time.monotonic() + self.flush_interval
+            while len(rows) < self.batch_size:
+                if self._queue.empty():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        row = await self._next(remaining)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    row = self._queue.get_nowait()
+                if row is None:
+                    stopping = True
+                    break
+                rows.append(row)
+            await self._write(rows)
+
+    def start(self) -> None:
+        if self._task is None:
+            # Created here so the queue belongs to the running event loop
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Writes everything still queued, then stops the background task.
+        """
+        if self._emitting:
+            await asyncio.gather(*self._emitting, return_exceptions=True)
+        if self._task is not None:
+            await self._queue.put(None)
+            await self._task
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "peak_queued": self.peak_queued,
+            "max_queue": self.max_queue,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "producer_waits": self.producer_waits,
+        }
+
+audit_sink = AuditSink(
+    max_queue=settings.AUDIT_QUEUE_MAX_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval_ms=settings.AUDIT_FLUSH_INTERVAL_MS,
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    rows = session.info.pop(_PENDING_ROWS, None)
+    if rows:
+        audit_sink._after_commit(rows)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_ROWS, None)
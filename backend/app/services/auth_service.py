@@ -1,7 +1,7 @@
 # backend/app/services/auth_service.py
 from datetime import datetime, timedelta
 from typing import Optional, List
-from uuid import UUID
+from uuid import UUID, uuid4
 import logging
 
 from fastapi import HTTPException, status, Depends
@@ -11,9 +11,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from .. import schemas, models
 from ..crud import crud_user
-from ..utils.security import verify_password, get_password_hash
+from ..utils.security import password_hashing_pool, verify_and_update_password_async
 from ..config import settings
-from ..database import get_db
+from ..database import get_db, reading_from_primary
+from ..core.principal_cache import principal_cache
+from .token_blocklist import token_blocklist
 # from .notification_service import notification_service # 避免循環引用，在需要時再引入
 
 logger = logging.getLogger(__name__)
@@ -28,9 +30,17 @@ class AuthService:
         """
         驗證使用者憑證。
         """
-        user = await crud_user.get_by_username(self.db, username=username)
-        if not user or not verify_password(password, user.hashed_password):
-            return None
+        # Hashing runs on a bounded pool; the slot caps concurrent logins per worker
+        async with password_hashing_pool.login_slot():
+            user = await crud_user.get_by_username(self.db, username=username)
+            if not user:
+                return None
+            verified, new_hash = await verify_and_update_password_async(password, user.hashed_password)
+            if not verified:
+                return None
+            if new_hash:
+                # Hash parameters changed since this password was stored
+                await crud_user.store_password_hash(self.db, db_user=user, hashed_password=new_hash)
         if not user.is_active:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
         return user
@@ -44,7 +54,10 @@ class AuthService:
             expire = datetime.utcnow() + expires_delta
         else:
             expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-        to_encode.update({"exp": expire})
+        # iat tells the blocklist index whether the token predates its last load
+        to_encode.update({"exp": expire, "iat": datetime.utcnow()})
+        # A unique id lets logout revoke this exact token
+        to_encode.setdefault("jti", str(uuid4()))
         encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
         return encoded_jwt
 
@@ -115,28 +128,52 @@ class AuthService:
 
         return created_user
 
-    async def get_current_user(self, token: str) -> models.User:
-        """
-        從 JWT Token 中獲取當前使用者。
-        """
-        credentials_exception = HTTPException(
+    def _credentials_exception(self) -> HTTPException:
+        return HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+    async def decode_token(self, token: str) -> dict:
+        """
+        解碼並驗證 JWT Token，回傳 claims。每個請求只應呼叫一次。
+        """
         try:
             payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-            username: str = payload.get("sub")
-            if username is None:
-                raise credentials_exception
-            token_data = schemas.TokenData(username=username)
         except JWTError:
-            raise credentials_exception
-        user = await crud_user.get_by_username(self.db, username=token_data.username)
+            raise self._credentials_exception()
+        if payload.get("sub") is None:
+            raise self._credentials_exception()
+        # A replica may not have the revocation yet
+        with reading_from_primary(self.db):
+            revoked = await token_blocklist.is_revoked(self.db, payload)
+        if revoked:
+            raise self._credentials_exception()
+        return payload
+
+    async def get_user_from_claims(self, claims: dict) -> models.User:
+        """
+        依據已解碼的 claims 取得使用者。
+        """
+        token_data = schemas.TokenData(username=claims.get("sub"))
+        user = await principal_cache.get(self.db, token_data.username)
         if user is None:
-            raise credentials_exception
+            # Loaded from the primary: a lagging replica could return roles or an
+            # active flag from before a change, to be cached for the whole TTL
+            with reading_from_primary(self.db):
+                user = await crud_user.get_by_username(self.db, username=token_data.username)
+            if user is None:
+                raise self._credentials_exception()
+            principal_cache.put(user)
         return user
 
+    async def get_current_user(self, token: str) -> models.User:
+        """
+        從 JWT Token 中獲取當前使用者。
+        """
+        return await self.get_user_from_claims(await self.decode_token(token))
+
     async def get_current_active_user(self, token: str) -> models.User:
         """
         獲取當前活躍使用者。
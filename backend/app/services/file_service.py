@@ -3,19 +3,57 @@ import os
 import magic
 import base64
 import uuid
-from typing import Optional, Tuple
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Tuple
 from pathlib import Path
 import asyncio
 
 from fastapi import UploadFile, HTTPException, status
 
 from ..config import settings
+from ..core.content_store import ContentStore
+from ..utils.image_variants import VARIANTS, normalize_image, render_variant, variant_filename
+
+logger = logging.getLogger(__name__)
 
 class FileService:
-    def __init__(self, upload_dir: str = settings.UPLOAD_DIR):
+    """
+    Stores uploaded images and their resized WebP derivatives (see
+    `VARIANTS`), which are written next to the original.
+
+    Stored photos are normalized first (upright, scaled down, EXIF
+    stripped, re-encoded; see `normalize_image`). That and the derivatives
+    run with Pillow on a small process pool; derivatives are kicked off
+    once an image is stored and otherwise on the first request for them.
+    Concurrent requests for the same derivative share one render.
+
+    Stored files and derivatives end up in a `ContentStore`, so identical
+    bytes (a retried submission, one signature reused across a batch)
+    are kept once on disk under several names.
+    """
+
+    def __init__(self, upload_dir: str = settings.UPLOAD_DIR, image_workers: int = settings.IMAGE_PROCESS_WORKERS):
         self.upload_dir = Path(upload_dir)
         self.upload_dir.mkdir(parents=True, exist_ok=True)
         self.magic = magic.Magic(mime=True)
+        self.content_store = ContentStore(self.upload_dir)
+        self.image_workers = image_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._renders: Dict[str, "asyncio.Future[Optional[Path]]"] = {}
+        self.rendered = 0
+        self.rendered_on_demand = 0
+        self.render_failures = 0
+        self.peak_pending = 0
+        self.total_render_seconds = 0.0
+        self.normalized = 0
+        self.normalize_failures = 0
+        self.total_normalize_seconds = 0.0
+        self.ingest_original_bytes = 0
+        self.ingest_stored_bytes = 0
 
     def _write_file(self, file_path: Path, contents: bytes):
         with open(file_path, "wb") as f:
@@ -57,12 +95,15 @@ class FileService:
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not save image file."
             )
         
+        await self.ingest(unique_filename)
+        self.schedule_derivatives(unique_filename)
         return unique_filename
 
-    async def decode_and_upload_base64_image(self, base64_string: str) -> str:
+    async def decode_and_upload_base64_image(self, base64_string: str, reduce_colors: bool = False) -> str:
         """
         Decodes a Base64 string, verifies it's a valid image, and saves it to disk.
-        Returns the saved filename (UUID).
+        Returns the saved filename (UUID). `reduce_colors` is for signatures,
+        see `normalize_image`.
         """
         try:
             if ',' in base64_string:
@@ -93,8 +134,151 @@ class FileService:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not save image from Base64 data."
             )
-            
+
+        await self.ingest(unique_filename, reduce_colors=reduce_colors)
+        self.schedule_derivatives(unique_filename)
         return unique_filename
 
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Spawned, not forked: the workers only need Pillow, not a copy of the app
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.image_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def _run_in_pool(self, fn: Callable[..., Any], *args: Any) -> Any:
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start a fresh pool next time
+            self.shutdown()
+            raise
+
+    async def ingest(self, filename: str, reduce_colors: bool = False) -> None:
+        """
+        Normalizes a just stored image and moves its bytes into the content store.
+        """
+        await self.normalize_image(filename, reduce_colors=reduce_colors)
+        await self._store_content(self.upload_dir / filename)
+
+    async def reduce_signature_colors(self, filename: str) -> None:
+        """
+        Gives a signature that arrived as an ordinary upload (already
+        ingested without `reduce_colors`) the same palette reduction as a
+        Base64 one. Only PNGs; a JPEG would just lose quality again.
+        """
+        if Path(filename).suffix.lower() == ".png":
+            await self.ingest(filename, reduce_colors=True)
+
+    async def _store_content(self, path: Path) -> None:
+        if settings.UPLOAD_DEDUPLICATE:
+            freed = await asyncio.to_thread(self.content_store.adopt, path)
+            if freed:
+                logger.debug(f"{path.name} is a duplicate, {freed} bytes not stored again")
+
+    async def normalize_image(self, filename: str, reduce_colors: bool = False) -> None:
+        """
+        Normalizes a just stored image in place, per the IMAGE_INGEST_*
+        settings. An image Pillow cannot handle is kept as it is.
+        """
+        if not settings.IMAGE_INGEST_NORMALIZE:
+            return
+        started_at = time.perf_counter()
+        try:
+            original_size, stored_size = await self._run_in_pool(
+                normalize_image, str(self.upload_dir / filename), settings.IMAGE_INGEST_MAX_EDGE or None,
+                settings.IMAGE_INGEST_JPEG_QUALITY, settings.IMAGE_INGEST_PNG_COLORS, reduce_colors,
+            )
+        except Exception as e:
+            self.normalize_failures += 1
+            logger.warning(f"Could not normalize {filename}, stored as uploaded: {e!r}")
+            return
+        self.normalized += 1
+        self.total_normalize_seconds += time.perf_counter() - started_at
+        self.ingest_original_bytes += original_size
+        self.ingest_stored_bytes += stored_size
+        logger.debug(f"Normalized {filename}: {original_size} -> {stored_size} bytes")
+
+    async def _render(self, filename: str, variant: str) -> Optional[Path]:
+        source = self.upload_dir / filename
+        target = self.upload_dir / variant_filename(filename, variant)
+        options = VARIANTS[variant]
+        started_at = time.perf_counter()
+        try:
+            await self._run_in_pool(render_variant, str(source), str(target), options.max_edge, options.quality)
+        except Exception as e:
+            self.render_failures += 1
+            logger.warning(f"Could not render {variant} of {filename}: {e!r}")
+            return None
+        await self._store_content(target)
+        self.rendered += 1
+        self.total_render_seconds += time.perf_counter() - started_at
+        return target
+
+    def _render_once(self, filename: str, variant: str) -> "asyncio.Future[Optional[Path]]":
+        key = variant_filename(filename, variant)
+        render = self._renders.get(key)
+        if render is None:
+            render = asyncio.ensure_future(self._render(filename, variant))
+            self._renders[key] = render
+            render.add_done_callback(lambda _: self._renders.pop(key, None))
+            self.peak_pending = max(self.peak_pending, len(self._renders))
+        return render
+
+    def schedule_derivatives(self, filename: str) -> None:
+        """
+        Starts rendering every derivative of a stored image in the background.
+        """
+        for variant in VARIANTS:
+            self._render_once(filename, variant)
+
+    async def get_image_path(self, filename: str, variant: Optional[str] = None) -> Optional[Path]:
+        """
+        Path of the stored image or of one of its derivatives, rendering the
+        derivative first if it is missing. Falls back to the original when
+        it cannot be rendered; None if the original is not on disk.
+        """
+        source = self.upload_dir / filename
+        if variant is None:
+            return source if await asyncio.to_thread(source.is_file) else None
+
+        target = self.upload_dir / variant_filename(filename, variant)
+        if await asyncio.to_thread(target.is_file):
+            return target
+        if not await asyncio.to_thread(source.is_file):
+            return None
+        if variant_filename(filename, variant) not in self._renders:
+            self.rendered_on_demand += 1
+        # Shielded: a client going away does not cancel a render others may wait on
+        rendered = await asyncio.shield(self._render_once(filename, variant))
+        return rendered or source
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.image_workers,
+            "pending": len(self._renders),
+            "peak_pending": self.peak_pending,
+            "rendered": self.rendered,
+            "rendered_on_demand": self.rendered_on_demand,
+            "failures": self.render_failures,
+            "avg_render_ms": round(self.total_render_seconds / self.rendered * 1000, 3) if self.rendered else 0.0,
+            "normalized": self.normalized,
+            "normalize_failures": self.normalize_failures,
+            "avg_normalize_ms": round(self.total_normalize_seconds / self.normalized * 1000, 3) if self.normalized else 0.0,
+            # Bytes received vs written for the normalized images
+            "ingest_original_bytes": self.ingest_original_bytes,
+            "ingest_stored_bytes": self.ingest_stored_bytes,
+            "ingest_saved_ratio": (
+                round(1 - self.ingest_stored_bytes / self.ingest_original_bytes, 3) if self.ingest_original_bytes else 0.0
+            ),
+            "content_store": self.content_store.stats(),
+        }
+
 # Create a service instance for reuse elsewhere
 file_service = FileService()
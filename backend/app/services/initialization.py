@@ -5,9 +5,10 @@ import uuid
 import logging
 
 from ..models import User, Role, Permission, InspectionItem
-from ..utils.security import get_password_hash
+from ..utils.security import get_password_hash_async
 from ..config import settings
-from ..crud import crud_user # Import crud_user for creating the initial user
+from ..core.permissions import CORE_PERMISSIONS
+from ..crud import crud_item, crud_permission, crud_user
 
 logger = logging.getLogger(__name__)
 
@@ -18,75 +19,17 @@ async def seed_database(db: AsyncSession):
     logger.info("Checking for existing roles and permissions...")
     
     # --- Seed Permissions ---
-    # Define core permissions for the system
-    core_permissions_data = [
-        {"name": "admin:full_access", "description": "Grants full administrative access"},
-        
-        # Users & Roles
-        {"name": "users:view", "description": "View user accounts"},
-        {"name": "users:manage", "description": "Create, update, and delete user accounts"},
-        {"name": "roles:view", "description": "View roles and their permissions"},
-        {"name": "roles:manage", "description": "Create, update, and delete roles and permissions"},
-        
-        # Students
-        {"name": "students:view_own", "description": "View own student information"},
-        {"name": "students:view_all", "description": "View all student information"},
-        {"name": "students:manage", "description": "Create, update, and delete student information"},
-        
-        # Rooms
-        {"name": "rooms:view", "description": "View room information"},
-        {"name": "rooms:manage", "description": "Create, update, and delete room information"},
-        
-        # Inspections
-        {"name": "inspections:view_own", "description": "View own inspection records"},
-        {"name": "inspections:view_all", "description": "View all inspection records"},
-        {"name": "inspections:submit_own", "description": "Submit own inspection records"},
-        {"name": "inspections:submit_any", "description": "Submit inspection records for any student"},
-        {"name": "inspections:review", "description": "Review and approve inspection records"},
-        {"name": "inspections:reinspect", "description": "Mark for reinspection or perform reinspection"},
-        {"name": "inspections:delete", "description": "Delete inspection records"},
-
-        # Announcements
-        {"name": "announcements:view", "description": "View announcements"},
-        {"name": "announcements:create", "description": "Create announcements"},
-        {"name": "announcements:edit", "description": "Edit announcements"},
-        {"name": "announcements:delete", "description": "Delete announcements"},
-        
-        # Patrols (LightsOutPatrol)
-        {"name": "patrol_locations:view", "description": "View patrol locations"},
-        {"name": "patrol_locations:manage", "description": "Create, update, and delete patrol locations"},
-        {"name": "patrols:perform", "description": "Perform and submit lights out patrols"},
-        {"name": "patrols:view_all", "description": "View all lights out patrol history"},
-        
-        # Reports & Statistics
-        {"name": "reports:view_statistics", "description": "View dashboard statistics and charts"},
-        {"name": "reports:export", "description": "Export data and reports"},
-
-        # Data Management
-        {"name": "data:import", "description": "Import bulk data"},
-        
-        # Others
-        {"name": "audit_logs:view", "description": "View system audit logs"},
-        {"name": "manage_items", "description": "Manage inspection items"},
-        {"name": "system:settings", "description": "Manage system-wide settings"},
-    ]
+    # Core permissions are defined alongside the permission bit registry
+    core_permissions_data = CORE_PERMISSIONS
 
-    existing_permissions_result = await db.execute(select(Permission))
-    existing_permissions_names = {p.name for p in existing_permissions_result.scalars().all()}
-    
-    permissions_to_add = []
-    for p_data in core_permissions_data:
-        if p_data["name"] not in existing_permissions_names:
-            permissions_to_add.append(Permission(name=p_data["name"], description=p_data["description"]))
-    
-    if permissions_to_add:
-        db.add_all(permissions_to_add)
-        await db.commit()
-        for p in permissions_to_add:
-            await db.refresh(p)
-        logger.info(f"Added {len(permissions_to_add)} new permissions.")
-    else:
-        logger.info("All core permissions already exist.")
+    # One statement adds the missing permissions; existing ones (and edited descriptions) are kept
+    await crud_permission.bulk_upsert(
+        db,
+        objs_in=[{"name": p["name"], "description": p["description"]} for p in core_permissions_data],
+        conflict_keys=("name",),
+        update_keys=(),
+    )
+    logger.info(f"Ensured {len(core_permissions_data)} core permissions exist.")
 
     # --- Seed Roles ---
     # Fetch all current permissions for role assignment
@@ -172,7 +115,7 @@ async def seed_database(db: AsyncSession):
             logger.error("Admin role not found, this should not happen if seeding ran correctly.")
             return # Should ideally re-run role seeding
 
-        hashed_password = get_password_hash(settings.FIRST_SUPERUSER_PASSWORD)
+        hashed_password = await get_password_hash_async(settings.FIRST_SUPERUSER_PASSWORD)
         default_admin = User(
             username=settings.FIRST_SUPERUSER,
             hashed_password=hashed_password,
@@ -196,14 +139,14 @@ async def seed_database(db: AsyncSession):
     existing_items_result = await db.execute(select(InspectionItem.name))
     existing_item_names = {row.name for row in existing_items_result.all()}
     
-    items_to_create = []
-    for item_name in default_items:
-        if item_name not in existing_item_names:
-            items_to_create.append(InspectionItem(name=item_name, description=f"Inspection item: {item_name}"))
+    items_to_create = [
+        {"name": item_name, "description": f"Inspection item: {item_name}"}
+        for item_name in default_items
+        if item_name not in existing_item_names
+    ]
     
     if items_to_create:
-        db.add_all(items_to_create)
-        await db.commit()
+        await crud_item.bulk_create(db, objs_in=items_to_create)
         logger.info(f"Added {len(items_to_create)} default inspection items.")
     else:
         logger.info("Default inspection items already exist.")
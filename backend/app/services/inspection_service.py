@@ -1,5 +1,5 @@
 # backend/app/services/inspection_service.py
-from typing import List, Optional
+from typing import Awaitable, Callable, List, Optional
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status, Depends
@@ -9,12 +9,48 @@ from ..schemas import InspectionCreate, BatchInspectionCreate
 
 from .. import models
 from .file_service import file_service
+from .upload_service import upload_service
 from ..database import get_db
 
 class InspectionService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
+    async def _store_images(
+        self, inspection_in: InspectionCreate, claim: Callable[[UUID], Awaitable[str]]
+    ) -> Optional[str]:
+        """
+        Resolves the signature and item photos of `inspection_in` to stored
+        filenames: uploads are claimed with `claim` (see
+        `UploadService.claiming`), legacy Base64 content is decoded and
+        saved. Sets each photo's `file_path` and returns the signature's.
+        """
+        signature_filename = None
+        try:
+            if inspection_in.signature_upload_id:
+                signature_filename = await claim(inspection_in.signature_upload_id)
+                await file_service.reduce_signature_colors(signature_filename)
+            elif inspection_in.signature_base64:
+                signature_filename = await file_service.decode_and_upload_base64_image(
+                    inspection_in.signature_base64, reduce_colors=True
+                )
+        except HTTPException as e:
+            raise HTTPException(status_code=e.status_code, detail=f"Failed to upload signature: {e.detail}")
+
+        for detail in inspection_in.details:
+            for photo in detail.photos or []:
+                try:
+                    if photo.upload_id:
+                        photo.file_path = await claim(photo.upload_id)
+                    else:
+                        # We are modifying the Pydantic model in place.
+                        # This is generally okay for a request-response cycle.
+                        photo.file_path = await file_service.decode_and_upload_base64_image(photo.file_content)
+                except HTTPException as e:
+                    raise HTTPException(status_code=e.status_code, detail=f"Failed to upload item photo for item: {e.detail}")
+
+        return signature_filename
+
     async def batch_create_inspection_reports(
         self,
         batch_in: BatchInspectionCreate,
@@ -23,36 +59,23 @@ class InspectionService:
         
         data_to_create = []
 
-        for inspection_in in batch_in.inspections:
-            # Handle signature image
-            signature_filename = None
-            if inspection_in.signature_base64:
-                try:
-                    signature_filename = await file_service.decode_and_upload_base64_image(inspection_in.signature_base64)
-                except HTTPException as e:
-                    # In batch, maybe log error and skip signature? Or fail whole batch?
-                    # Let's fail whole batch for consistency or catch and continue.
-                    # Raising exception here will stop the whole batch.
-                    raise HTTPException(status_code=e.status_code, detail=f"Failed to upload signature: {e.detail}")
+        # Uploads claimed here are released again if any part of the batch fails
+        async with upload_service.claiming(owner_id=inspector_id) as claim:
+            for inspection_in in batch_in.inspections:
+                # No record is created for it, so its uploads must stay unclaimed
+                if not inspection_in.student_id:
+                    continue
+                # Raising here stops the whole batch
+                signature_filename = await self._store_images(inspection_in, claim)
+                data_to_create.append((inspection_in, str(inspection_in.student_id), signature_filename))
 
-            # Handle images within inspection items
-            for detail in inspection_in.details:
-                if detail.photos:
-                    for photo in detail.photos:
-                        try:
-                            photo_filename = await file_service.decode_and_upload_base64_image(photo.file_content)
-                            photo.file_path = photo_filename
-                        except HTTPException as e:
-                            raise HTTPException(status_code=e.status_code, detail=f"Failed to upload item photo for item: {e.detail}")
-            
-            data_to_create.append((inspection_in, signature_filename))
-
-        # Create records in database
-        return await crud_inspection.batch_create(
-            self.db,
-            data=data_to_create,
-            inspector_id=inspector_id
-        )
+            # Records, details and photos are inserted in bulk (and committed); the
+            # response is built from what was written
+            return await crud_inspection.create_many(
+                self.db,
+                data_to_create,
+                inspector_id=inspector_id
+            )
 
     async def create_inspection_report(
         self,
@@ -63,34 +86,17 @@ class InspectionService:
         """
         Coordinates the creation of an inspection report, including handling image uploads and database writes.
         """
-        # Handle signature image
-        signature_filename = None
-        if inspection_in.signature_base64:
-            try:
-                signature_filename = await file_service.decode_and_upload_base64_image(inspection_in.signature_base64)
-            except HTTPException as e:
-                raise HTTPException(status_code=e.status_code, detail=f"Failed to upload signature: {e.detail}")
-
-        # Handle images within inspection items
-        for detail in inspection_in.details:
-            if detail.photos:
-                for photo in detail.photos:
-                    try:
-                        photo_filename = await file_service.decode_and_upload_base64_image(photo.file_content)
-                        # We are modifying the Pydantic model in place.
-                        # This is generally okay for a request-response cycle.
-                        photo.file_path = photo_filename
-                    except HTTPException as e:
-                        raise HTTPException(status_code=e.status_code, detail=f"Failed to upload item photo for item: {e.detail}")
+        async with upload_service.claiming(owner_id=inspector_id) as claim:
+            signature_filename = await self._store_images(inspection_in, claim)
 
-        # Create the inspection record in the database
-        inspection_record = await crud_inspection.create_with_details(
-            self.db,
-            inspection_in=inspection_in,
-            student_id=student_id,
-            inspector_id=inspector_id,
-            signature_filename=signature_filename
-        )
+            # Create the inspection record in the database; committed before the uploads are finalized
+            inspection_record = await crud_inspection.create_with_details(
+                self.db,
+                inspection_in=inspection_in,
+                student_id=student_id,
+                inspector_id=inspector_id,
+                signature_filename=signature_filename
+            )
         return inspection_record
 
 # Dependency injection function to provide InspectionService instances
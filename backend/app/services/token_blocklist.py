@@ -0,0 +1,146 @@
+# backend/app/services/token_blocklist.py
+import asyncio
+import logging
+import time
+from typing import Dict, Optional, Set
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..crud import crud_user
+from ..database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Allowance for clocks of the workers (or hosts) issuing tokens running ahead
+_CLOCK_SKEW_SECONDS = 5
+
+class TokenBlocklistIndex:
+    """
+    In-process index of revoked access token ids (`jti`).
+
+    The set is loaded from `token_blocklist` at startup and updated on logout,
+    so `get_current_user` can reject revoked tokens without a DB round trip.
+    A background task periodically reloads it (to pick up logouts handled by
+    other workers) and deletes expired rows from the table in batches.
+
+    A logout handled by another worker only shows up here at the next
+    reload. Tokens issued since the last load (by their `iat`) are still
+    checked against the table, so a token minted and revoked in between
+    is not accepted until the next reload.
+    """
+
+    def __init__(self):
+        self._jtis: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._last_sweep = 0.0
+        # Ids added while a load is running, merged into its result
+        self._added_during_load: Optional[Set[str]] = None
+        self.loaded_at: Optional[float] = None
+        self.rejected = 0
+        self.db_checks = 0
+        self.swept_rows = 0
+
+    def contains(self, jti: Optional[str]) -> bool:
+        if jti and jti in self._jtis:
+            self.rejected += 1
+            return True
+        return False
+
+    def add(self, jti: str) -> None:
+        self._jtis.add(jti)
+        if self._added_during_load is not None:
+            self._added_during_load.add(jti)
+
+    def _issued_since_load(self, issued_at: Optional[int]) -> bool:
+        if self.loaded_at is None or issued_at is None:
+            return True
+        return issued_at + _CLOCK_SKEW_SECONDS >= self.loaded_at
+
+    async def is_revoked(self, db: AsyncSession, claims: dict) -> bool:
+        """
+        Whether the token with these claims was revoked. Answered from the
+        index, except for tokens issued after the last load, which are
+        looked up in the table.
+        """
+        jti = claims.get("jti")
+        if not jti:
+            return False
+        if self.contains(jti):
+            return True
+        if not self._issued_since_load(claims.get("iat")):
+            return False
+        self.db_checks += 1
+        if await crud_user.is_token_revoked(db, jti):
+            self.add(jti)
+            self.rejected += 1
+            return True
+        return False
+
+    async def load(self) -> None:
+        # Rows committed while the query runs may be missed; taking the time
+        # first makes tokens issued meanwhile still go to the table
+        started = time.time()
+        self._added_during_load = set()
+        try:
+            async with AsyncSessionLocal() as db:
+                loaded = await crud_user.get_revoked_token_jtis(db)
+            self._jtis = loaded | self._added_during_load
+        finally:
+            self._added_during_load = None
+        self.loaded_at = started
+
+    async def sweep(self) -> int:
+        """
+        Deletes expired blocklist rows (of every token type) in batches.
+        """
+        total = 0
+        async with AsyncSessionLocal() as db:
+            while True:
+                deleted = await crud_user.purge_expired_tokens(
+                    db, batch_size=settings.TOKEN_BLOCKLIST_SWEEP_BATCH_SIZE
+                )
+                total += deleted
+                if deleted < settings.TOKEN_BLOCKLIST_SWEEP_BATCH_SIZE:
+                    break
+        self.swept_rows += total
+        self._last_sweep = time.monotonic()
+        if total:
+            logger.info(f"Token blocklist sweeper removed {total} expired rows.")
+        return total
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.TOKEN_BLOCKLIST_REFRESH_SECONDS)
+            try:
+                if time.monotonic() - self._last_sweep >= settings.TOKEN_BLOCKLIST_SWEEP_INTERVAL_SECONDS:
+                    await self.sweep()
+                await self.load()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Token blocklist refresh failed: {e}")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        return {
+            "size": len(self._jtis),
+            "loaded_at": self.loaded_at,
+            "rejected": self.rejected,
+            "db_checks": self.db_checks,
+            "swept_rows": self.swept_rows,
+        }
+
+token_blocklist = TokenBlocklistIndex()
@@ -0,0 +1,405 @@
+# backend/app/services/upload_service.py
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, BinaryIO, Callable, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines
+    fcntl = None
+
+from fastapi import HTTPException, UploadFile, status
+
+from ..config import settings
+from ..crud import crud_inspection
+from ..database import AsyncSessionLocal
+from .file_service import file_service
+
+logger = logging.getLogger(__name__)
+
+# Bytes sniffed to tell the image type
+_SNIFF_BYTES = 2048
+
+# Writes to disk are batched up to this size, one thread hop each
+_WRITE_BUFFER_BYTES = 1024 * 1024
+
+# A claim not finalized or released within this long is taken as abandoned
+_CLAIM_TIMEOUT_SECONDS = 600
+
+
+class UploadService:
+    """
+    Resumable uploads of images, streamed to disk.
+
+    A client opens an upload with the total size, sends the bytes in one or
+    more chunks (each at the current offset), and gets an upload id that
+    the create endpoints accept in place of base64 content. Uploads live
+    under `<UPLOAD_DIR>/.partial` as a `.part` file plus a JSON state file,
+    so any worker can continue one. Requests that change an upload take an
+    exclusive `flock` on its `.lock` file and read the state under it, so
+    two workers never write the same chunk. Once complete the file is
+    checked to be an image and moved next to the other uploads as
+    `<upload id>.<ext>`.
+
+    The record that uses an upload claims it (see `claiming`); the upload
+    is gone only once that record is committed, and usable again if it is
+    not. Uploads that are not finished or not claimed within
+    UPLOAD_SESSION_TTL_SECONDS are deleted.
+    """
+
+    def __init__(self, upload_dir: str = settings.UPLOAD_DIR):
+        self.upload_dir = Path(upload_dir)
+        self.partial_dir = self.upload_dir / ".partial"
+        self.partial_dir.mkdir(parents=True, exist_ok=True)
+        self._last_cleanup = 0.0
+
+    def _state_path(self, upload_id: str) -> Path:
+        return self.partial_dir / f"{upload_id}.json"
+
+    def _part_path(self, upload_id: str) -> Path:
+        return self.partial_dir / f"{upload_id}.part"
+
+    def _lock_path(self, upload_id: str) -> Path:
+        return self.partial_dir / f"{upload_id}.lock"
+
+    def _read_state(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._state_path(upload_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write_state(self, upload_id: str, state: Dict[str, Any]) -> None:
+        # Replace atomically, another worker may be reading it
+        tmp_path = self._state_path(upload_id).with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self._state_path(upload_id))
+
+    def _lock(self, upload_key: str, blocking: bool = True) -> Optional[BinaryIO]:
+        """
+        Opens and locks the upload's lock file; None if `blocking` is False
+        and another request holds it. Release with `_unlock`.
+        """
+        f = open(self._lock_path(upload_key), "ab")
+        if fcntl is None:
+            return f
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            f.close()
+            return None
+        return f
+
+    @staticmethod
+    def _unlock(f: BinaryIO) -> None:
+        # Closing the file releases the lock
+        f.close()
+
+    @asynccontextmanager
+    async def _locked(self, upload_id: uuid.UUID, owner_id: Any, blocking: bool = True) -> AsyncIterator[tuple[str, Dict[str, Any]]]:
+        """
+        Holds the upload's lock and yields its state, read under the lock.
+        """
+        upload_key = str(upload_id)
+        lock = await asyncio.to_thread(self._lock, upload_key, blocking)
+        if lock is None:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Upload is busy with another request.")
+        try:
+            state = await asyncio.to_thread(self._read_state, upload_key)
+            if state is None:
+                # Deleted meanwhile (or never existed); drop the lock file opening it created
+                await asyncio.to_thread(self._remove, [self._lock_path(upload_key)])
+            # Someone else's upload is reported as missing too
+            if state is None or state["owner_id"] != str(owner_id):
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found.")
+            yield upload_key, state
+        finally:
+            await asyncio.to_thread(self._unlock, lock)
+
+    def _offset(self, upload_id: str, state: Dict[str, Any]) -> int:
+        if state.get("file_path"):
+            return state["size"]
+        try:
+            return os.path.getsize(self._part_path(upload_id))
+        except FileNotFoundError:
+            return 0
+
+    def _status(self, upload_id: str, state: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "upload_id": upload_id,
+            "size": state["size"],
+            "offset": self._offset(upload_id, state),
+            "complete": bool(state.get("file_path")),
+            "chunk_size": settings.UPLOAD_CHUNK_SIZE,
+        }
+
+    def _check_size(self, size: int) -> None:
+        if size > settings.UPLOAD_MAX_FILE_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"File is larger than {settings.UPLOAD_MAX_FILE_BYTES} bytes.",
+            )
+
+    async def create(self, owner_id: Any, size: int) -> Dict[str, Any]:
+        """
+        Opens an upload of `size` bytes and returns its status.
+        """
+        self._check_size(size)
+        await self.cleanup_expired(force=False)
+
+        upload_key = str(uuid.uuid4())
+        state = {
+            "owner_id": str(owner_id), "size": size, "created_at": time.time(),
+            "file_path": None, "claimed_at": None,
+        }
+
+        def create_files() -> None:
+            self._part_path(upload_key).touch()
+            self._lock_path(upload_key).touch()
+            self._write_state(upload_key, state)
+
+        await asyncio.to_thread(create_files)
+        return self._status(upload_key, state)
+
+    async def status(self, upload_id: uuid.UUID, owner_id: Any) -> Dict[str, Any]:
+        """
+        Where the upload stands; a client resumes by sending from `offset`.
+        """
+        upload_key = str(upload_id)
+        state = await asyncio.to_thread(self._read_state, upload_key)
+        if state is None or state["owner_id"] != str(owner_id):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found.")
+        return self._status(upload_key, state)
+
+    async def append(
+        self, upload_id: uuid.UUID, owner_id: Any, offset: int, chunks: AsyncIterator[bytes]
+    ) -> Dict[str, Any]:
+        """
+        Writes the streamed bytes at `offset`, which must be the current end
+        of the upload, and completes the upload once all bytes are in. A
+        chunk sent while another one is still being written gets 409.
+        """
+        async with self._locked(upload_id, owner_id, blocking=False) as (upload_key, state):
+            if state.get("file_path"):
+                return self._status(upload_key, state)
+
+            part_path = self._part_path(upload_key)
+            current = await asyncio.to_thread(self._offset, upload_key, state)
+            if offset != current:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=f"Upload offset is {current}, not {offset}.",
+                )
+
+            remaining = state["size"] - offset
+            f = await asyncio.to_thread(open, part_path, "ab")
+            try:
+                written = 0
+                buffer = bytearray()
+                async for chunk in chunks:
+                    written += len(chunk)
+                    if written > remaining:
+                        raise HTTPException(
+                            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail="Chunk goes past the declared upload size.",
+                        )
+                    buffer += chunk
+                    if len(buffer) >= _WRITE_BUFFER_BYTES:
+                        await asyncio.to_thread(f.write, bytes(buffer))
+                        buffer.clear()
+                if buffer:
+                    await asyncio.to_thread(f.write, bytes(buffer))
+            except BaseException:
+                # Drop the partial chunk, the client resends it from `offset`
+                await asyncio.to_thread(f.truncate, offset)
+                raise
+            finally:
+                await asyncio.to_thread(f.close)
+
+            if offset + written == state["size"]:
+                await self._complete(upload_key, state)
+            return self._status(upload_key, state)
+
+    async def save_file(self, owner_id: Any, file: UploadFile) -> Dict[str, Any]:
+        """
+        Single-request upload of a multipart file, copied to disk in chunks.
+        """
+        size = file.size
+        if size is None:
+            size = await asyncio.to_thread(lambda: os.fstat(file.file.fileno()).st_size)
+        upload = await self.create(owner_id, size)
+
+        async def chunks() -> AsyncIterator[bytes]:
+            while chunk := await file.read(_WRITE_BUFFER_BYTES):
+                yield chunk
+
+        return await self.append(uuid.UUID(upload["upload_id"]), owner_id, 0, chunks())
+
+    async def _complete(self, upload_key: str, state: Dict[str, Any]) -> None:
+        part_path = self._part_path(upload_key)
+
+        def sniff() -> bytes:
+            with open(part_path, "rb") as f:
+                return f.read(_SNIFF_BYTES)
+
+        mime_type = file_service.magic.from_buffer(await asyncio.to_thread(sniff))
+        file_extension = file_service._get_extension_from_mime(mime_type)
+        if not file_extension:
+            await asyncio.to_thread(self._delete, upload_key, state)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"File is not a valid image format. Detected type: {mime_type}",
+            )
+
+        state["file_path"] = f"{upload_key}.{file_extension}"
+
+        def move() -> None:
+            os.replace(part_path, self.upload_dir / state["file_path"])
+            self._write_state(upload_key, state)
+
+        await asyncio.to_thread(move)
+        await file_service.ingest(state["file_path"])
+
+    async def _claim(self, upload_id: uuid.UUID, owner_id: Any) -> str:
+        async with self._locked(upload_id, owner_id) as (upload_key, state):
+            if not state.get("file_path"):
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Upload {upload_key} is not complete.")
+            claimed_at = state.get("claimed_at")
+            # A claim older than that belongs to a request that died without releasing it
+            if claimed_at and time.time() - claimed_at < _CLAIM_TIMEOUT_SECONDS:
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Upload {upload_key} is already in use.")
+            state["claimed_at"] = time.time()
+            await asyncio.to_thread(self._write_state, upload_key, state)
+            return state["file_path"]
+
+    async def _release(self, upload_id: uuid.UUID, owner_id: Any) -> None:
+        try:
+            async with self._locked(upload_id, owner_id) as (upload_key, state):
+                state["claimed_at"] = None
+                await asyncio.to_thread(self._write_state, upload_key, state)
+        except HTTPException:
+            # Already gone; nothing to give back
+            pass
+
+    async def _finalize(self, upload_id: uuid.UUID, owner_id: Any) -> None:
+        async with self._locked(upload_id, owner_id) as (upload_key, state):
+            # The file now belongs to the record; only the upload's bookkeeping goes
+            await asyncio.to_thread(self._remove, [self._state_path(upload_key), self._lock_path(upload_key)])
+        file_service.schedule_derivatives(state["file_path"])
+
+    @asynccontextmanager
+    async def claiming(self, owner_id: Any) -> AsyncIterator[Callable[[uuid.UUID], Awaitable[str]]]:
+        """
+        Yields a function that claims a complete upload and returns its
+        filename. Leave the block only after the records using the files
+        are committed: the claimed uploads are then finalized, i.e. handed
+        over for good. If the block raises they are released again, so the
+        client can retry with the same upload ids.
+        """
+        claimed: List[uuid.UUID] = []
+
+        async def claim(upload_id: uuid.UUID) -> str:
+            file_path = await self._claim(upload_id, owner_id)
+            claimed.append(upload_id)
+            return file_path
+
+        try:
+            yield claim
+        except BaseException:
+            for upload_id in claimed:
+                await self._release(upload_id, owner_id)
+            raise
+        for upload_id in claimed:
+            try:
+                await self._finalize(upload_id, owner_id)
+            except HTTPException as e:
+                # The records are committed; a leftover state is swept with the expired uploads
+                logger.warning(f"Could not finalize upload {upload_id}: {e.detail}")
+
+    @staticmethod
+    def _remove(paths: List[Path]) -> None:
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _delete(self, upload_key: str, state: Optional[Dict[str, Any]], keep_file: bool = False) -> None:
+        paths = [self._part_path(upload_key), self._state_path(upload_key), self._lock_path(upload_key)]
+        if state and state.get("file_path") and not keep_file:
+            paths.append(self.upload_dir / state["file_path"])
+        self._remove(paths)
+
+    async def cleanup_expired(self, force: bool = True) -> int:
+        """
+        Deletes uploads older than UPLOAD_SESSION_TTL_SECONDS that were never
+        claimed. Unless forced, runs at most once per TTL/24.
+
+        An expired upload that is still marked claimed was claimed by a
+        request that died before finalizing it; its file is kept if a
+        committed record uses it.
+        """
+        now = time.time()
+        if not force and now - self._last_cleanup < settings.UPLOAD_SESSION_TTL_SECONDS / 24:
+            return 0
+        self._last_cleanup = now
+
+        def expired() -> List[tuple[str, Optional[Dict[str, Any]]]]:
+            found = []
+            for state_path in self.partial_dir.glob("*.json"):
+                upload_key = state_path.stem
+                state = self._read_state(upload_key)
+                created_at = state.get("created_at", 0) if state else state_path.stat().st_mtime
+                if now - created_at >= settings.UPLOAD_SESSION_TTL_SECONDS:
+                    found.append((upload_key, state))
+            return found
+
+        in_use = set()
+        candidates = await asyncio.to_thread(expired)
+        claimed_files = [state["file_path"] for _, state in candidates if state and state.get("claimed_at")]
+        if claimed_files:
+            async with AsyncSessionLocal() as db:
+                for file_path in claimed_files:
+                    if await crud_inspection.get_image_student_id(db, filename=file_path):
+                        in_use.add(file_path)
+
+        def sweep() -> int:
+            removed = 0
+            for upload_key, state in candidates:
+                lock = self._lock(upload_key, blocking=False)
+                if lock is None:
+                    # Being written or claimed right now
+                    continue
+                try:
+                    # Re-read under the lock, it may have been claimed or finalized since
+                    current = self._read_state(upload_key)
+                    if current is None and not self._state_path(upload_key).exists():
+                        continue
+                    state = current or state
+                    claimed_at = state and state.get("claimed_at")
+                    if claimed_at and now - claimed_at < _CLAIM_TIMEOUT_SECONDS:
+                        continue
+                    self._delete(upload_key, state, keep_file=bool(state) and state.get("file_path") in in_use)
+                finally:
+                    self._unlock(lock)
+                removed += 1
+            if removed:
+                # The deleted files may have been the last links to their blobs
+                file_service.content_store.collect_garbage()
+            return removed
+
+        removed = await asyncio.to_thread(sweep)
+        if removed:
+            logger.info(f"Removed {removed} expired uploads.")
+        return removed
+
+
+# Create a service instance for reuse elsewhere
+upload_service = UploadService()
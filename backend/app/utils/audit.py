@@ -2,12 +2,12 @@ from functools import wraps
 from typing import Callable, Optional, Union
 from fastapi import Request, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
-import json
 import logging
 
-from ..crud import crud_audit
 from .. import models
-from ..database import get_db
+from ..database import UNIT_OF_WORK
+from ..services.audit_sink import audit_sink
+from .audit_payload import changed_fields, encode_details, response_summary
 
 logger = logging.getLogger(__name__)
 
@@ -24,20 +24,12 @@ def audit_log(action: str, resource_type: str, resource_id_src: Optional[Union[s
         async def wrapper(*args, **kwargs):
             request: Request = kwargs.get('request')
             current_user: models.User = kwargs.get('current_user')
+            if current_user is None and request is not None:
+                # Set by auth.authenticate_request for any authenticated route
+                current_user = getattr(request.state, "current_user", None)
 
-            # Smart DB session extraction
-            db = kwargs.get('db')
-            if not db:
-                # Try to find db in services
-                for arg in kwargs.values():
-                    if hasattr(arg, 'db') and isinstance(arg.db, AsyncSession):
-                        db = arg.db
-                        break
-            
-            # If still no DB or user (e.g. anonymous endpoints), we might skip audit or log error
-            # For now, we assume authenticated endpoints with some DB access
-            if not db or not current_user:
-                # logger.warning(f"Skipping audit log for {action} {resource_type}: Missing db or current_user")
+            # Anonymous endpoints are not audited
+            if not current_user:
                 return await func(*args, **kwargs)
 
             # Execute the original function first
@@ -56,38 +48,34 @@ def audit_log(action: str, resource_type: str, resource_id_src: Optional[Union[s
             elif isinstance(response_data, dict) and "id" in response_data:
                 resource_id = str(response_data["id"])
             
+            # Only the fields the client sent and the ids of what came back;
+            # large values are hashed and the whole document is size capped
             log_details = {
                 "request_body": None,
                 "response_data": None
             }
             try:
-                if request and request.method in ["POST", "PUT", "DELETE"]:
-                    if request.headers.get("content-type") == "application/json":
-                        try:
-                            body = await request.json()
-                            log_details["request_body"] = body
-                        except json.JSONDecodeError:
-                            log_details["request_body"] = "Non-JSON body or empty body for JSON type"
-                
-                if hasattr(response_data, "model_dump_json"):
-                    log_details["response_data"] = json.loads(response_data.model_dump_json())
-                elif isinstance(response_data, (dict, list)):
-                    log_details["response_data"] = response_data
-
+                log_details["request_body"] = changed_fields(kwargs)
+                log_details["response_data"] = response_summary(response_data)
+                log_details = encode_details(log_details)
             except Exception as e:
                 logger.error(f"Error extracting details for audit log: {e}")
             
-            await crud_audit.create(
-                db=db,
-                obj_in={
-                    "action": action,
-                    "resource_type": resource_type,
-                    "resource_id": resource_id,
-                    "details": log_details
-                },
+            event = dict(
+                action=action,
+                resource_type=resource_type,
+                resource_id=resource_id,
+                details=log_details,
                 user_id=current_user.id,
                 ip_address=request.client.host if request and request.client else None
             )
+            db = kwargs.get('db')
+            if isinstance(db, AsyncSession) and db.info.get(UNIT_OF_WORK):
+                # unit_of_work commits after we return; a failed commit must not be audited
+                audit_sink.emit_on_commit(db, **event)
+            else:
+                # Only enqueued here; audit_sink writes it in the next batch
+                await audit_sink.emit(**event)
             return response_data
         return wrapper
     return decorator
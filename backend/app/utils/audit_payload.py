@@ -0,0 +1,111 @@
+import base64
+import hashlib
+import json
+import zlib
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel
+
+from ..config import settings
+
+# Key holding a zlib-compressed, base64-encoded details document
+COMPRESSED_KEY = "_z"
+# Documents smaller than this are not worth compressing
+COMPRESS_MIN_BYTES = 1024
+# How many ids of a list response are kept
+MAX_RESPONSE_IDS = 50
+
+REDACTED = "***"
+SENSITIVE_KEYS = ("password", "token", "secret")
+
+
+def _is_sensitive(key: str) -> bool:
+    key = key.lower()
+    return any(word in key for word in SENSITIVE_KEYS)
+
+
+def _digest(value: str) -> Dict[str, Any]:
+    return {"sha256": hashlib.sha256(value.encode()).hexdigest(), "chars": len(value)}
+
+
+def compact(value: Any) -> Any:
+    """
+    Copies `value` with secrets redacted and long strings (base64 images,
+    signatures, free text) replaced by their SHA-256 and length.
+    """
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if _is_sensitive(str(key)) and item is not None else compact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [compact(item) for item in value]
+    if isinstance(value, str) and len(value) > settings.AUDIT_MAX_FIELD_CHARS:
+        return _digest(value)
+    return value
+
+
+def changed_fields(kwargs: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    The request body models an endpoint received, limited to the fields the
+    client actually sent (`exclude_unset`), keyed by parameter name.
+    """
+    bodies = {
+        name: value.model_dump(mode="json", exclude_unset=True)
+        for name, value in kwargs.items()
+        if isinstance(value, BaseModel)
+    }
+    return compact(bodies) if bodies else None
+
+
+def _identity(item: Any) -> Any:
+    if isinstance(item, dict):
+        return item.get("id")
+    return getattr(item, "id", None)
+
+
+def response_summary(response_data: Any) -> Optional[Dict[str, Any]]:
+    """
+    Identifies what the endpoint returned without serializing all of it.
+    """
+    if isinstance(response_data, (list, tuple)):
+        ids = [_identity(item) for item in response_data[:MAX_RESPONSE_IDS]]
+        return {"count": len(response_data), "ids": [str(i) for i in ids if i is not None]}
+    identity = _identity(response_data)
+    if identity is not None:
+        return {"id": str(identity)}
+    if isinstance(response_data, dict):
+        return compact(response_data)
+    return None
+
+
+def encode_details(details: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Applies the size cap and, when enabled, compression to an audit details
+    document. The result is what gets stored in `AuditLog.details`.
+    """
+    raw = json.dumps(details, separators=(",", ":"), default=str)
+    size = len(raw.encode())
+    if size > settings.AUDIT_MAX_DETAILS_BYTES:
+        # Drop the sections that blow the budget, keep a fingerprint of the original
+        budget = settings.AUDIT_MAX_DETAILS_BYTES // 4
+        details = {
+            key: value if len(json.dumps(value, default=str)) <= budget else {"truncated": True}
+            for key, value in details.items()
+        }
+        details["truncated"] = {"bytes": size, "sha256": hashlib.sha256(raw.encode()).hexdigest()}
+        raw = json.dumps(details, separators=(",", ":"), default=str)
+        size = len(raw.encode())
+    if settings.AUDIT_COMPRESS_DETAILS and size >= COMPRESS_MIN_BYTES:
+        packed = base64.b64encode(zlib.compress(raw.encode(), 6)).decode()
+        return {COMPRESSED_KEY: packed}
+    return details
+
+
+def decode_details(details: Any) -> Any:
+    """
+    Inverse of the compression step of `encode_details`; other values pass through.
+    """
+    if isinstance(details, dict) and set(details) == {COMPRESSED_KEY}:
+        return json.loads(zlib.decompress(base64.b64decode(details[COMPRESSED_KEY])))
+    return details
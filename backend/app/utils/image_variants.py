@@ -0,0 +1,129 @@
+# backend/app/utils/image_variants.py
+#
+# Runs in the image worker processes, so it imports nothing from the app.
+import os
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from PIL import ExifTags, Image, ImageOps
+
+
+class Variant(NamedTuple):
+    # Longest edge in pixels, None keeps the original size
+    max_edge: Optional[int]
+    quality: int
+    # Replaces the extension of the original's filename
+    suffix: str
+
+
+# Derivatives stored next to each uploaded image
+VARIANTS: Dict[str, Variant] = {
+    "thumb": Variant(max_edge=320, quality=75, suffix=".thumb.webp"),
+    "medium": Variant(max_edge=1280, quality=80, suffix=".medium.webp"),
+    "webp": Variant(max_edge=None, quality=85, suffix=".webp"),
+}
+
+
+def variant_filename(filename: str, variant: str) -> str:
+    return Path(filename).stem + VARIANTS[variant].suffix
+
+
+def _has_alpha(image: Image.Image) -> bool:
+    return "A" in image.getbands() or "transparency" in image.info
+
+
+def _save_aside(image: Image.Image, target: str, format: str, **params: Any) -> str:
+    # Written aside and renamed by the caller, a reader never sees half a file
+    tmp_target = f"{target}.{os.getpid()}.tmp"
+    try:
+        image.save(tmp_target, format, **params)
+    except BaseException:
+        if os.path.exists(tmp_target):
+            os.remove(tmp_target)
+        raise
+    return tmp_target
+
+
+def _exact_palette(image: Image.Image, max_colors: int) -> Optional[Image.Image]:
+    # The same pixels as a palette image, if an opaque image has few enough colours
+    if image.mode != "RGB":
+        return None
+    colors = image.getcolors(max_colors)
+    if colors is None:
+        return None
+    palette = Image.new("P", (1, 1))
+    palette.putpalette([channel for _, rgb in colors for channel in rgb])
+    return image.quantize(palette=palette, dither=Image.Dither.NONE)
+
+
+def normalize_image(
+    path: str, max_edge: Optional[int], jpeg_quality: int, png_colors: int, reduce_colors: bool = False
+) -> Tuple[int, int]:
+    """
+    Rewrites a freshly stored JPEG or PNG in place: turned upright per its
+    EXIF orientation, scaled down to fit `max_edge`, and saved without
+    EXIF (and GPS) data; JPEGs at `jpeg_quality`. A PNG with at most
+    `png_colors` colours (e.g. a diagram) is stored as a palette image
+    with the same pixels; with `reduce_colors` (signatures) it is reduced
+    to such a palette whatever it holds. 0 keeps the colours. Other
+    formats, e.g. possibly animated GIFs, are left alone.
+
+    A file that needs no rotation, scaling or stripping keeps its bytes
+    when rewriting would not make it smaller. Returns the size before and
+    after.
+    """
+    original_size = os.path.getsize(path)
+    with Image.open(path) as image:
+        if image.format not in ("JPEG", "PNG"):
+            return original_size, original_size
+        format = image.format
+        icc_profile = image.info.get("icc_profile")
+        must_rewrite = "exif" in image.info
+        if max_edge and format == "JPEG":
+            image.draft("RGB", (max_edge, max_edge))
+        # exif_transpose returns a copy even when there is nothing to turn
+        must_rewrite = must_rewrite or image.getexif().get(ExifTags.Base.Orientation, 1) != 1
+        image = ImageOps.exif_transpose(image)
+        if max_edge and max(image.size) > max_edge:
+            image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+            must_rewrite = True
+
+        if format == "JPEG":
+            if image.mode not in ("L", "RGB"):
+                image = image.convert("RGB")
+            tmp_path = _save_aside(
+                image, path, "JPEG", quality=jpeg_quality, optimize=True, progressive=True,
+                icc_profile=icc_profile,
+            )
+        else:
+            if png_colors and reduce_colors and image.mode != "P":
+                image = image.convert("RGBA" if _has_alpha(image) else "RGB")
+                image = image.quantize(png_colors, method=Image.Quantize.FASTOCTREE)
+            elif png_colors:
+                image = _exact_palette(image, png_colors) or image
+            tmp_path = _save_aside(image, path, "PNG", optimize=True)
+
+    stored_size = os.path.getsize(tmp_path)
+    if not must_rewrite and stored_size >= original_size:
+        os.remove(tmp_path)
+        return original_size, original_size
+    os.replace(tmp_path, path)
+    return original_size, stored_size
+
+
+def render_variant(source: str, target: str, max_edge: Optional[int], quality: int) -> int:
+    """
+    Writes `source` as a WebP scaled down to fit `max_edge`, upright per
+    its EXIF orientation, and returns the size of the written file.
+    """
+    with Image.open(source) as image:
+        if max_edge and image.format == "JPEG":
+            # Let the decoder scale by 1/2..1/8 first, far cheaper than resampling
+            image.draft("RGB", (max_edge, max_edge))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if _has_alpha(image) else "RGB")
+        if max_edge:
+            image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+        os.replace(_save_aside(image, target, "WEBP", quality=quality, method=4), target)
+    return os.path.getsize(target)
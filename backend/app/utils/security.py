@@ -1,19 +1,125 @@
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Callable, Dict, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+import asyncio
+import time
 from jose import jwt, JWTError
+from fastapi import HTTPException, status
 
 from ..config import settings
 
 # 使用 pbkdf2_sha256（與資料庫現有密碼格式一致）
 pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 
+class PasswordHashingPool:
+    """
+    Runs PBKDF2 hashing and verification on a dedicated, size-limited thread pool
+    so a burst of logins does not block the event loop (hashlib releases the GIL).
+
+    Logins additionally take one of `max_concurrent_logins` slots. When more than
+    `max_queue` logins are already waiting, new ones are rejected with 503.
+    """
+
+    def __init__(self, max_workers: int, max_concurrent_logins: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_concurrent_logins = max_concurrent_logins
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._login_slots = asyncio.Semaphore(max_concurrent_logins)
+        self.pending = 0
+        self.peak_pending = 0
+        self.completed = 0
+        self.total_wait_seconds = 0.0
+        self.logins_waiting = 0
+        self.logins_active = 0
+        self.logins_rejected = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password-hash")
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        submitted_at = time.perf_counter()
+
+        def timed() -> Any:
+            self.total_wait_seconds += time.perf_counter() - submitted_at
+            return fn(*args)
+
+        self.pending += 1
+        self.peak_pending = max(self.peak_pending, self.pending)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), timed)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    @asynccontextmanager
+    async def login_slot(self):
+        if self.logins_waiting >= self.max_queue:
+            self.logins_rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many concurrent logins, please retry shortly.",
+                headers={"Retry-After": "1"},
+            )
+        self.logins_waiting += 1
+        try:
+            await self._login_slots.acquire()
+        finally:
+            self.logins_waiting -= 1
+        self.logins_active += 1
+        try:
+            yield
+        finally:
+            self.logins_active -= 1
+            self._login_slots.release()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.max_workers,
+            "pending": self.pending,
+            "peak_pending": self.peak_pending,
+            "completed": self.completed,
+            "avg_queue_wait_ms": round(self.total_wait_seconds / self.completed * 1000, 3) if self.completed else 0.0,
+            "logins_waiting": self.logins_waiting,
+            "logins_active": self.logins_active,
+            "logins_rejected": self.logins_rejected,
+            "max_concurrent_logins": self.max_concurrent_logins,
+        }
+
+password_hashing_pool = PasswordHashingPool(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_concurrent_logins=settings.LOGIN_CONCURRENCY_LIMIT,
+    max_queue=settings.LOGIN_QUEUE_LIMIT,
+)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hashing_pool.run(pwd_context.verify, plain_password, hashed_password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verifies a password and, if the stored hash uses outdated parameters,
+    returns a replacement hash as the second element.
+    """
+    return await password_hashing_pool.run(pwd_context.verify_and_update, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_hashing_pool.run(pwd_context.hash, password)
+
 def create_password_reset_token(email: str, expires_delta: Optional[timedelta] = None) -> str:
     """
     Generates a JWT token for password reset.
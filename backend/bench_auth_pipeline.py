@@ -0,0 +1,103 @@
+"""
+Micro-benchmark for the authentication dependency.
+
+Compares the current single-decode pipeline (`auth.authenticate_request`)
+against the previous behaviour, where the sliding refresh check decoded the
+JWT a second time. Runs against a throwaway SQLite database through the
+FastAPI test client, so it does not touch the configured database.
+
+Usage (from the backend directory):
+    python bench_auth_pipeline.py [requests]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import Depends, Request, Response
+from fastapi.testclient import TestClient
+from jose import jwt
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import auth, models
+from app.config import settings
+from app.database import Base, get_db
+from app.services.auth_service import AuthService, get_auth_service
+from app.services.initialization import seed_database
+from main import app
+
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+ROUNDS = 5
+PATH = "/api/v1/users/me/"
+
+
+async def legacy_authenticate_request(
+    request: Request,
+    response: Response,
+    token: str = Depends(auth.get_token_from_cookie),
+    auth_service: AuthService = Depends(get_auth_service),
+) -> models.User:
+    # Old flow: get_current_user decoded the token, then the refresh check decoded it again
+    user = await auth_service.get_current_user(token)
+    claims = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    auth.check_and_refresh_token(response, claims, auth_service, user)
+    return user
+
+
+def run(client: TestClient) -> float:
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        response = client.get(PATH)
+        assert response.status_code == 200, response.text
+    return (time.perf_counter() - start) / REQUESTS * 1e6
+
+
+def main() -> None:
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def setup() -> None:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with session_factory() as db:
+            await seed_database(db)
+
+    asyncio.run(setup())
+
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(app)
+    token = AuthService(db=None).create_access_token(data={"sub": settings.FIRST_SUPERUSER})
+    client.cookies.set("access_token", token)
+
+    decode_start = time.perf_counter()
+    for _ in range(REQUESTS):
+        jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    decode_us = (time.perf_counter() - decode_start) / REQUESTS * 1e6
+    print(f"{'jwt.decode':<16} {decode_us:9.1f} us/call")
+
+    for _ in range(50):  # warm up caches and the connection pool
+        client.get(PATH)
+
+    # Alternate the two pipelines and keep the best round of each to damp noise
+    current, legacy = [], []
+    for _ in range(ROUNDS):
+        app.dependency_overrides.pop(auth.authenticate_request, None)
+        current.append(run(client))
+        app.dependency_overrides[auth.authenticate_request] = legacy_authenticate_request
+        legacy.append(run(client))
+
+    print(f"{'single decode':<16} {min(current):9.1f} us/request")
+    print(f"{'double decode':<16} {min(legacy):9.1f} us/request")
+    print(f"{'saving':<16} {min(legacy) - min(current):9.1f} us/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Micro-benchmark for `CRUDBase.update` on the student and bed paths that the
+spreadsheet import (`/import/upload`) runs once per row.
+
+Compares the dirty-field update against the previous behaviour, which walked
+the whole object with `jsonable_encoder`, always committed and then
+refreshed the full row. Reports time and SQL statements per call, for rows
+that are re-imported unchanged and for rows that really change. Runs against
+a throwaway SQLite database, so it does not touch the configured database.
+
+Usage (from the backend directory):
+    python bench_crud_update.py [updates]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import crud, models
+from app.database import Base
+
+UPDATES = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+ROUNDS = 3
+
+
+async def legacy_update(db: AsyncSession, *, db_obj: Any, obj_in: Dict[str, Any]) -> Any:
+    # Previous CRUDBase.update
+    obj_data = jsonable_encoder(db_obj)
+    for field in obj_data:
+        if field in obj_in:
+            setattr(db_obj, field, obj_in[field])
+    db.add(db_obj)
+    await db.commit()
+    await db.refresh(db_obj)
+    return db_obj
+
+
+def student_rows(students: List[models.Student], beds: List[models.Bed], changed: bool) -> List[Dict[str, Any]]:
+    # Same shape as the dict import_data passes for an existing student
+    return [
+        {
+            "student_id_number": student.student_id_number,
+            "full_name": student.full_name + ("*" if changed else ""),
+            "class_name": student.class_name,
+            "gender": student.gender,
+            "identity_status": None,
+            "is_foreign_student": False,
+            "enrollment_status": None,
+            "remarks": None,
+            "license_plate": None,
+            "contract_info": None,
+            "temp_card_number": None,
+            "bed_id": bed.id,
+        }
+        for student, bed in zip(students, beds)
+    ]
+
+
+def main() -> None:
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    statements = 0
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count_statement(*args: Any) -> None:
+        nonlocal statements
+        statements += 1
+
+    async def setup() -> None:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with session_factory() as db:
+            building = models.Building(name="B")
+            room = models.Room(building=building, room_number="B101")
+            db.add_all([building, room])
+            await db.flush()
+            for i in range(UPDATES):
+                bed = models.Bed(room_id=room.id, bed_number=f"B101-{i}", status="occupied")
+                db.add(bed)
+                await db.flush()
+                db.add(models.Student(student_id_number=f"S{i:05d}", full_name=f"Student {i}", bed_id=bed.id))
+            await db.commit()
+
+    async def measure(update_student: Any, update_bed: Any, changed: bool) -> Dict[str, float]:
+        nonlocal statements
+        async with session_factory() as db:
+            students = list((await db.execute(select(models.Student).order_by(models.Student.id))).scalars())
+            beds = [await db.get(models.Bed, student.bed_id) for student in students]
+            rows = student_rows(students, beds, changed)
+            status = "available" if changed else "occupied"
+
+            statements = 0
+            start = time.perf_counter()
+            for student, row in zip(students, rows):
+                await update_student(db, db_obj=student, obj_in=row)
+            student_us = (time.perf_counter() - start) / len(students) * 1e6
+            student_sql = statements / len(students)
+
+            statements = 0
+            start = time.perf_counter()
+            for bed in beds:
+                await update_bed(db, db_obj=bed, obj_in={"status": status})
+            bed_us = (time.perf_counter() - start) / len(beds) * 1e6
+            bed_sql = statements / len(beds)
+
+            # Put the rows back so every round starts from the same data
+            for student, row in zip(students, student_rows(students, beds, False)):
+                student.full_name = row["full_name"].rstrip("*")
+            for bed in beds:
+                bed.status = "occupied"
+            await db.commit()
+        return {"student_us": student_us, "student_sql": student_sql, "bed_us": bed_us, "bed_sql": bed_sql}
+
+    async def bench() -> None:
+        await setup()
+        for changed in (False, True):
+            current, legacy = [], []
+            for _ in range(ROUNDS):
+                current.append(await measure(crud.crud_student.update, crud.crud_bed.update, changed))
+                legacy.append(await measure(legacy_update, legacy_update, changed))
+            label = "changed rows" if changed else "unchanged rows"
+            print(label)
+            for name, results in (("dirty fields", current), ("legacy", legacy)):
+                best = {key: min(result[key] for result in results) for key in results[0]}
+                print(
+                    f"  {name:<14} student {best['student_us']:8.1f} us {best['student_sql']:4.1f} sql"
+                    f" | bed {best['bed_us']:8.1f} us {best['bed_sql']:4.1f} sql"
+                )
+        await engine.dispose()
+
+    asyncio.run(bench())
+
+
+if __name__ == "__main__":
+    main()
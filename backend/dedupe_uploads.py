@@ -0,0 +1,104 @@
+"""
+Moves an existing uploads directory into the content store (see
+`app/core/content_store.py`): every stored image and derivative is hashed,
+and files with identical bytes become hard links to a single copy. Names
+in the database do not change. Safe to run again, and while the app runs.
+
+Prints the disk usage of the directory before and after. A backup of it
+shrinks the same way when the archiver keeps hard links (tar, rsync -H).
+
+Usage (from the backend directory):
+    python dedupe_uploads.py [--dry-run] [upload_dir]
+
+The upload directory defaults to UPLOAD_DIR from the settings.
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.content_store import ContentStore, file_digest
+
+# Left behind by interrupted writes, never referenced by the database
+TRANSIENT_SUFFIXES = (".tmp", ".link")
+
+
+def human(size: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024 or unit == "GiB":
+            return f"{size:.1f} {unit}" if unit != "B" else f"{int(size)} B"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+def stored_files(root: Path) -> List[Path]:
+    return sorted(
+        path for path in root.iterdir()
+        if path.is_file() and not path.is_symlink()
+        and not path.name.startswith(".") and not path.name.endswith(TRANSIENT_SUFFIXES)
+    )
+
+
+def disk_bytes_after(files: List[Path]) -> int:
+    # What the files would take once deduplicated, without touching them
+    sizes: Dict[Tuple[str, str], int] = {}
+    for path in files:
+        sizes[(file_digest(path), "".join(path.suffixes))] = path.stat().st_size
+    return sum(sizes.values())
+
+
+def report(label: str, usage: Dict[str, int]) -> None:
+    print(
+        f"{label:<7} {usage['files']} files, {human(usage['apparent_bytes'])} as copies, "
+        f"{human(usage['disk_bytes'])} on disk, {usage['blobs']} blobs "
+        f"({usage['unreferenced_blobs']} unreferenced)"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Deduplicate the uploads directory into its content store.")
+    parser.add_argument("upload_dir", nargs="?", help="defaults to UPLOAD_DIR")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be saved")
+    args = parser.parse_args()
+
+    if args.upload_dir:
+        root = Path(args.upload_dir)
+    else:
+        from app.config import settings
+        root = Path(settings.UPLOAD_DIR)
+    if not root.is_dir():
+        sys.exit(f"{root} is not a directory")
+
+    store = ContentStore(root)
+    before = store.usage()
+    report("before", before)
+    files = stored_files(root)
+
+    started = time.perf_counter()
+    if args.dry_run:
+        saved = before["disk_bytes"] - disk_bytes_after(files)
+        print(f"would save {human(saved)} ({saved / before['disk_bytes']:.1%})" if before["disk_bytes"] else "nothing to save")
+        return
+
+    for path in files:
+        store.adopt(path)
+    collected = store.collect_garbage()
+    after = store.usage()
+    report("after", after)
+
+    saved = before["disk_bytes"] - after["disk_bytes"]
+    print(
+        f"linked {len(files)} files in {time.perf_counter() - started:.1f}s: "
+        f"{store.deduplicated} duplicates, {store.blobs_created} new blobs, "
+        f"{collected} unreferenced blobs removed, {store.link_failures} failures"
+    )
+    ratio = f" ({saved / before['disk_bytes']:.1%})" if before["disk_bytes"] else ""
+    print(f"saved {human(saved)}{ratio} of disk and of backups that keep hard links")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,11 +9,18 @@ import subprocess
 import logging # Import logging
 
 from app import models, schemas # Import schemas
-from app.database import async_engine, AsyncSessionLocal
+from app.database import async_engine, AsyncSessionLocal, warm_up_pools
 from app.api.api import api_router
+from app.crud.base import InvalidCursorError
+from app.core.db_stats import DBStatsMiddleware
 from app.services.initialization import seed_database
+from app.services.token_blocklist import token_blocklist
+from app.services.audit_sink import audit_sink
+from app.services.audit_archiver import audit_archiver
+from app.services.file_service import file_service
+from app.utils.security import password_hashing_pool
 from app.config import settings
-from app.limiter import limiter
+from app.limiter import limiter, RateLimitStatsMiddleware
 from slowapi.errors import RateLimitExceeded
 from app.core.logging import setup_logging # Import setup_logging
 from app.utils.i18n import _ # Import translation function
@@ -43,9 +50,25 @@ async def lifespan(app: FastAPI):
     async with AsyncSessionLocal() as db:
         await seed_database(db) # Database seeding should be part of migration or manual process
     logger.info("Database seeding complete.")
+
+    try:
+        await warm_up_pools(settings.DB_POOL_WARMUP_CONNECTIONS)
+    except Exception as e:
+        # Not fatal: connections are then opened on first use
+        logger.warning(f"Database pool warm-up failed: {e}")
+
+    await token_blocklist.load()
+    token_blocklist.start()
+    audit_sink.start()
+    audit_archiver.start()
     logger.info("Application startup complete.") # Add a message
     yield
     # This code runs on shutdown
+    await audit_archiver.stop()
+    await audit_sink.stop() # Flush queued audit logs
+    await token_blocklist.stop()
+    password_hashing_pool.shutdown()
+    file_service.shutdown()
     logger.info("Application shutdown.")
 
 app = FastAPI(
@@ -96,6 +119,16 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         ).model_dump()
     )
 
+@app.exception_handler(InvalidCursorError)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursorError):
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        content=schemas.ErrorResponse(
+            detail=str(exc),
+            status_code=status.HTTP_400_BAD_REQUEST
+        ).model_dump()
+    )
+
 @app.exception_handler(RateLimitExceeded)
 async def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
     return JSONResponse(
@@ -115,6 +148,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request database statistics (commits per route), reported by /admin/metrics
+app.add_middleware(DBStatsMiddleware)
+
+# Per-route rate limit hits and rejections, reported by /admin/metrics
+app.add_middleware(RateLimitStatsMiddleware)
+
 # if not os.path.exists("uploads"):
 #     os.makedirs("uploads")
 # app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")